@@ -1,51 +1,368 @@
 """
 benchmark.py
 
-Execute several runs of the framework for benchmarking. 
+Execute a batch of synthesis jobs for benchmarking. Jobs are described in a manifest, each job is run in a separate
+worker process with its own time and memory limit, and results are appended as JSON lines to a results file. Jobs
+already recorded in the results file are skipped, such that an interrupted batch can be resumed.
+
+A manifest is either a JSON file containing a list of jobs (or an object with a list of "jobs" and a dictionary of
+"defaults" shared by all jobs), or a JSON lines file with one job per line. A job is a dictionary:
+    {
+        "id": "cav21/grid-sat-ar",          # optional, derived from the remaining fields if not provided
+        "project": "models/archive/cav21-paynt/grid",   # relative to the manifest directory
+        "sketch": "sketch.templ",           # optional
+        "props": "sketch.props",            # optional
+        "method": "ar",                     # optional
+        "options": {"relative-error": 0.05, "disable-expected-visits": true},  # optional, paynt CLI options
+        "timeout": 600,                     # optional, seconds
+        "memory_limit_mb": 8192             # optional
+    }
+Options can also be given as a list of command-line arguments, e.g. ["--relative-error", "0.05"].
 """
 
-import os
+import paynt.cli
+import paynt.utils.timer
+
 import click
+import hashlib
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import psutil
+import resource
+import signal
+import sys
+import time
+import traceback
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkJob:
+    ''' Single synthesis job of the batch. '''
+
+    def __init__(self, description, base_dir, defaults):
+        job = dict(defaults)
+        job.update(description)
+        if "project" not in job:
+            raise ValueError(f"job {description} does not specify a project")
+        self.project = os.path.normpath(os.path.join(base_dir, job["project"]))
+        self.sketch = job.get("sketch", "sketch.templ")
+        self.props = job.get("props", "sketch.props")
+        self.method = job.get("method", "ar")
+        self.options = job.get("options", {})
+        self.timeout = job.get("timeout")
+        self.memory_limit_mb = job.get("memory_limit_mb")
+        self.id = job.get("id")
+        if self.id is None:
+            self.id = self.default_id(job)
+
+    def default_id(self, job):
+        options = json.dumps(self.options, sort_keys=True)
+        digest = hashlib.sha256(options.encode()).hexdigest()[:8]
+        return f"{job['project']}:{self.sketch}:{self.props}:{self.method}:{digest}"
+
+    def option_arguments(self):
+        ''' :return list of paynt CLI arguments corresponding to the job options '''
+        if isinstance(self.options, list):
+            return [str(argument) for argument in self.options]
+        arguments = []
+        for name,value in self.options.items():
+            option = "--" + name.lstrip("-")
+            if value is None or value is False:
+                continue
+            if value is True:
+                arguments.append(option)
+                continue
+            values = value if isinstance(value, list) else [value]
+            for value in values:
+                arguments += [option, str(value)]
+        return arguments
+
+    def arguments(self):
+        ''' :return paynt CLI arguments of the job '''
+        arguments = [self.project, "--sketch", self.sketch, "--props", self.props, "--method", self.method]
+        if self.timeout is not None:
+            arguments += ["--timeout", str(self.timeout)]
+        return arguments + self.option_arguments()
+
+    def record(self):
+        return {
+            "id": self.id, "project": self.project, "sketch": self.sketch, "props": self.props,
+            "method": self.method, "options": self.options,
+            "timeout": self.timeout, "memory_limit_mb": self.memory_limit_mb,
+        }
+
+
+def load_manifest(manifest_path, defaults):
+    '''
+    Load jobs from the manifest.
+    :param defaults job fields shared by all jobs, overridden by the manifest defaults and the jobs themselves
+    :return a list of jobs
+    '''
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path) as f:
+        contents = f.read()
+    try:
+        manifest = json.loads(contents)
+    except json.JSONDecodeError:
+        manifest = [json.loads(line) for line in contents.splitlines() if line.strip()]
+    if isinstance(manifest, dict):
+        defaults = {**defaults, **manifest.get("defaults", {})}
+        manifest = manifest["jobs"]
+    jobs = [BenchmarkJob(description, base_dir, defaults) for description in manifest]
+    job_ids = set()
+    for job in jobs:
+        if job.id in job_ids:
+            raise ValueError(f"duplicate job id {job.id}")
+        job_ids.add(job.id)
+    return jobs
+
 
-import synt
+def load_finished(results_path, retry_failed):
+    ''' :return ids of the jobs recorded in the results file '''
+    finished = set()
+    if not os.path.exists(results_path):
+        return finished
+    with open(results_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # line truncated by an interrupted write
+                continue
+            if retry_failed and record.get("status") != "ok":
+                continue
+            finished.add(record["id"])
+    return finished
 
 
-def _stats_path(prefix, constants):
-    cstr = constants.replace(",", "_")
-    return os.path.join(prefix, "stats_" + cstr + ".sts")
+def synthesis_result(synthesizer):
+    ''' :return dictionary of the structured results of the synthesizer '''
+    result = {}
+    stat = synthesizer.stat
+    if stat is None:
+        return result
+    if stat.synthesis_timer is not None:
+        result["synthesis_time"] = round(stat.synthesis_timer.time, 2)
+    result["iterations_mdp"] = stat.iterations_mdp
+    result["iterations_dtmc"] = stat.iterations_dtmc
+    result["iterations_game"] = stat.iterations_game
+    if stat.family_size is not None and synthesizer.explored is not None:
+        result["explored"] = synthesizer.explored / stat.family_size
+    result["family_size"] = stat.family_size
+    result["value"] = float(stat.synthesized_value) if stat.synthesized_value is not None else None
+    result["assignment"] = str(stat.synthesized_assignment) if stat.synthesized_assignment is not None else None
+    return result
 
-def _log_path(prefix, constants):
-    cstr = constants.replace(",", "_")
-    return os.path.join(prefix, "stats_" + cstr + ".log")
 
+def run_job(job, log_path, connection):
+    '''
+    Worker process: run the job and send its results to the parent. Output of the job, including the output of the
+    native libraries, is redirected to the log file.
+    '''
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    log_file = open(log_path, "w")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(log_file.fileno(), sys.stdout.fileno())
+    os.dup2(log_file.fileno(), sys.stderr.fileno())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    paynt.cli.setup_logger()
+
+    paynt.utils.timer.GlobalMemoryLimit.memory_limit_mb = job.memory_limit_mb
+    record = {}
+    try:
+        synthesizer = paynt.cli.paynt_run.main(args=job.arguments(), standalone_mode=False)
+        record["status"] = "ok"
+        if synthesizer is not None:
+            record["result"] = synthesis_result(synthesizer)
+            if synthesizer.stat is not None and synthesizer.stat.job_type is not None:
+                record["summary"] = synthesizer.stat.get_summary()
+            if paynt.utils.timer.GlobalMemoryLimit.limit_reached():
+                record["status"] = "memout"
+            elif paynt.utils.timer.GlobalTimer.time_limit_reached():
+                record["status"] = "timeout"
+    except SystemExit as e:
+        record["status"] = "ok" if not e.code else "error"
+    except MemoryError:
+        record["status"] = "memout"
+    except Exception:
+        record["status"] = "error"
+        record["error"] = traceback.format_exc()
+    # peak resident memory of the worker, ru_maxrss is reported in kB
+    record["peak_memory_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    connection.send(record)
+    connection.close()
+
+
+class BenchmarkRunner:
+    '''
+    Runs jobs in worker processes, at most num_workers at a time. Each worker is given the job timeout as the paynt
+    timeout and the memory limit via GlobalMemoryLimit, such that the synthesis can stop gracefully and report its
+    results; a worker exceeding the limits by more than the grace margin is killed.
+    '''
+
+    # period (s) for checking the running workers
+    poll_period_seconds = 1
+    # additional time (s) after the timeout before a worker is killed
+    timeout_grace_seconds = 30
+    # relative memory margin after the memory limit before a worker is killed
+    memory_grace_factor = 1.2
+
+    def __init__(self, jobs, results_path, log_dir, num_workers):
+        self.jobs = jobs
+        self.results_path = results_path
+        self.log_dir = log_dir
+        self.num_workers = num_workers
+        self.context = multiprocessing.get_context("fork")
+        # job id -> (job, process, connection, start time, result)
+        self.running = {}
+
+    def log_path(self, job):
+        name = "".join(c if c.isalnum() or c in "-_." else "_" for c in job.id)
+        return os.path.join(self.log_dir, name + ".log")
+
+    def start(self, job):
+        receiver,sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=run_job, args=(job, self.log_path(job), sender), daemon=True)
+        process.start()
+        sender.close()
+        self.running[job.id] = [job, process, receiver, time.time(), None]
+        logger.info(f"started job {job.id}")
+
+    def write_record(self, record):
+        with open(self.results_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finish(self, job_id, status=None):
+        job,process,connection,start_time,result = self.running.pop(job_id)
+        if process.is_alive():
+            process.kill()
+        process.join()
+        connection.close()
+        record = job.record()
+        record["wall_time"] = round(time.time() - start_time, 2)
+        record["exit_code"] = process.exitcode
+        record["log"] = self.log_path(job)
+        if result is not None:
+            record.update(result)
+        if status is not None:
+            record["status"] = status
+        elif result is None:
+            record["status"] = "crashed"
+        self.write_record(record)
+        logger.info(f"finished job {job_id}: {record['status']} in {record['wall_time']} s")
+
+    def exceeded_limits(self, job, process, start_time):
+        ''' :return status of the worker if it exceeded its limits, None otherwise '''
+        if job.timeout is not None and time.time() - start_time > job.timeout + BenchmarkRunner.timeout_grace_seconds:
+            return "timeout"
+        if job.memory_limit_mb is not None:
+            try:
+                allocated_mb = psutil.Process(process.pid).memory_info().rss / (1024 * 1024)
+            except psutil.NoSuchProcess:
+                return None
+            if allocated_mb > job.memory_limit_mb * BenchmarkRunner.memory_grace_factor:
+                return "memout"
+        return None
+
+    def poll(self):
+        connections = {entry[2]:job_id for job_id,entry in self.running.items()}
+        sentinels = {entry[1].sentinel:job_id for job_id,entry in self.running.items()}
+        ready = multiprocessing.connection.wait(
+            list(connections.keys()) + list(sentinels.keys()), timeout=BenchmarkRunner.poll_period_seconds)
+        for item in ready:
+            if item in connections:
+                job_id = connections[item]
+                entry = self.running[job_id]
+                try:
+                    entry[4] = item.recv()
+                except EOFError:
+                    pass
+            else:
+                job_id = sentinels[item]
+            self.running[job_id][1].join(timeout=BenchmarkRunner.poll_period_seconds)
+        for job_id in list(self.running.keys()):
+            job,process,connection,start_time,result = self.running[job_id]
+            if not process.is_alive():
+                # collect a result sent right before the exit
+                if result is None and connection.poll():
+                    try:
+                        self.running[job_id][4] = connection.recv()
+                    except EOFError:
+                        pass
+                self.finish(job_id)
+                continue
+            status = self.exceeded_limits(job, process, start_time)
+            if status is not None:
+                self.finish(job_id, status)
+
+    def run(self):
+        pending = list(self.jobs)
+        pending.reverse()
+        try:
+            while pending or self.running:
+                while pending and len(self.running) < self.num_workers:
+                    self.start(pending.pop())
+                self.poll()
+        finally:
+            for job_id,entry in self.running.items():
+                entry[1].kill()
+                entry[1].join()
 
-def reset_handlers(handlers):
-    for h in handlers:
-        logging.getLogger().removeHandler(h)
 
 @click.command()
-@click.option('--project', help="root")
-@click.option('--sketch', help="the sketch")
-@click.option('--allowed', help="for each hole the options")
-@click.option('--restrictions', help="restrictions")
-@click.option('--optimality', help="optimality criterion")
-@click.option('--properties', help="the properties")
-@click.option('--check-prerequisites', default=False)
-@click.option('--add-cuts', default=1, type=int, help="add cuts")
-@click.option("--threads", type=int, default=1)
-@click.option("--constants", default="")
-@click.option("--prefix")
-def benchmark(project, sketch, allowed, restrictions, optimality, properties, check_prerequisites, add_cuts, threads, constants, prefix):
-    if not os.path.exists(prefix):
-        os.makedirs(prefix)
-    constants_set = constants.split(";")
-    print(constants_set)
-    for c in constants_set:
-        handlers = synt.setup_logger(_log_path(prefix, c))
-        stats_path = _stats_path(prefix, c)
-        synt.synthethise(project, sketch, allowed, restrictions, optimality, properties, check_prerequisites, add_cuts, threads, c, stats_path)
-        reset_handlers(handlers)
+@click.argument('manifest', type=click.Path(exists=True))
+@click.option("--results", type=click.Path(), default="results.jsonl", show_default=True,
+    help="JSON lines file to append job results to, jobs already recorded there are skipped")
+@click.option("--log-dir", type=click.Path(), default=None,
+    help="directory for the logs of individual jobs (default: directory 'logs' next to the results file)")
+@click.option("--workers", type=int, default=1, show_default=True,
+    help="number of jobs to run in parallel")
+@click.option("--timeout", type=int, default=None,
+    help="default timeout (s) of a job")
+@click.option("--memory-limit-mb", type=int, default=None,
+    help="default memory limit (MB) of a job")
+@click.option("--retry-failed", is_flag=True, default=False,
+    help="rerun jobs whose recorded status is not 'ok'")
+def benchmark(manifest, results, log_dir, workers, timeout, memory_limit_mb, retry_failed):
+    defaults = {}
+    if timeout is not None:
+        defaults["timeout"] = timeout
+    if memory_limit_mb is not None:
+        defaults["memory_limit_mb"] = memory_limit_mb
+    jobs = load_manifest(manifest, defaults)
+
+    finished = load_finished(results, retry_failed)
+    pending = [job for job in jobs if job.id not in finished]
+    logger.info(f"{len(jobs)} jobs in the manifest, {len(jobs)-len(pending)} already finished")
+
+    if log_dir is None:
+        log_dir = os.path.join(os.path.dirname(os.path.abspath(results)), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    results_dir = os.path.dirname(os.path.abspath(results))
+    os.makedirs(results_dir, exist_ok=True)
+    if os.path.exists(results) and os.path.getsize(results) > 0:
+        # terminate a line truncated by an interrupted write
+        with open(results, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    # make sure the workers are killed when the batch is terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    BenchmarkRunner(pending, results, log_dir, workers).run()
 
 
 if __name__ == '__main__':
+    paynt.cli.setup_logger()
     benchmark()
@@ -1,6 +1,7 @@
 from . import version
 
 import paynt.utils.timer
+import paynt.utils.telemetry
 import paynt.parser.sketch
 
 import paynt.quotient.quotient
@@ -11,7 +12,9 @@ import paynt.quotient.storm_pomdp_control
 import paynt.quotient.mdp
 
 import paynt.synthesizer.synthesizer
+import paynt.synthesizer.synthesizer_ar
 import paynt.synthesizer.synthesizer_cegis
+import paynt.synthesizer.synthesizer_multicore_ar
 import paynt.synthesizer.policy_tree
 import paynt.synthesizer.decision_tree
 
@@ -76,8 +79,22 @@ def setup_logger(log_path = None):
     help="synthesis method"
     )
 
+@click.option("--num-workers", type=int, default=None,
+    help="number of worker processes for multicore AR (default: number of CPUs)")
+
 @click.option("--disable-expected-visits", is_flag=True, default=False,
     help="do not compute expected visits for the splitting heuristic")
+@click.option("--disable-incremental-build", is_flag=True, default=False,
+    help="construct sub-MDPs of subfamilies from the whole quotient instead of the sub-MDP of the parent family")
+@click.option("--warm-start", is_flag=True, default=False,
+    help="warm-start model checking of subfamilies in AR from the results of the parent family and game solving in policy trees from the strategies of the parent game")
+@click.option("--assignment-cache-mb", type=int, default=256, show_default=True,
+    help="memory cap (MB) of the cache of DTMCs induced by hole assignments, 0 disables the cache")
+
+@click.option("--quotient-cache", type=click.Path(), default=None,
+    help="directory of the on-disk cache of quotients, reused by runs with the same sketch and properties")
+@click.option("--max-unfolded-edges", type=int, default=None,
+    help="abort if the unfolding of holes in the PRISM sketch would produce more edges than this limit")
 
 @click.option("--fsc-synthesis", is_flag=True, default=False,
     help="enable incremental synthesis of FSCs for a (Dec-)POMDP")
@@ -118,6 +135,8 @@ def setup_logger(log_path = None):
 
 @click.option("--mdp-discard-unreachable-choices", is_flag=True, default=False,
     help="if set, unreachable choices will be discarded from the splitting scheduler")
+@click.option("--policy-tree-workers", type=int, default=1, show_default=True,
+    help="number of worker processes expanding subtrees in policy tree synthesis, 1 means sequential synthesis")
 
 @click.option("--tree-depth", default=0, type=int,
     help="decision tree synthesis: tree depth")
@@ -136,6 +155,19 @@ def setup_logger(log_path = None):
     "--ce-generator", type=click.Choice(["dtmc", "mdp"]), default="dtmc", show_default=True,
     help="counterexample generator",
 )
+@click.option(
+    "--design-space-solver", type=click.Choice(["smt", "native"]), default="smt", show_default=True,
+    help="solver enumerating hole assignments in CEGIS and hybrid: SMT solver or the native enumerator",
+)
+@click.option("--cegis-workers", type=int, default=1, show_default=True,
+    help="number of worker processes evaluating batches of assignments in CEGIS, 1 means sequential CEGIS")
+
+@click.option("--telemetry-jsonl", type=click.Path(), default=None,
+    help="write structured telemetry events to the given JSON lines file")
+@click.option("--telemetry-prometheus", type=click.Path(), default=None,
+    help="export synthesis progress to the given file in the Prometheus text format")
+@click.option("--telemetry-sample-period", type=int, default=1, show_default=True,
+    help="emit only every n-th per-family telemetry event")
 @click.option("--profiling", is_flag=True, default=False,
     help="run profiling")
 
@@ -143,15 +175,18 @@ def paynt_run(
     project, sketch, props, relative_error, optimum_threshold, precision, exact, timeout,
     export,
     method,
-    disable_expected_visits,
+    num_workers,
+    disable_expected_visits, disable_incremental_build, warm_start, assignment_cache_mb,
+    quotient_cache, max_unfolded_edges,
     fsc_synthesis, fsc_memory_size, posterior_aware,
     storm_pomdp, iterative_storm, get_storm_result, storm_options, prune_storm,
     use_storm_cutoffs, unfold_strategy_storm,
     export_fsc_storm, export_fsc_paynt, export_synthesis,
-    mdp_discard_unreachable_choices,
+    mdp_discard_unreachable_choices, policy_tree_workers,
     tree_depth, tree_enumeration, tree_map_scheduler, add_dont_care_action,
     constraint_bound,
-    ce_generator,
+    ce_generator, design_space_solver, cegis_workers,
+    telemetry_jsonl, telemetry_prometheus, telemetry_sample_period,
     profiling
 ):
 
@@ -165,37 +200,59 @@ def paynt_run(
 
     # set CLI parameters
     paynt.quotient.quotient.Quotient.disable_expected_visits = disable_expected_visits
+    paynt.quotient.quotient.Quotient.incremental_build = not disable_incremental_build
+    paynt.quotient.quotient.Quotient.warm_start = warm_start
+    paynt.synthesizer.synthesizer_ar.SynthesizerAR.warm_start = warm_start
+    paynt.synthesizer.policy_tree.SynthesizerPolicyTree.warm_start = warm_start
+    paynt.quotient.quotient.Quotient.assignment_cache_mb = assignment_cache_mb
+    paynt.parser.quotient_cache.QuotientCache.directory = quotient_cache
+    paynt.parser.jani.JaniUnfolder.max_unfolded_edges = max_unfolded_edges
     paynt.synthesizer.synthesizer.Synthesizer.export_synthesis_filename_base = export_synthesis
     paynt.synthesizer.synthesizer_cegis.SynthesizerCEGIS.conflict_generator_type = ce_generator
+    paynt.synthesizer.synthesizer_cegis.SynthesizerCEGIS.design_space_solver_type = design_space_solver
+    paynt.synthesizer.synthesizer_cegis.SynthesizerCEGIS.num_workers = cegis_workers
+    paynt.synthesizer.synthesizer_multicore_ar.SynthesizerMultiCoreAR.num_workers = num_workers
     paynt.quotient.pomdp.PomdpQuotient.initial_memory_size = fsc_memory_size
     paynt.quotient.pomdp.PomdpQuotient.posterior_aware = posterior_aware
     paynt.quotient.decpomdp.DecPomdpQuotient.initial_memory_size = fsc_memory_size
     paynt.quotient.posmg.PosmgQuotient.initial_memory_size = fsc_memory_size
 
     paynt.synthesizer.policy_tree.SynthesizerPolicyTree.discard_unreachable_choices = mdp_discard_unreachable_choices
+    paynt.synthesizer.policy_tree.SynthesizerPolicyTree.num_workers = policy_tree_workers
 
     paynt.synthesizer.decision_tree.SynthesizerDecisionTree.tree_depth = tree_depth
     paynt.synthesizer.decision_tree.SynthesizerDecisionTree.tree_enumeration = tree_enumeration
     paynt.synthesizer.decision_tree.SynthesizerDecisionTree.scheduler_path = tree_map_scheduler
     paynt.quotient.mdp.MdpQuotient.add_dont_care_action = add_dont_care_action
 
-    storm_control = None
-    if storm_pomdp:
-        storm_control = paynt.quotient.storm_pomdp_control.StormPOMDPControl()
-        storm_control.set_options(
-            storm_options, get_storm_result, iterative_storm, use_storm_cutoffs,
-            unfold_strategy_storm, prune_storm, export_fsc_storm, export_fsc_paynt
-        )
-
-    sketch_path = os.path.join(project, sketch)
-    properties_path = os.path.join(project, props)
-    quotient = paynt.parser.sketch.Sketch.load_sketch(sketch_path, properties_path, export, relative_error, precision, constraint_bound, exact)
-    synthesizer = paynt.synthesizer.synthesizer.Synthesizer.choose_synthesizer(quotient, method, fsc_synthesis, storm_control)
-    synthesizer.run(optimum_threshold)
+    paynt.utils.telemetry.Telemetry.sample_period = telemetry_sample_period
+    if telemetry_jsonl is not None:
+        paynt.utils.telemetry.Telemetry.add_sink(paynt.utils.telemetry.JsonlSink(telemetry_jsonl))
+    if telemetry_prometheus is not None:
+        paynt.utils.telemetry.Telemetry.add_sink(paynt.utils.telemetry.PrometheusSink(telemetry_prometheus))
+
+    try:
+        storm_control = None
+        if storm_pomdp:
+            storm_control = paynt.quotient.storm_pomdp_control.StormPOMDPControl()
+            storm_control.set_options(
+                storm_options, get_storm_result, iterative_storm, use_storm_cutoffs,
+                unfold_strategy_storm, prune_storm, export_fsc_storm, export_fsc_paynt
+            )
+
+        sketch_path = os.path.join(project, sketch)
+        properties_path = os.path.join(project, props)
+        quotient = paynt.parser.sketch.Sketch.load_sketch(sketch_path, properties_path, export, relative_error, precision, constraint_bound, exact)
+        synthesizer = paynt.synthesizer.synthesizer.Synthesizer.choose_synthesizer(quotient, method, fsc_synthesis, storm_control)
+        synthesizer.run(optimum_threshold)
+    finally:
+        # flush the sinks also when the run fails and do not leak them to subsequent runs within the same process
+        paynt.utils.telemetry.Telemetry.close()
 
     if profiling:
         profiler.disable()
         print_profiler_stats(profiler)
+    return synthesizer
 
 def print_profiler_stats(profiler):
     stats = pstats.Stats(profiler)
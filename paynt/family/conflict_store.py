@@ -0,0 +1,151 @@
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ConflictStore:
+    '''
+    Store of conflicts learned in CEGIS. A conflict of an assignment within a family rejects all members of the family
+    that agree with the assignment on the conflicting holes, i.e. it rejects a box of hole options: the assigned option
+    for each conflicting hole and the options of the family for the remaining holes. A box is stored as a dictionary
+    mapping each restricted hole to the frozenset of its options; unrestricted holes are omitted.
+    The boxes are indexed by (hole,option) pairs, which allows to (1) drop conflicts subsumed by a stored box before
+    they reach the design space solver and (2) prune families contained in some stored box.
+    :note the store is kept in sync with the push/pop scopes of the design space solver via level(), such that every
+        stored box is also excluded in the solver
+    '''
+
+    def __init__(self):
+        # box id -> box
+        self.boxes = {}
+        self.next_box_id = 0
+        # (hole,option) -> set of ids of the boxes restricting the hole to a set containing the option
+        self.index = {}
+        # ids of the stored boxes restricting no hole, i.e. rejecting the whole design space
+        self.unrestricted_boxes = set()
+        # for each scope, ids of boxes added in this scope
+        self.scopes = [[]]
+
+        self.conflicts_total = 0
+        self.conflicts_subsumed = 0
+        self.boxes_superseded = 0
+        self.conflict_holes_total = 0
+        self.families_pruned = 0
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def level(self, refinement_depth):
+        ''' Reset the scope to correspond to refinement level, same as the design space solver does. '''
+        if refinement_depth == 0:
+            return
+        while len(self.scopes) > refinement_depth:
+            for box_id in self.scopes.pop():
+                self.remove_box(box_id)
+        self.scopes.append([])
+
+    def family_box(self, family):
+        ''' :return the box of the family '''
+        box = {}
+        for hole in range(family.num_holes):
+            if family.hole_num_options(hole) < family.hole_num_options_total(hole):
+                box[hole] = frozenset(family.hole_options(hole))
+        return box
+
+    def conflict_box(self, family, assignment, conflict):
+        box = self.family_box(family)
+        for hole in conflict:
+            if family.hole_num_options_total(hole) > 1:
+                box[hole] = frozenset(assignment.hole_options(hole))
+        return box
+
+    def add_box(self, box):
+        box_id = self.next_box_id
+        self.next_box_id += 1
+        self.boxes[box_id] = box
+        if not box:
+            self.unrestricted_boxes.add(box_id)
+        for hole,options in box.items():
+            for option in options:
+                self.index.setdefault((hole,option),set()).add(box_id)
+        self.scopes[-1].append(box_id)
+
+    def remove_box(self, box_id):
+        box = self.boxes.pop(box_id, None)
+        if box is None:
+            # superseded box
+            return
+        self.unrestricted_boxes.discard(box_id)
+        for hole,options in box.items():
+            for option in options:
+                box_ids = self.index[(hole,option)]
+                box_ids.discard(box_id)
+                if not box_ids:
+                    del self.index[(hole,option)]
+
+    def find_superset(self, box):
+        '''
+        :return id of a stored box containing the given box, or None if no such box exists
+        '''
+        if self.unrestricted_boxes:
+            return next(iter(self.unrestricted_boxes))
+        # a superset can only restrict holes restricted by the box, to an option set containing the box options
+        hits = {}
+        for hole,options in box.items():
+            option = next(iter(options))
+            for box_id in self.index.get((hole,option),()):
+                hits[box_id] = hits.get(box_id,0) + 1
+        for box_id,count in hits.items():
+            stored = self.boxes[box_id]
+            if count < len(stored):
+                continue
+            if all(options <= stored[hole] for hole,options in box.items() if hole in stored):
+                return box_id
+        return None
+
+    def find_subsets(self, box):
+        ''' :return ids of stored boxes contained in the given box '''
+        if not box:
+            return list(self.boxes.keys())
+        # a subset restricts the most restricted hole of the box to some of its options
+        hole = min(box, key=lambda hole: len(box[hole]))
+        candidates = set()
+        for option in box[hole]:
+            candidates |= self.index.get((hole,option),set())
+        subsets = []
+        for box_id in candidates:
+            stored = self.boxes[box_id]
+            if all(hole in stored and stored[hole] <= options for hole,options in box.items()):
+                subsets.append(box_id)
+        return subsets
+
+    def add_conflicts(self, family, assignment, conflicts):
+        '''
+        Store the conflicts of the assignment within the family.
+        :return conflicts that are not subsumed by the stored ones and must be excluded in the solver
+        '''
+        new_conflicts = []
+        for conflict in conflicts:
+            self.conflicts_total += 1
+            self.conflict_holes_total += len(conflict)
+            box = self.conflict_box(family, assignment, conflict)
+            if self.find_superset(box) is not None:
+                self.conflicts_subsumed += 1
+                continue
+            for box_id in self.find_subsets(box):
+                self.remove_box(box_id)
+                self.boxes_superseded += 1
+            self.add_box(box)
+            new_conflicts.append(conflict)
+        return new_conflicts
+
+    def covers(self, family):
+        ''' :return True if all members of the family are rejected by a single stored conflict '''
+        if self.find_superset(self.family_box(family)) is None:
+            return False
+        self.families_pruned += 1
+        return True
+
+    def __str__(self):
+        avg_size = round(self.conflict_holes_total / self.conflicts_total, 1) if self.conflicts_total > 0 else 0
+        return f"conflicts: {self.conflicts_total}, avg size: {avg_size}, subsumed: {self.conflicts_subsumed}, " \
+            f"superseded: {self.boxes_superseded}, stored: {len(self)}, families pruned: {self.families_pruned}"
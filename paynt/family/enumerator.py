@@ -0,0 +1,63 @@
+import payntbind
+
+import paynt.family.solver
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class EnumeratorFamilyEncoding():
+    ''' Family explored by the native enumerator: the family is passed to the enumerator as is. '''
+
+    def __init__(self, enumerator, family):
+        self.enumerator = enumerator
+        self.family = family
+        # set to False as soon as pick_assignment returns None
+        self.has_assignments = True
+
+    def pick_assignment(self):
+        if not self.has_assignments:
+            return None
+        hole_to_option = self.enumerator.enumerator.pickAssignment(self.family.family)
+        if hole_to_option is None:
+            self.has_assignments = False
+            return None
+        return self.family.assume_options_copy([[option] for option in hole_to_option])
+
+
+class FamilyEnumerator(paynt.family.solver.DesignSpaceSolver):
+    '''
+    Native (payntbind) alternative to SmtSolver. The design space is a finite-domain problem with one-hot encoded
+    holes, so the enumerator implements unit propagation and backtracking search directly over the hole domains,
+    avoiding the overhead of the SMT solver API. Provides the same interface as SmtSolver.
+    '''
+
+    def __init__(self, family):
+        logger.debug("using the native enumerator for design space exploration.")
+        super().__init__()
+        self.enumerator = payntbind.synthesis.FamilyEnumerator(family.family)
+
+    def family_encoding(self, family):
+        return EnumeratorFamilyEncoding(self, family)
+
+    def exclude_conflict(self, family, assignment, conflict):
+        '''
+        Exclude assignment from the family using provided conflict.
+        :param family base family
+        :param assignment hole assignment that yielded unsatisfiable DTMC
+        :param conflict indices of relevant holes in the corresponding counterexample
+        :return estimate of pruned assignments
+        '''
+        self.enumerator.excludeConflict(family.family, assignment.family, list(conflict))
+        conflict = set(conflict)
+        pruning_estimate = 1
+        for hole in range(family.num_holes):
+            if hole not in conflict:
+                pruning_estimate *= family.hole_num_options(hole)
+        return pruning_estimate
+
+    def push(self):
+        self.enumerator.push()
+
+    def pop(self):
+        self.enumerator.pop()
@@ -1,7 +1,5 @@
 import payntbind.synthesis
 
-import paynt.family.smt
-
 import math
 import random
 import itertools
@@ -22,6 +20,25 @@ class ParentInfo():
         self.selected_choices = None
         self.constraint_indices = None
         self.refinement_depth = None
+        # sub-MDP of the parent family, used to construct sub-MDPs of subfamilies incrementally; released once all
+        #   subfamilies are built
+        self.mdp = None
+        self.num_children_unbuilt = None
+        # sub- to full state mapping of the sub-MDP of the parent family
+        self.state_map = None
+        # analysis result of the parent family, used to warm-start model checking of subfamilies
+        self.analysis_result = None
+
+    def release_child(self):
+        '''
+        Notify that a subfamily was built or will never be built in this process (e.g. it was handed over to another
+        process), the sub-MDP of the parent is released once no subfamily needs it.
+        '''
+        if self.mdp is None:
+            return
+        self.num_children_unbuilt -= 1
+        if self.num_children_unbuilt == 0:
+            self.mdp = None
 
 
 class Family:
@@ -125,6 +142,19 @@ class Family:
             subfamily.hole_set_options(hole,options)
         return subfamily
 
+    def to_bytes(self):
+        ''' Serialize hole options of this family into a packed bit array. '''
+        return self.family.to_bytes()
+
+    def from_bytes(self, data):
+        '''
+        Create a copy having the hole options serialized in @data.
+        @note @data must have been created by to_bytes() of a family with the same holes.
+        '''
+        subfamily = self.copy()
+        subfamily.family.from_bytes(data)
+        return subfamily
+
     def split(self, splitter, suboptions):
         return [self.assume_hole_options_copy(splitter,options) for options in suboptions]
 
@@ -163,4 +193,4 @@ class Family:
 
     def encode(self, smt_solver):
         if self.encoding is None:
-            self.encoding = paynt.family.smt.FamilyEncoding(smt_solver, self)
+            self.encoding = smt_solver.family_encoding(self)
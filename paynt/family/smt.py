@@ -1,6 +1,8 @@
 import sys
 import z3
 
+import paynt.family.solver
+
 # import pycvc5 if installed
 import importlib
 if importlib.util.find_spec('pycvc5') is not None:
@@ -11,55 +13,48 @@ logger = logging.getLogger(__name__)
 
 
 class FamilyEncoding():
+    '''
+    Family encoded as a set of assumption literals over the selectors of the SMT solver. No new terms are constructed:
+    for each restricted hole, the family either assumes the selector of its only option or assumes the negated
+    selectors of all excluded options.
+    '''
 
     def __init__(self, smt_solver, family):
 
         self.smt_solver = smt_solver
         self.family = family
 
-        # for each hole, a formula encoding its possible options
-        self.hole_clauses = None
-        # SMT formula describing the family
-        self.encoding = None
+        # for each hole, a list of literals such that their disjunction holds iff the hole is outside of the family
+        #   (empty list for holes that are not restricted)
+        self.hole_outside = []
+        # assumptions describing the family
+        self.assumptions = []
         # set to False as soon as pick_assignment returns None
         self.has_assignments = True
 
-        hole_clauses = []
         for hole in range(family.num_holes):
-            all_clauses = smt_solver.solver_clauses[hole]
-            clauses = [all_clauses[option] for option in family.hole_options(hole)]
-            if len(clauses) == 1:
-                or_clause = clauses[0]
-            else:
-                if smt_solver.use_python_z3:
-                    or_clause = z3.Or(clauses)
-                elif smt_solver.use_cvc:
-                    smt_solver = smt_solver.solver.mkTerm(pycvc5.Kind.Or, clauses)
-                else:
-                    pass
-            hole_clauses.append(or_clause)
-
-        if len(hole_clauses) == 1:
-            encoding = hole_clauses[0]
-        else:
-            if smt_solver.use_python_z3:
-                encoding = z3.And(hole_clauses)
-            elif smt_solver.use_cvc:
-                encoding = smt_solver.solver.mkTerm(pycvc5.Kind.And, hole_clauses)
-            else:
-                pass
-
-        self.hole_clauses = hole_clauses
-        self.encoding = encoding
+            if family.hole_num_options(hole) == family.hole_num_options_total(hole):
+                self.hole_outside.append([])
+                continue
+            options = family.hole_options(hole)
+            if len(options) == 1:
+                option = options[0]
+                self.assumptions.append(smt_solver.selectors[hole][option])
+                self.hole_outside.append([smt_solver.selectors_negated[hole][option]])
+                continue
+            options = set(options)
+            excluded = [option for option in range(family.hole_num_options_total(hole)) if option not in options]
+            self.assumptions += [smt_solver.selectors_negated[hole][option] for option in excluded]
+            self.hole_outside.append([smt_solver.selectors[hole][option] for option in excluded])
 
 
     def pick_assignment(self):
-        
+
         if not self.has_assignments:
             return None
-        
+
         if self.smt_solver.use_python_z3:
-            solver_result = self.smt_solver.solver.check(self.encoding)
+            solver_result = self.smt_solver.solver.check(*self.assumptions)
             if solver_result == z3.unsat:
                 self.has_assignments = False
                 return None
@@ -69,7 +64,7 @@ class FamilyEncoding():
                 option = sat_model[var].as_long()
                 hole_options.append([option])
         elif self.smt_solver.use_cvc:
-            solver_result = self.smt_solver.solver.checkSatAssuming(self.encoding)
+            solver_result = self.smt_solver.solver.checkSatAssuming(self.assumptions)
             if solver_result.isUnsat():
                 self.has_assignments = False
                 return None
@@ -78,30 +73,34 @@ class FamilyEncoding():
                 option = self.smt_solver.solver.getValue(var).getIntegerValue()
                 hole_options.append([option])
         else:
-            pass            
-        
+            pass
+
         assignment = self.family.assume_options_copy(hole_options)
         return assignment
 
-        
-class SmtSolver():
+
+class SmtSolver(paynt.family.solver.DesignSpaceSolver):
 
     def __init__(self, family):
 
+        super().__init__()
+
         # SMT solver containing description of the unexplored design space
         self.solver = None
         # SMT solver choice
         self.use_python_z3 = False
         self.use_cvc = False
-    
+
         # for each hole contains a corresponding solver variable
         self.solver_vars = None
         # for each hole contains a list of equalities [h==opt1,h==opt2,...],
         #   where h is the corresponding solver variable
         self.solver_clauses = None
-
-        # current depth of push/pop solving
-        self.solver_depth = 0
+        # for each hole contains a list of Boolean selectors [s1,s2,...], where si is equivalent to h==opti; families
+        #   are encoded as assumptions over the selectors and conflicts are clauses over the selectors
+        self.selectors = None
+        # for each hole contains a list of negated selectors
+        self.selectors_negated = None
 
         # choose solver
         if "pycvc5" in sys.modules:
@@ -130,12 +129,18 @@ class SmtSolver():
         else:
             raise RuntimeError("Need to enable at least one SMT solver.")
 
-        # create solver clauses
+        # create solver clauses and the selectors, restrict each hole to its options
         self.solver_clauses = []
+        self.selectors = []
+        self.selectors_negated = []
         for hole in range(family.num_holes):
-            var = self.solver_vars[hole]
-            clauses = [self.create_hole_clause(hole,option) for option in family.hole_options(hole)]
+            options = range(family.hole_num_options_total(hole))
+            clauses = [self.create_hole_clause(hole,option) for option in options]
+            selectors = [self.create_selector(hole,option,clauses[option]) for option in options]
             self.solver_clauses.append(clauses)
+            self.selectors.append(selectors)
+            self.selectors_negated.append([self.negate(selector) for selector in selectors])
+            self.add_clause(selectors)
 
 
     def create_hole_clause(self, hole, option):
@@ -147,97 +152,83 @@ class SmtSolver():
         else:
             return None
 
+    def create_selector(self, hole, option, clause):
+        ''' Create a Boolean selector equivalent to the hole clause. '''
+        name = f"{hole}_{option}"
+        if self.use_python_z3:
+            selector = z3.Bool(name)
+            self.solver.add(selector == clause)
+        elif self.use_cvc:
+            selector = self.solver.mkConst(self.solver.getBooleanSort(), name)
+            self.solver.assertFormula(self.solver.mkTerm(pycvc5.Kind.Equal, selector, clause))
+        else:
+            selector = None
+        return selector
 
-    def pick_assignment(self, family):
-        '''
-        :return unexplored hole assignment from the family
-            (or None if no instance remains)
-        '''
-        family.encode(self)
-        return family.encoding.pick_assignment()
+    def negate(self, literal):
+        if self.use_python_z3:
+            return z3.Not(literal)
+        elif self.use_cvc:
+            return literal.notTerm()
+        else:
+            return None
 
-    def pick_assignment_priority(self, family, priority_subfamily):
+    def add_clause(self, literals):
+        ''' Add a disjunction of the literals to the solver. '''
+        if self.use_python_z3:
+            if len(literals) == 0:
+                clause = False
+            elif len(literals) == 1:
+                clause = literals[0]
+            else:
+                clause = z3.Or(literals)
+            self.solver.add(clause)
+        elif self.use_cvc:
+            if len(literals) == 0:
+                clause = self.solver.mkFalse()
+            elif len(literals) == 1:
+                clause = literals[0]
+            else:
+                clause = self.solver.mkTerm(pycvc5.Kind.Or, literals)
+            self.solver.assertFormula(clause)
+        else:
+            pass
 
-        if priority_subfamily is None:
-            return self.pick_assignment(family)
 
-        # explore priority subfamily first
-        assignment = self.pick_assignment(priority_subfamily)
-        if assignment is not None:
-            return assignment
+    def family_encoding(self, family):
+        return FamilyEncoding(self, family)
 
-        # explore remaining members
-        return self.pick_assignment(family)
-    
-    
-    def exclude_conflicts(self, family, assignment, conflicts):
-        '''
-        :param conflicts a list of conflicts (may be empty)
-        :return estimate of pruned assignments
-        '''
-        pruning_estimate = 0
-        for conflict in conflicts:
-            pruning_estimate += self.exclude_conflict(family, assignment, conflict)
-        return pruning_estimate
-    
-    
     def exclude_conflict(self, family, assignment, conflict):
         '''
-        Exclude assignment from the family encoding using provided conflict.
+        Exclude assignment from the family encoding using provided conflict. The conflict is learned as a clause over
+        the selectors: either some hole of the conflict differs from the assignment or some hole is outside the family.
         :param family base family
         :param assignment hole assignment that yielded unsatisfiable DTMC
         :param conflict indices of relevant holes in the corresponding counterexample
         :return estimate of pruned assignments
         '''
         assert family.encoding is not None
-        
+
         if family.encoding is None:
             family.encoding = FamilyEncoding(self, family)
 
+        conflict = set(conflict)
         pruning_estimate = 1
-        counterexample_clauses = []
-        for hole,var in enumerate(self.solver_vars):
+        conflict_literals = []
+        for hole in range(family.num_holes):
             if hole in conflict:
                 option = assignment.hole_options(hole)[0]
-                counterexample_clauses.append(self.solver_clauses[hole][option])
+                conflict_literals.append(self.selectors_negated[hole][option])
             else:
-                if family.hole_num_options(hole) < family.hole_num_options_total(hole):
-                    counterexample_clauses.append(family.encoding.hole_clauses[hole])
+                conflict_literals += family.encoding.hole_outside[hole]
                 pruning_estimate *= family.hole_num_options(hole)
-
-        if self.use_python_z3:
-            if len(counterexample_clauses) == 0:
-                counterexample_encoding = False
-            else:
-                counterexample_encoding = z3.Not(z3.And(counterexample_clauses))
-            self.solver.add(counterexample_encoding)
-        elif self.use_cvc:
-            if len(counterexample_clauses) == 0:
-                counterexample_encoding = self.solver.mkFalse()
-            elif len(counterexample_clauses) == 1:
-                counterexample_encoding = counterexample_clauses[0].notTerm()
-            else:
-                counterexample_encoding = self.solver.mkTerm(pycvc5.Kind.And, counterexample_clauses).notTerm()
-            self.solver.assertFormula(counterexample_encoding)
-        else:
-            pass
+        self.add_clause(conflict_literals)
 
         return pruning_estimate
 
 
-    def level(self, refinement_depth):
-        ''' Reset solver depth level to correspond to refinement level. '''
-
-        if refinement_depth == 0:
-            # fresh family, nothing to do
-            return
-
-        # reset to the scope of the parent (refinement_depth - 1)
-        while self.solver_depth >= refinement_depth:
-            self.solver.pop()
-            self.solver_depth -= 1
-
-        # create new scope
+    def push(self):
         self.solver.push()
-        self.solver_depth += 1
 
+    def pop(self):
+        self.solver.pop()
@@ -0,0 +1,69 @@
+class DesignSpaceSolver():
+    '''
+    Base class of the solvers enumerating the unexplored members of a design space in CEGIS. Subclasses describe how
+    a family is encoded (family_encoding), how a conflict is learned (exclude_conflict) and how solver scopes are
+    created (push) and removed (pop).
+    '''
+
+    def __init__(self):
+        # current depth of push/pop solving
+        self.solver_depth = 0
+
+    def family_encoding(self, family):
+        raise NotImplementedError
+
+    def exclude_conflict(self, family, assignment, conflict):
+        raise NotImplementedError
+
+    def push(self):
+        raise NotImplementedError
+
+    def pop(self):
+        raise NotImplementedError
+
+    def pick_assignment(self, family):
+        '''
+        :return unexplored hole assignment from the family
+            (or None if no instance remains)
+        '''
+        family.encode(self)
+        return family.encoding.pick_assignment()
+
+    def pick_assignment_priority(self, family, priority_subfamily):
+
+        if priority_subfamily is None:
+            return self.pick_assignment(family)
+
+        # explore priority subfamily first
+        assignment = self.pick_assignment(priority_subfamily)
+        if assignment is not None:
+            return assignment
+
+        # explore remaining members
+        return self.pick_assignment(family)
+
+    def exclude_conflicts(self, family, assignment, conflicts):
+        '''
+        :param conflicts a list of conflicts (may be empty)
+        :return estimate of pruned assignments
+        '''
+        pruning_estimate = 0
+        for conflict in conflicts:
+            pruning_estimate += self.exclude_conflict(family, assignment, conflict)
+        return pruning_estimate
+
+    def level(self, refinement_depth):
+        ''' Reset solver depth level to correspond to refinement level. '''
+
+        if refinement_depth == 0:
+            # fresh family, nothing to do
+            return
+
+        # reset to the scope of the parent (refinement_depth - 1)
+        while self.solver_depth >= refinement_depth:
+            self.pop()
+            self.solver_depth -= 1
+
+        # create new scope
+        self.push()
+        self.solver_depth += 1
@@ -34,9 +34,14 @@ class Mdp:
     def initial_state(self):
         return self.model.initial_states[0]
 
-    def model_check_property(self, prop, alt=False):
+    def model_check_formula(self, formula, hint_values=None):
+        if hint_values is None:
+            return paynt.verification.property.Property.model_check(self.model,formula)
+        return paynt.verification.property.Property.model_check_with_hint(self.model,formula,hint_values)
+
+    def model_check_property(self, prop, alt=False, hint_values=None):
         formula = prop.formula if not alt else prop.formula_alt
-        result = paynt.verification.property.Property.model_check(self.model,formula)
+        result = self.model_check_formula(formula, hint_values)
         value = result.at(self.initial_state)
         return paynt.verification.property_result.PropertyResult(prop, result, value)
 
@@ -72,7 +77,8 @@ class Smg(Mdp):
     def __init__(self, model):
         super().__init__(model)
 
-    def model_check_property(self, prop, alt=False):
+    def model_check_property(self, prop, alt=False, hint_values=None):
+        # warm-starting is not supported for games, the hint is ignored
         formula = prop.game_formula if not alt else prop.game_formula_alt
 
         result = payntbind.synthesis.model_check_smg(self.model, formula,
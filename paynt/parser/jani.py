@@ -5,6 +5,7 @@ import paynt.verification.property
 import paynt.models.model_builder
 
 import itertools
+import math
 from collections import defaultdict
 
 import logging
@@ -13,7 +14,8 @@ logger = logging.getLogger(__name__)
 
 class CombinationColoring:
     '''
-    Dictionary of colors associated with different hole combinations.
+    Dictionary of colors associated with different hole combinations. A combination is a tuple of (hole,option) pairs
+    for the holes relevant to the edge.
     Note: color 0 is reserved for general hole-free objects.
     '''
     def __init__(self):
@@ -36,6 +38,9 @@ class CombinationColoring:
 class JaniUnfolder:
     ''' Unfolder of hole combinations into JANI program. '''
 
+    # maximum (estimated) number of edges of the unfolded program, if None, the number of edges is not limited
+    max_unfolded_edges = None
+
     def __init__(self, prism, hole_expressions, specification, family):
 
         logger.debug("constructing JANI program...")
@@ -99,11 +104,20 @@ class JaniUnfolder:
 
         combination_coloring = CombinationColoring()
         jani_program = stormpy.JaniModel(jani)
+        automaton_edge_holes = [
+            [JaniUnfolder.edge_holes(edge,hole_variables) for edge in automaton.edges]
+            for automaton in jani_program.automata
+        ]
+        JaniUnfolder.check_unfolded_edges(automaton_edge_holes, hole_expressions)
+
         new_automata = dict()
         for aut_index,automaton in enumerate(jani_program.automata):
-            if not JaniUnfolder.automaton_has_holes(automaton, hole_variables):
+            edge_holes = automaton_edge_holes[aut_index]
+            if not any(len(holes) > 0 for holes in edge_holes):
                 continue
-            new_aut = JaniUnfolder.construct_automaton(automaton, hole_variables, hole_expressions, combination_coloring)
+            new_aut = JaniUnfolder.construct_automaton(
+                automaton, edge_holes, hole_variables, hole_expressions, combination_coloring
+            )
             new_automata[aut_index] = new_aut
         for aut_index,aut in new_automata.items():
             jani_program.replace_automaton(aut_index, aut)
@@ -121,12 +135,30 @@ class JaniUnfolder:
                 if edge.color == 0:
                     continue
                 global_index = jani_program.encode_automaton_and_edge_index(aut_index, edge_index)
-                options = combination_coloring.reverse_coloring[edge.color]
-                options = [(hole_index,option) for hole_index,option in enumerate(options) if option is not None]
-                edge_to_hole_options[global_index] = options
+                edge_to_hole_options[global_index] = list(combination_coloring.reverse_coloring[edge.color])
 
         return jani_program,edge_to_hole_options
 
+    @staticmethod
+    def check_unfolded_edges(automaton_edge_holes, hole_expressions):
+        '''
+        Estimate the blow-up of the unfolding before it starts: each edge is unfolded into one edge per combination
+        of the options of its holes. Edges whose guards are unsatisfiable for some combination are dropped, so this
+        is an upper bound. The whole unfolded program is kept in memory, so the only protection against a blow-up is
+        to abort before unfolding when the bound exceeds max_unfolded_edges.
+        '''
+        num_edges = 0
+        num_unfolded_edges = 0
+        for edge_holes in itertools.chain.from_iterable(automaton_edge_holes):
+            num_edges += 1
+            num_unfolded_edges += math.prod(len(hole_expressions[hole]) for hole in edge_holes)
+        logger.info(f"unfolding {num_edges} edges into at most {num_unfolded_edges} edges " \
+            f"(blow-up {round(num_unfolded_edges/max(num_edges,1),1)}x)")
+        limit = JaniUnfolder.max_unfolded_edges
+        if limit is not None and num_unfolded_edges > limit:
+            raise ValueError(f"the unfolded program would have up to {num_unfolded_edges} edges, " \
+                f"which exceeds the limit of {limit} edges")
+
     @staticmethod
     def edge_holes(edge, hole_variables):
         variables = set()
@@ -143,52 +175,48 @@ class JaniUnfolder:
         return [hole for hole,variable in enumerate(hole_variables) if variable in variables]
 
     @staticmethod
-    def automaton_has_holes(automaton, hole_variables):
-        for edge in automaton.edges:
-            if len(JaniUnfolder.edge_holes(edge,hole_variables)) > 0:
-                return True
-        return False
-
-    @staticmethod
-    def construct_automaton(automaton, hole_variables, hole_expressions, combination_coloring):
+    def construct_automaton(automaton, automaton_edge_holes, hole_variables, hole_expressions, combination_coloring):
         new_aut = stormpy.storage.JaniAutomaton(automaton.name, automaton.location_variable)
         [new_aut.add_location(loc) for loc in automaton.locations]
         [new_aut.add_initial_location(idx) for idx in automaton.initial_location_indices]
         [new_aut.variables.add_variable(var) for var in automaton.variables]
-        for edge in automaton.edges:
-            new_edges = JaniUnfolder.construct_edges(edge, hole_variables, hole_expressions, combination_coloring)
+        for edge,edge_holes in zip(automaton.edges,automaton_edge_holes):
+            new_edges = JaniUnfolder.construct_edges(
+                edge, edge_holes, hole_variables, hole_expressions, combination_coloring
+            )
             for new_edge in new_edges:
                 new_aut.add_edge(new_edge)
         return new_aut
 
     @staticmethod
-    def construct_edges(edge, hole_variables, hole_expressions, combination_coloring):
-        edge_holes = JaniUnfolder.edge_holes(edge,hole_variables)
+    def construct_edges(edge, edge_holes, hole_variables, hole_expressions, combination_coloring):
+        ''' :return the edges for all combinations of options of the edge holes '''
         if len(edge_holes) == 0:
             return [JaniUnfolder.construct_edge(edge)]
 
-        combinations = [
-            (list(range(len(expressions))) if hole in edge_holes else [None])
-            for hole,expressions in enumerate(hole_expressions)
-        ]
         new_edges = []
-        for combination in itertools.product(*combinations):
+        options = [range(len(hole_expressions[hole])) for hole in edge_holes]
+        for combination in itertools.product(*options):
             substitution = {
-                hole_variables[hole] : expressions[combination[hole]]
-                for hole,expressions in enumerate(hole_expressions)
-                if combination[hole] is not None
+                hole_variables[hole] : hole_expressions[hole][option]
+                for hole,option in zip(edge_holes,combination)
             }
             new_edge = JaniUnfolder.construct_edge(edge,substitution)
-            new_edge.color = combination_coloring.get_or_make_color(combination)
+            if new_edge is None:
+                continue
+            new_edge.color = combination_coloring.get_or_make_color(tuple(zip(edge_holes,combination)))
             new_edges.append(new_edge)
         return new_edges
 
     @staticmethod
     def construct_edge(edge, substitution = None):
+        ''' :return the edge with holes substituted, or None if the substituted guard is unsatisfiable '''
         guard = stormpy.Expression(edge.template_edge.guard)
         assignments = edge.template_edge.assignments.clone()
         if substitution is not None:
             guard = guard.substitute(substitution)
+            if not guard.contains_variables() and not guard.evaluate_as_bool():
+                return None
             assignments.substitute(substitution,substitute_transcendental_numbers=True)
         template_edge = stormpy.storage.JaniTemplateEdge(guard)
         payntbind.synthesis.janiTemplateEdgeAddAssignments(template_edge,assignments)
@@ -0,0 +1,81 @@
+import paynt
+import paynt.quotient.stored
+
+import hashlib
+import os
+import shutil
+import uuid
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class QuotientCache:
+    '''
+    On-disk cache of quotients, keyed by the contents of the sketch and the properties files and by the version of
+    PAYNT. Each cached quotient is stored in its own directory, see paynt.quotient.stored.StoredQuotient. Only quotients
+    that can be reconstructed from flat arrays (families of DTMCs) are cached.
+    '''
+
+    # directory of the cache, if None, the cache is disabled
+    directory = None
+
+    @staticmethod
+    def key(sketch_path, properties_path):
+        digest = hashlib.sha256()
+        digest.update(paynt.version().encode())
+        for path in [sketch_path, properties_path]:
+            digest.update(b"\0")
+            with open(path, "rb") as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    @classmethod
+    def path(cls, sketch_path, properties_path):
+        return os.path.join(cls.directory, cls.key(sketch_path, properties_path))
+
+    @classmethod
+    def load(cls, sketch_path, properties_path, relative_error, precision):
+        '''
+        :return the cached quotient or None if the quotient is not cached
+        '''
+        if cls.directory is None:
+            return None
+        path = cls.path(sketch_path, properties_path)
+        if not os.path.isdir(path):
+            return None
+        try:
+            stored,descriptor = paynt.quotient.stored.StoredQuotient.load(path)
+            descriptor["epsilon"] = relative_error
+            descriptor["precision"] = precision
+            quotient = stored.construct(descriptor)
+        except Exception as e:
+            logger.warning(f"failed to load the cached quotient from {path}: {e}")
+            return None
+        logger.info(f"loaded the quotient from the cache {path}")
+        return quotient
+
+    @classmethod
+    def store(cls, quotient, sketch_path, properties_path):
+        if cls.directory is None or not paynt.quotient.stored.StoredQuotient.supports(quotient):
+            return
+        path = cls.path(sketch_path, properties_path)
+        if os.path.isdir(path):
+            return
+        try:
+            stored,descriptor = paynt.quotient.stored.StoredQuotient.create(quotient)
+        except paynt.quotient.stored.StoredQuotientError as e:
+            logger.debug(f"the quotient will not be cached: {e}")
+            return
+        # write into a temporary directory first, such that concurrent runs never see a partially written quotient
+        tmp_path = f"{path}.{uuid.uuid4()}"
+        try:
+            stored.save(descriptor, tmp_path)
+            os.rename(tmp_path, path)
+            logger.info(f"stored the quotient in the cache {path}")
+        except OSError as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                logger.warning(f"failed to store the quotient in the cache {path}: {e}")
+        finally:
+            stored.close()
@@ -12,6 +12,7 @@ import paynt.quotient.pomdp_family
 import paynt.verification.property
 
 from paynt.parser.prism_parser import PrismParser
+from paynt.parser.quotient_cache import QuotientCache
 from paynt.parser.drn_parser import DrnParser
 
 import uuid
@@ -79,6 +80,11 @@ class Sketch:
             raise ValueError(f"the sketch file {sketch_path} does not exist")
         logger.info(f"loading sketch from {sketch_path} ...")
 
+        if export is None and not use_exact:
+            quotient_container = QuotientCache.load(sketch_path, properties_path, relative_error, precision)
+            if quotient_container is not None:
+                return quotient_container
+
         filetype = None
         try:
             logger.info(f"assuming sketch in PRISM format...")
@@ -175,6 +181,7 @@ class Sketch:
                 quotient_container = paynt.quotient.mdp.MdpQuotient(explicit_quotient, specification)
             else:
                 quotient_container = paynt.quotient.pomdp.PomdpQuotient(explicit_quotient, specification, decpomdp_manager)
+        QuotientCache.store(quotient_container, sketch_path, properties_path)
         return quotient_container
 
 
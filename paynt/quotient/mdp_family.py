@@ -5,6 +5,7 @@ import paynt.quotient.quotient
 import paynt.models.models
 
 import json
+import numpy
 
 import logging
 logger = logging.getLogger(__name__)
@@ -71,17 +72,16 @@ class MdpFamilyQuotient(paynt.quotient.quotient.Quotient):
         '''
         Create a representation for a policy that associated action labels with state valuations. States with only
         one available action are omitted.
+        :param policy a pair (actions,defined) of arrays indexed by states, see paynt.synthesizer.policy_tree
         '''
-        policy,_ = policy
+        actions,defined = policy
         sv = self.quotient_mdp.state_valuations
         state_valuation_to_action = []
-        for state,action in enumerate(policy):
-            if action is None:
-                continue
+        for state in numpy.flatnonzero(defined).tolist():
             if len(self.state_to_actions[state])==1:
                 continue
             # get action label
-            action = self.action_labels[action]
+            action = self.action_labels[actions[state]]
             if action == "empty_label":
                 continue
 
@@ -3,9 +3,11 @@ import payntbind
 
 import paynt.family.family
 import paynt.models.models
+import paynt.utils.cache
 
 import math
 import itertools
+import numpy
 
 import logging
 logger = logging.getLogger(__name__)
@@ -15,6 +17,13 @@ class Quotient:
 
     # if True, expected visits will not be computed for hole scoring
     disable_expected_visits = False
+    # if True, sub-MDPs of subfamilies will be constructed by restricting the sub-MDP of the parent family; the sub-MDP
+    #   of a split family is kept in memory until all of its subfamilies are built
+    incremental_build = True
+    # memory cap (MB) of the cache of DTMCs induced by hole assignments, 0 disables the cache
+    assignment_cache_mb = 256
+    # if True, the state map and the analysis result of a split family are kept to warm-start its subfamilies
+    warm_start = False
 
     # label associated with un-labelled choices
     EMPTY_LABEL = "__no_label__"
@@ -26,7 +35,14 @@ class Quotient:
         vector_valid = [ value if value != math.inf else default_value for value in vector]
         return vector_valid
 
-    def __init__(self, quotient_mdp = None, family = None, coloring = None, specification = None):
+    @staticmethod
+    def make_array_defined(array):
+        ''' Vectorized make_vector_defined for numpy arrays. '''
+        infinite = array == math.inf
+        default_value = numpy.where(infinite, 0, array).sum() / len(array)
+        return numpy.where(infinite, default_value, array)
+
+    def __init__(self, quotient_mdp = None, family = None, coloring = None, specification = None, choice_destinations = None):
 
         # colored qoutient MDP for the super-family
         self.quotient_mdp = quotient_mdp
@@ -39,9 +55,16 @@ class Quotient:
         self.subsystem_builder_options.build_state_mapping = True
         self.subsystem_builder_options.build_action_mapping = True
 
+        # DTMCs induced by hole assignments, together with their model checking results
+        self.assignment_cache = None
+        if Quotient.assignment_cache_mb > 0:
+            self.assignment_cache = paynt.utils.cache.LruCache(Quotient.assignment_cache_mb * 1024 * 1024)
+        # coloring for which the cached DTMCs were built
+        self.assignment_cache_coloring = None
+
         # for each choice of the quotient, a list of its state-destinations
-        self.choice_destinations = None
-        if self.quotient_mdp is not None:
+        self.choice_destinations = choice_destinations
+        if self.choice_destinations is None and self.quotient_mdp is not None:
             self.choice_destinations = payntbind.synthesis.computeChoiceDestinations(self.quotient_mdp)
 
 
@@ -75,11 +98,30 @@ class Quotient:
         mdp,state_map,choice_map = self.restrict_quotient(choices)
         return paynt.models.models.SubMdp(mdp, state_map, choice_map)
 
+    def build_from_parent(self, parent_mdp, choices):
+        '''
+        Construct the sub-MDP by restricting the sub-MDP of the parent family instead of the whole quotient.
+        :param parent_mdp SubMdp of the parent family
+        :param choices a bitvector of selected quotient actions, must be a subset of the actions of the parent
+        '''
+        parent_choices = payntbind.synthesis.quotientChoicesToSubmodelChoices(choices, parent_mdp.quotient_choice_map)
+        mdp,state_map,choice_map = self.restrict_mdp(parent_mdp.model, parent_choices)
+        state_map = payntbind.synthesis.composeMaps(state_map, parent_mdp.quotient_state_map)
+        choice_map = payntbind.synthesis.composeMaps(choice_map, parent_mdp.quotient_choice_map)
+        return paynt.models.models.SubMdp(mdp, state_map, choice_map)
+
     def build(self, family):
         ''' Construct the quotient MDP for the family. '''
         # select actions compatible with the family and restrict the quotient
-        choices = self.coloring.selectCompatibleChoices(family.family)
-        family.mdp = self.build_from_choice_mask(choices)
+        parent_info = family.parent_info
+        if parent_info is None or parent_info.mdp is None:
+            choices = self.coloring.selectCompatibleChoices(family.family)
+            family.mdp = self.build_from_choice_mask(choices)
+        else:
+            # only the actions of the parent family can be compatible with the subfamily
+            choices = self.coloring.selectCompatibleChoices(family.family, parent_info.selected_choices)
+            family.mdp = self.build_from_parent(parent_info.mdp, choices)
+            parent_info.release_child()
         family.selected_choices = choices
         family.mdp.family = family
 
@@ -99,11 +141,33 @@ class Quotient:
             return dtmc
 
     def build_assignment(self, family):
+        '''
+        Construct the DTMC induced by the hole assignment. DTMCs are cached, so repeated evaluation of the same
+        assignment reuses both the model and its model checking results.
+        '''
         assert family.size == 1, "expecting family of size 1"
+        cache = self.assignment_cache
+        if cache is not None:
+            if self.assignment_cache_coloring is not self.coloring:
+                # the quotient has changed (e.g. memory was added)
+                cache.clear()
+                self.assignment_cache_coloring = self.coloring
+            key = family.to_bytes()
+            dtmc = cache.get(key)
+            if dtmc is not None:
+                return dtmc
         choices = self.coloring.selectCompatibleChoices(family.family)
         mdp,state_map,choice_map = self.restrict_quotient(choices)
         model = Quotient.mdp_to_dtmc(mdp)
-        return paynt.models.models.SubMdp(model,state_map,choice_map)
+        dtmc = paynt.models.models.SubMdp(model,state_map,choice_map)
+        if cache is not None:
+            cache.put(key, dtmc, self.assignment_cache_item_size(dtmc))
+        return dtmc
+
+    def assignment_cache_item_size(self, dtmc):
+        ''' Estimate of the memory (B) occupied by the DTMC and the value vectors of its model checking results. '''
+        num_vectors = self.specification.num_properties if self.specification is not None else 1
+        return 16*dtmc.model.nr_transitions + 8*dtmc.states*(2 + num_vectors)
 
     def empty_scheduler(self):
         return [None] * self.quotient_mdp.nr_states
@@ -129,11 +193,9 @@ class Quotient:
             state_to_quotient_choice = payntbind.synthesis.schedulerToStateToGlobalChoiceExact(scheduler, submdp.model, submdp.quotient_choice_map)
         else:
             state_to_quotient_choice = payntbind.synthesis.schedulerToStateToGlobalChoice(scheduler, submdp.model, submdp.quotient_choice_map)
-        state_to_choice = self.empty_scheduler()
-        for state in range(submdp.model.nr_states):
-            quotient_choice = state_to_quotient_choice[state]
-            quotient_state = submdp.quotient_state_map[state]
-            state_to_choice[quotient_state] = quotient_choice
+        state_to_choice = numpy.full(self.quotient_mdp.nr_states, None, dtype=object)
+        state_to_choice[submdp.quotient_state_map] = state_to_quotient_choice
+        state_to_choice = state_to_choice.tolist()
         if discard_unreachable_choices:
             state_to_choice = self.discard_unreachable_choices(state_to_choice)
         return state_to_choice
@@ -165,14 +227,28 @@ class Quotient:
         - mc(s') is the model checking result in state s'
         '''
 
-        # multiply probability with model checking results
         if mdp.is_exact:
-            choice_values = payntbind.synthesis.multiply_with_vector_exact(mdp.transition_matrix, state_values)
-        else:
-            choice_values = payntbind.synthesis.multiply_with_vector(mdp.transition_matrix, state_values)
-        choice_values = Quotient.make_vector_defined(choice_values)
+            return self.choice_values_exact(mdp, prop, state_values)
+
+        # multiply probability with model checking results
+        choice_values = payntbind.synthesis.multiply_with_vector_array(mdp.transition_matrix, state_values)
+        choice_values = Quotient.make_array_defined(choice_values)
 
         # if the associated reward model has state-action rewards, then these must be added to choice values
+        if prop.reward:
+            reward_name = prop.formula.reward_name
+            rm = mdp.reward_models.get(reward_name)
+            assert rm.has_state_action_rewards
+            choice_rewards = payntbind.synthesis.state_action_rewards_array(rm)
+            assert mdp.nr_choices == len(choice_rewards)
+            choice_values += choice_rewards
+
+        return choice_values
+
+    def choice_values_exact(self, mdp, prop, state_values):
+        ''' Exact variant of choice_values operating on lists of rationals. '''
+        choice_values = payntbind.synthesis.multiply_with_vector_exact(mdp.transition_matrix, state_values)
+        choice_values = Quotient.make_vector_defined(choice_values)
         if prop.reward:
             reward_name = prop.formula.reward_name
             rm = mdp.reward_models.get(reward_name)
@@ -181,7 +257,6 @@ class Quotient:
             assert mdp.nr_choices == len(choice_rewards)
             for choice in range(mdp.nr_choices):
                 choice_values[choice] += choice_rewards[choice]
-
         return choice_values
 
 
@@ -190,25 +265,23 @@ class Quotient:
         Compute expected number of visits in the states of DTMC induced by the shoices.
         '''
         if Quotient.disable_expected_visits:
-            return [1]*self.quotient_mdp.nr_states
+            return numpy.ones(self.quotient_mdp.nr_states)
 
         # extract DTMC induced by this MDP-scheduler
         sub_mdp,state_map,_ = self.restrict_mdp(mdp, choices)
         dtmc = Quotient.mdp_to_dtmc(sub_mdp)
         dtmc_visits = paynt.verification.property.Property.compute_expected_visits(dtmc)
+        dtmc_visits = numpy.asarray(dtmc_visits, dtype=float)
 
         # handle infinity- and zero-visits
         if prop.minimizing:
-            dtmc_visits = Quotient.make_vector_defined(dtmc_visits)
+            dtmc_visits = Quotient.make_array_defined(dtmc_visits)
         else:
-            dtmc_visits = [ value if value != math.inf else 0 for value in dtmc_visits]
+            dtmc_visits = numpy.where(dtmc_visits == math.inf, 0, dtmc_visits)
 
         # map vector of expected visits onto the state space of the quotient MDP
-        expected_visits = [0] * mdp.nr_states
-        for state in range(dtmc.nr_states):
-            mdp_state = state_map[state]
-            visits = dtmc_visits[state]
-            expected_visits[mdp_state] = visits
+        expected_visits = numpy.zeros(mdp.nr_states)
+        expected_visits[state_map] = dtmc_visits
 
         return expected_visits
 
@@ -244,7 +317,11 @@ class Quotient:
 
     def scheduler_scores(self, mdp, prop, result, selection):
         inconsistent_assignments = {hole:options for hole,options in enumerate(selection) if len(options) > 1 }
-        choice_values = self.choice_values(mdp.model, prop, result.get_values())
+        if mdp.model.is_exact:
+            state_values = result.get_values()
+        else:
+            state_values = payntbind.synthesis.check_result_values_array(result)
+        choice_values = self.choice_values(mdp.model, prop, state_values)
         choices = result.scheduler.compute_action_support(mdp.model.nondeterministic_choice_indices)
         expected_visits = self.compute_expected_visits(mdp.model, prop, choices)
         scores = self.estimate_scheduler_difference(mdp.model, mdp.quotient_choice_map, inconsistent_assignments, choice_values, expected_visits)
@@ -310,7 +387,14 @@ class Quotient:
 
         # construct corresponding subfamilies
         parent_info = family.collect_parent_info(self.specification)
+        if Quotient.warm_start:
+            parent_info.state_map = mdp.quotient_state_map
+            parent_info.analysis_result = family.analysis_result
         subfamilies = family.split(splitter,suboptions)
+        if Quotient.incremental_build:
+            # do not keep the reference to the parent family; the sub-MDP is kept until all subfamilies are built
+            parent_info.mdp = paynt.models.models.SubMdp(mdp.model, mdp.quotient_state_map, mdp.quotient_choice_map)
+            parent_info.num_children_unbuilt = len(subfamilies)
         for subfamily in subfamilies:
             subfamily.add_parent_info(parent_info)
         return subfamilies
@@ -0,0 +1,253 @@
+import stormpy
+import payntbind
+
+import paynt.family.family
+import paynt.quotient.quotient
+import paynt.verification.property
+
+import os
+import pickle
+
+import numpy
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class StoredQuotientError(Exception):
+    ''' The quotient cannot be stored. '''
+    pass
+
+
+class ChoiceDestinations:
+    '''
+    Read-only view of the quotient's choice destinations stored in the CSR buffers of the transition matrix.
+    Indexing by a choice yields the list of its destination states, as computeChoiceDestinations does.
+    '''
+
+    def __init__(self, row_indications, columns):
+        self.row_indications = row_indications
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.row_indications)-1
+
+    def __getitem__(self, choice):
+        return self.columns[self.row_indications[choice]:self.row_indications[choice+1]].tolist()
+
+
+class StoredQuotient:
+    '''
+    Quotient stored as flat (CSR) arrays of its transition matrix, reward vectors and coloring together with a
+    (picklable) descriptor of the remaining data. create() exports a quotient, save() writes the arrays and the
+    descriptor into a directory, load() reads them back and construct() rebuilds the quotient.
+    '''
+
+    DESCRIPTOR_FILE = "descriptor.pickle"
+
+    # item formats of the stored arrays
+    INDEX = "Q"
+    VALUE = "d"
+
+    def __init__(self):
+        # name -> memoryview of the buffer cast to the item format
+        self.arrays = {}
+        # name -> all memoryviews exported from the buffer, these must be released before the buffer is dropped
+        self.views = {}
+
+    def allocate(self, name, format, size):
+        itemsize = 8
+        return self.add_buffer(name, bytearray(size*itemsize), format, size)
+
+    def add_buffer(self, name, buffer, format, size):
+        base = memoryview(buffer)
+        view = base.cast(format)
+        self.arrays[name] = view[:size]
+        self.views[name] = [self.arrays[name], view, base]
+        return self.arrays[name]
+
+    @staticmethod
+    def file_name(name):
+        return f"{name}.bin"
+
+    @staticmethod
+    def supports(quotient):
+        ''' Only the quotient of a family of DTMCs can be reconstructed from the stored data. '''
+        return type(quotient) == paynt.quotient.quotient.Quotient and not quotient.quotient_mdp.is_exact
+
+    @classmethod
+    def create(cls, quotient):
+        '''
+        Export the quotient into flat arrays.
+        :return the stored quotient and the descriptor used to construct the quotient from it
+        '''
+        if not StoredQuotient.supports(quotient):
+            raise StoredQuotientError(f"quotient of type {type(quotient).__name__} cannot be stored")
+        stored = cls()
+        mdp = quotient.quotient_mdp
+        family = quotient.family
+        sizes = {}
+        try:
+            num_row_groups,num_rows,num_entries = payntbind.synthesis.matrixCsrSize(mdp.transition_matrix)
+            sizes["row_group_indices"] = (StoredQuotient.INDEX, num_row_groups+1)
+            sizes["row_indications"] = (StoredQuotient.INDEX, num_rows+1)
+            sizes["columns"] = (StoredQuotient.INDEX, num_entries)
+            sizes["values"] = (StoredQuotient.VALUE, num_entries)
+            arrays = {name: stored.allocate(name,format,size) for name,(format,size) in sizes.items()}
+            payntbind.synthesis.matrixToCsr(
+                mdp.transition_matrix,
+                arrays["row_group_indices"], arrays["row_indications"], arrays["columns"], arrays["values"]
+            )
+
+            num_pairs = payntbind.synthesis.coloringCsrSize(quotient.coloring)
+            for name,size in [("choice_offsets",num_rows+1), ("holes",num_pairs), ("options",num_pairs)]:
+                sizes[name] = (StoredQuotient.INDEX, size)
+                stored.allocate(name, StoredQuotient.INDEX, size)
+            payntbind.synthesis.coloringToCsr(
+                quotient.coloring, stored.arrays["choice_offsets"], stored.arrays["holes"], stored.arrays["options"]
+            )
+
+            reward_models = {}
+            for reward_name,reward_model in mdp.reward_models.items():
+                if reward_model.has_transition_rewards:
+                    raise StoredQuotientError(f"reward model {reward_name} has transition rewards")
+                vectors = {}
+                if reward_model.has_state_rewards:
+                    vectors["state"] = reward_model.state_rewards
+                if reward_model.has_state_action_rewards:
+                    vectors["state_action"] = reward_model.state_action_rewards
+                reward_models[reward_name] = []
+                for kind,vector in vectors.items():
+                    name = f"reward_{len(sizes)}"
+                    sizes[name] = (StoredQuotient.VALUE, len(vector))
+                    array = stored.allocate(name, StoredQuotient.VALUE, len(vector))
+                    array[:] = memoryview(numpy.asarray(vector, dtype=numpy.float64))
+                    reward_models[reward_name].append((kind,name))
+
+            labels = {label: list(mdp.labeling.get_states(label)) for label in mdp.labeling.get_labels()}
+
+            specification = quotient.specification
+            properties = [
+                (str(p.property.raw_formula), isinstance(p,paynt.verification.property.OptimalityProperty))
+                for p in specification.all_properties()
+            ]
+            epsilon = specification.optimality.epsilon if specification.has_optimality else 0
+            optimum = specification.optimality.optimum if specification.has_optimality else None
+            StoredQuotient.parse_properties(properties, epsilon)
+        except:
+            stored.close()
+            raise
+
+        descriptor = {
+            "arrays": {name: (format,size) for name,(format,size) in sizes.items()},
+            "nr_states": mdp.nr_states,
+            "num_row_groups": num_row_groups, "num_rows": num_rows, "num_entries": num_entries,
+            "labels": labels,
+            "reward_models": reward_models,
+            "hole_to_name": family.hole_to_name,
+            "hole_to_option_labels": family.hole_to_option_labels,
+            "family": family.to_bytes(),
+            "properties": properties,
+            "epsilon": epsilon,
+            "optimum": optimum,
+            "precision": paynt.verification.property.Property.model_checking_precision,
+        }
+        return stored,descriptor
+
+    @staticmethod
+    def parse_properties(properties, epsilon):
+        ''' Reconstruct the specification from the formula strings. '''
+        constructed = []
+        for formula_str,is_optimality in properties:
+            try:
+                formula = stormpy.parse_properties_without_context(formula_str)[0]
+            except Exception as e:
+                raise StoredQuotientError(f"property {formula_str} cannot be parsed without the program: {e}")
+            relative_error = epsilon if is_optimality else 0
+            constructed.append(paynt.verification.property.construct_property(formula, relative_error))
+        return paynt.verification.property.Specification(constructed)
+
+    def construct(self, descriptor):
+        ''' Construct the quotient from the arrays described by the descriptor. '''
+        arrays = self.arrays
+
+        matrix = payntbind.synthesis.matrixFromCsr(
+            descriptor["num_row_groups"], descriptor["num_rows"], descriptor["num_entries"],
+            arrays["row_group_indices"], arrays["row_indications"], arrays["columns"], arrays["values"]
+        )
+        nr_states = descriptor["nr_states"]
+        labeling = stormpy.storage.StateLabeling(nr_states)
+        for label,states in descriptor["labels"].items():
+            labeling.add_label(label)
+            labeling.set_states(label, stormpy.BitVector(nr_states, states))
+        reward_models = {}
+        for reward_name,vectors in descriptor["reward_models"].items():
+            vectors = {kind: arrays[name].tolist() for kind,name in vectors}
+            reward_models[reward_name] = stormpy.SparseRewardModel(
+                optional_state_reward_vector=vectors.get("state"),
+                optional_state_action_reward_vector=vectors.get("state_action")
+            )
+        components = stormpy.SparseModelComponents(
+            transition_matrix=matrix, state_labeling=labeling, reward_models=reward_models
+        )
+        mdp = stormpy.storage.SparseMdp(components)
+
+        family = paynt.family.family.Family()
+        for name,option_labels in zip(descriptor["hole_to_name"],descriptor["hole_to_option_labels"]):
+            family.add_hole(name, option_labels)
+        family = family.from_bytes(descriptor["family"])
+        coloring = payntbind.synthesis.coloringFromCsr(
+            family.family, descriptor["num_row_groups"], arrays["row_group_indices"], descriptor["num_rows"],
+            arrays["choice_offsets"], arrays["holes"], arrays["options"]
+        )
+
+        paynt.verification.property.Property.model_checking_precision = descriptor["precision"]
+        paynt.verification.property.Property.initialize()
+        specification = StoredQuotient.parse_properties(descriptor["properties"], descriptor["epsilon"])
+        if descriptor["optimum"] is not None:
+            specification.optimality.update_optimum(descriptor["optimum"])
+
+        choice_destinations = ChoiceDestinations(arrays["row_indications"], arrays["columns"])
+        quotient = paynt.quotient.quotient.Quotient(
+            mdp, family, coloring, specification, choice_destinations=choice_destinations
+        )
+        # everything but the choice destinations has been copied into the quotient
+        self.release([name for name in self.arrays if name not in ["row_indications","columns"]])
+        return quotient
+
+    def save(self, descriptor, path):
+        ''' Write the arrays and the descriptor into a new directory. '''
+        os.makedirs(path)
+        for name in descriptor["arrays"]:
+            with open(os.path.join(path,StoredQuotient.file_name(name)), "wb") as file:
+                file.write(self.arrays[name].tobytes())
+        with open(os.path.join(path,StoredQuotient.DESCRIPTOR_FILE), "wb") as file:
+            pickle.dump(descriptor, file)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Read the arrays and the descriptor from a directory created by save().
+        :return the stored quotient and the descriptor
+        '''
+        with open(os.path.join(path,StoredQuotient.DESCRIPTOR_FILE), "rb") as file:
+            descriptor = pickle.load(file)
+        stored = cls()
+        for name,(format,size) in descriptor["arrays"].items():
+            with open(os.path.join(path,StoredQuotient.file_name(name)), "rb") as file:
+                stored.add_buffer(name, bytearray(file.read()), format, size)
+        return stored,descriptor
+
+    def release(self, names):
+        ''' Release the arrays with the given names. '''
+        for name in names:
+            for view in self.views.pop(name):
+                view.release()
+            del self.arrays[name]
+
+    def close(self):
+        for views in self.views.values():
+            for view in views:
+                view.release()
+        self.views = {}
+        self.arrays = {}
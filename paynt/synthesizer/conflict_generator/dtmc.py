@@ -15,15 +15,11 @@ class ConflictGeneratorDtmc():
         return "(DTMC)"
 
     def initialize(self):
-        state_to_holes_bv = self.quotient.coloring.getStateToHoles().copy()
-        state_to_holes = []
-        for state,holes_bv in enumerate(state_to_holes_bv):
-            holes = set([hole for hole in holes_bv])
-            state_to_holes.append(holes)
+        # the generator reads significant holes of each state directly from the coloring
         formulae = self.quotient.specification.stormpy_formulae()
         self.counterexample_generator = payntbind.synthesis.CounterexampleGenerator(
             self.quotient.quotient_mdp, self.quotient.family.num_holes,
-            state_to_holes, formulae
+            self.quotient.coloring, formulae
         )
 
 
@@ -3,6 +3,7 @@ import payntbind
 
 import paynt.family.family
 import paynt.synthesizer.synthesizer
+import paynt.synthesizer.statistic
 
 import paynt.quotient.quotient
 import paynt.verification.property_result
@@ -14,6 +15,12 @@ import paynt.synthesizer.conflict_generator.dtmc
 import paynt.synthesizer.conflict_generator.mdp
 
 
+import multiprocessing
+import queue
+import hashlib
+
+import numpy
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -23,15 +30,24 @@ import graphviz
 logging.disable(logging.NOTSET)
 
 
+# a policy is stored as a pair (actions,defined) of NumPy arrays indexed by the states of the quotient: defined is the
+#   mask of states in which the policy selects an action, actions contains the selected actions (-1 if undefined)
+UNDEFINED_ACTION = -1
+
+def policy_from_list(policy):
+    ''' Convert a policy given as a list of actions (None if undefined) to the array representation. '''
+    actions = numpy.array([UNDEFINED_ACTION if action is None else action for action in policy], dtype=numpy.int32)
+    return actions, actions != UNDEFINED_ACTION
+
+def policy_to_list(policy):
+    ''' Convert a policy in the array representation to a list of actions (None if undefined). '''
+    actions,defined = policy
+    return [action if is_defined else None for action,is_defined in zip(actions.tolist(),defined.tolist())]
+
 def policies_are_compatible(policy1, policy2):
-    policy1,policy1_mask = policy1
-    policy2,_ = policy2
-    for state in policy1_mask:
-        a1 = policy1[state]
-        a2 = policy2[state]
-        if a2 is not None and a1 != a2:
-            return False
-    return True
+    actions1,defined1 = policy1
+    actions2,defined2 = policy2
+    return not numpy.any(defined1 & defined2 & (actions1 != actions2))
 
 def merge_policies(policy1, policy2):
     '''
@@ -40,30 +56,282 @@ def merge_policies(policy1, policy2):
     '''
     if not policies_are_compatible(policy1,policy2):
         return None
-    policy1,_ = policy1
-    policy2,_ = policy2
-    policy = [a1 or policy2[state] for state,a1 in enumerate(policy1)]
-    mask = [state for state,action in enumerate(policy) if action is not None]
-    return (policy,mask)
+    actions1,defined1 = policy1
+    actions2,defined2 = policy2
+    return numpy.where(defined1,actions1,actions2), defined1 | defined2
 
 def merge_policies_exclusively(policy1, policy2):
-    policy1,_ = policy1
-    policy2,_ = policy2
-    policy12 = policy1.copy()
-    policy21 = policy2.copy()
-    for state,a1 in enumerate(policy1):
-        a2 = policy2[state]
-        if a1 is None:
-            policy12[state] = a2
-        if a2 is None:
-            policy21[state] = a1
+    ''' :return policy1 completed by policy2 and policy2 completed by policy1, both as lists '''
+    actions1,defined1 = policy1
+    actions2,defined2 = policy2
+    defined = defined1 | defined2
+    policy12 = policy_to_list( (numpy.where(defined1,actions1,actions2),defined) )
+    policy21 = policy_to_list( (numpy.where(defined2,actions2,actions1),defined) )
     return policy12,policy21
 
 
+class PolicySignatureIndex:
+    '''
+    Index for fast rejection of incompatible policies. Each policy is summarized by its actions in a small number of
+    pivot states: states defined by many policies in which the policies disagree. Two policies whose signatures
+    disagree in a pivot defined by both are incompatible, hence only policies with consistent signatures need to be
+    compared state by state.
+    '''
+
+    # number of pivot states
+    num_pivots = 32
+
+    def __init__(self, policies):
+        '''
+        :param policies a sequence of policies, None entries are ignored; the sequence is traversed twice and policies
+            are not retained, so policies can be decoded on the fly
+        '''
+        num_defined = None
+        for actions,defined in (policy for policy in policies if policy is not None):
+            if num_defined is None:
+                num_states = len(actions)
+                num_defined = numpy.zeros(num_states, dtype=numpy.int64)
+                min_action = numpy.full(num_states, numpy.iinfo(numpy.int32).max, dtype=numpy.int32)
+                max_action = numpy.full(num_states, UNDEFINED_ACTION, dtype=numpy.int32)
+            num_defined += defined
+            numpy.minimum(min_action, numpy.where(defined,actions,min_action), out=min_action)
+            numpy.maximum(max_action, actions, out=max_action)
+        if num_defined is None:
+            self.pivots = numpy.zeros(0, dtype=numpy.int64)
+            self.signatures = numpy.zeros((len(policies),0), dtype=numpy.int32)
+            return
+        # only states where at least two policies disagree can discriminate
+        score = numpy.where(min_action < max_action, num_defined, 0)
+        num_pivots = min(PolicySignatureIndex.num_pivots, numpy.count_nonzero(score))
+        self.pivots = numpy.argpartition(-score, num_pivots-1)[:num_pivots] if num_pivots > 0 else score[:0]
+        self.signatures = numpy.full((len(policies),num_pivots), UNDEFINED_ACTION, dtype=numpy.int32)
+        for policy_index,policy in enumerate(policies):
+            if policy is not None:
+                self.signatures[policy_index] = policy[0][self.pivots]
+
+    def candidates(self, policy_index, policy_indices):
+        ''' :return policies from policy_indices whose signature is consistent with the one of the given policy '''
+        policy_indices = numpy.asarray(policy_indices, dtype=numpy.int64)
+        signature = self.signatures[policy_index]
+        signatures = self.signatures[policy_indices]
+        conflict = (signatures != signature) & (signatures != UNDEFINED_ACTION) & (signature != UNDEFINED_ACTION)
+        return policy_indices[~conflict.any(axis=1)].tolist()
+
+
+class PolicyStore:
+    '''
+    Compact table of the policies of a policy tree, addressed by policy indices and returning policies in the array
+    representation. Each distinct policy is stored once as an entry: identical policies are detected via a hash of
+    their actions and share the entry. An entry holds either all actions, using the smallest integer type that fits
+    them, or only the states in which it differs from a reference entry (typically the policy of a sibling node or
+    the policy it replaces), whichever is smaller.
+    '''
+
+    # maximum length of a chain of delta-encoded entries, bounds the cost of decoding a policy
+    max_delta_depth = 8
+
+    def __init__(self):
+        # for each policy index, its entry or None if the policy was discarded
+        self.slots = []
+        # for each entry: the entry it is encoded against (None for full entries), differing states (None for full
+        #   entries), stored actions, length of its delta chain, number of slots and entries referring to it, its hash
+        self.entry_base = []
+        self.entry_states = []
+        self.entry_actions = []
+        self.entry_depth = []
+        self.entry_references = []
+        self.entry_hash = []
+        self.free_entries = []
+        self.hash_to_entries = {}
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __iter__(self):
+        ''' Decode policies one by one. '''
+        for policy_index in range(len(self.slots)):
+            yield self[policy_index]
+
+    def __getitem__(self, policy_index):
+        entry = self.slots[policy_index]
+        if entry is None:
+            return None
+        actions = self.decode(entry)
+        return actions, actions != UNDEFINED_ACTION
+
+    def is_discarded(self, policy_index):
+        ''' :return True if the policy was discarded, without decoding it '''
+        return self.slots[policy_index] is None
+
+    def __setitem__(self, policy_index, policy):
+        ''' Replace the policy, the replaced policy serves as the reference for delta encoding. '''
+        old_entry = self.slots[policy_index]
+        self.slots[policy_index] = None if policy is None else self.add_entry(policy[0], old_entry)
+        if old_entry is not None:
+            self.release(old_entry)
+
+    def append(self, policy, reference_index=None):
+        '''
+        :param reference_index index of a similar policy to encode the policy against, if None, the most recently
+            appended policy is used
+        :return index of the new policy
+        '''
+        if reference_index is None:
+            reference_index = len(self.slots)-1
+        reference = self.slots[reference_index] if reference_index >= 0 else None
+        self.slots.append(self.add_entry(policy[0], reference))
+        return len(self.slots)-1
+
+    def compact(self):
+        '''
+        Drop discarded policies.
+        :return a map from old policy indices to new ones (None for discarded policies)
+        '''
+        policy_old_to_new = [None for _ in self.slots]
+        slots = []
+        for policy_index,entry in enumerate(self.slots):
+            if entry is not None:
+                policy_old_to_new[policy_index] = len(slots)
+                slots.append(entry)
+        self.slots = slots
+        return policy_old_to_new
+
+    def nbytes(self):
+        ''' :return number of bytes occupied by the stored actions '''
+        num_bytes = 0
+        for entry,actions in enumerate(self.entry_actions):
+            if actions is None:
+                continue
+            num_bytes += actions.nbytes
+            if self.entry_states[entry] is not None:
+                num_bytes += self.entry_states[entry].nbytes
+        return num_bytes
+
+    @staticmethod
+    def compact_dtype(actions):
+        max_action = actions.max() if len(actions) > 0 else 0
+        for dtype in [numpy.int8, numpy.int16]:
+            if max_action <= numpy.iinfo(dtype).max:
+                return dtype
+        return numpy.int32
+
+    def decode(self, entry):
+        ''' :return actions of the entry as a new int32 array '''
+        chain = []
+        while self.entry_base[entry] is not None:
+            chain.append(entry)
+            entry = self.entry_base[entry]
+        actions = self.entry_actions[entry].astype(numpy.int32)
+        for entry in reversed(chain):
+            actions[self.entry_states[entry]] = self.entry_actions[entry]
+        return actions
+
+    def add_entry(self, actions, reference):
+        ''' Find an entry storing the given actions or create a new one encoded against the reference entry. '''
+        actions = numpy.asarray(actions, dtype=numpy.int32)
+        actions_hash = hashlib.blake2b(actions.tobytes(), digest_size=16).digest()
+        for entry in self.hash_to_entries.get(actions_hash,[]):
+            if numpy.array_equal(self.decode(entry), actions):
+                self.entry_references[entry] += 1
+                return entry
+
+        dtype = PolicyStore.compact_dtype(actions)
+        base = None
+        states = None
+        stored = actions.astype(dtype)
+        depth = 0
+        # encode against an ancestor of the reference if the delta chain of the reference is too long
+        while reference is not None and self.entry_depth[reference] >= PolicyStore.max_delta_depth:
+            reference = self.entry_base[reference]
+        if reference is not None:
+            differing = numpy.flatnonzero(self.decode(reference) != actions).astype(numpy.int32)
+            delta_nbytes = differing.nbytes + differing.size * numpy.dtype(dtype).itemsize
+            if delta_nbytes < stored.nbytes:
+                base = reference
+                states = differing
+                stored = actions[differing].astype(dtype)
+                depth = self.entry_depth[reference] + 1
+                self.entry_references[reference] += 1
+
+        if self.free_entries:
+            entry = self.free_entries.pop(-1)
+        else:
+            entry = len(self.entry_actions)
+            for entry_list in [self.entry_base,self.entry_states,self.entry_actions,self.entry_depth,
+                    self.entry_references,self.entry_hash]:
+                entry_list.append(None)
+        self.entry_base[entry] = base
+        self.entry_states[entry] = states
+        self.entry_actions[entry] = stored
+        self.entry_depth[entry] = depth
+        self.entry_references[entry] = 1
+        self.entry_hash[entry] = actions_hash
+        self.hash_to_entries.setdefault(actions_hash,[]).append(entry)
+        return entry
+
+    def release(self, entry):
+        ''' Drop one reference to the entry, entries no longer referred to are freed. '''
+        while entry is not None:
+            self.entry_references[entry] -= 1
+            if self.entry_references[entry] > 0:
+                return
+            entries = self.hash_to_entries[self.entry_hash[entry]]
+            entries.remove(entry)
+            if not entries:
+                del self.hash_to_entries[self.entry_hash[entry]]
+            base = self.entry_base[entry]
+            for entry_list in [self.entry_base,self.entry_states,self.entry_actions,self.entry_depth,self.entry_hash]:
+                entry_list[entry] = None
+            self.free_entries.append(entry)
+            entry = base
+
+
+# global variables of the parallel policy tree synthesis: forked workers inherit the synthesizer and the property
+# from the coordinator, each worker constructs its own game solver
+subtree_synthesizer = None
+subtree_prop = None
+subtree_game_solver = None
+
+def expand_subtree(family_bytes, candidate_policy, family_budget):
+    '''
+    Worker: expand the policy subtree rooted in the given family until the subtree is decided or the given number of
+    families has been analyzed.
+    :return the description of the subtree (see PolicyTreeNode.describe_subtree) and the iteration statistics
+    '''
+    global subtree_game_solver
+    synthesizer = subtree_synthesizer
+    if subtree_game_solver is None:
+        subtree_game_solver = synthesizer.quotient.build_game_abstraction_solver(subtree_prop)
+    synthesizer.stat = paynt.synthesizer.statistic.Statistic(synthesizer)
+    synthesizer.explored = 0
+
+    family = synthesizer.quotient.family.from_bytes(family_bytes)
+    family.candidate_policy = candidate_policy
+    policy_tree = PolicyTree(family)
+    undecided_leaves = [policy_tree.root]
+    families_analyzed = 0
+    while undecided_leaves:
+        policy_tree_node = undecided_leaves.pop(-1)
+        undecided_leaves += synthesizer.expand_node(policy_tree, policy_tree_node, subtree_prop, subtree_game_solver)
+        families_analyzed += 1
+        if families_analyzed >= family_budget:
+            break
+
+    stat = synthesizer.stat
+    iterations = {
+        "iterations_game": stat.iterations_game, "acc_size_game": stat.acc_size_game,
+        "iterations_mdp": stat.iterations_mdp, "acc_size_mdp": stat.acc_size_mdp,
+        "iterations_dtmc": stat.iterations_dtmc, "acc_size_dtmc": stat.acc_size_dtmc,
+    }
+    return policy_tree.root.describe_subtree(policy_tree.policies), iterations
+
+
 class PolicyTreeNode:
 
-    def __init__(self, family):
+    def __init__(self, family, tree):
         self.family = family
+        # policy tree this node belongs to, maintains the aggregates over the nodes
+        self.tree = tree
         
         self.splitter = None
         self.suboptions = []
@@ -71,30 +339,59 @@ class PolicyTreeNode:
 
         self.sat = None
         self.policy_index = None
+        # solution of the game abstraction of the parent family, used to warm-start solving the game of this family
+        self.parent_game_solution = None
 
     @property
     def is_leaf(self):
         return self.sat is not None
+
+    @property
+    def is_undecided(self):
+        ''' :return True if the expansion of the node was interrupted before the node was decided or split '''
+        return self.sat is None and not self.child_nodes
     
+    def subtree_nodes(self):
+        ''' :return nodes of the subtree rooted in this node, parents precede their children '''
+        nodes = [self]
+        index = 0
+        while index < len(nodes):
+            nodes += nodes[index].child_nodes
+            index += 1
+        return nodes
+
     def num_nodes(self):
-        num = 1
-        for child in self.child_nodes:
-            num += child.num_nodes()
-        return num
+        if self is self.tree.root:
+            return self.tree.num_nodes
+        return len(self.subtree_nodes())
 
     def num_leaves(self):
-        num = 1 if self.is_leaf else 0
-        for child in self.child_nodes:
-            num += child.num_leaves()
-        return num
+        if self is self.tree.root:
+            return self.tree.num_leaves
+        return len([node for node in self.subtree_nodes() if node.is_leaf])
 
-    def split(self, splitter, suboptions, subfamilies):
+    def split(self, splitter, suboptions, subfamilies, game_solution=None):
         self.splitter = splitter
         self.suboptions = suboptions
         self.child_nodes = []
         for subfamily in subfamilies:
-            child_node = PolicyTreeNode(subfamily)
+            child_node = PolicyTreeNode(subfamily, self.tree)
+            child_node.parent_game_solution = game_solution
             self.child_nodes.append(child_node)
+            self.tree.add_node(child_node)
+
+    def describe_subtree(self, policies):
+        '''
+        :return a picklable description of the subtree rooted in this node: ("leaf", sat, policy) for leaves,
+            ("split", splitter, suboptions, child descriptions) for inner nodes and ("undecided", candidate policy)
+            for nodes that have not been analyzed yet
+        '''
+        if self.is_leaf:
+            return ("leaf", self.sat, policies[self.policy_index] if self.sat else None)
+        if self.splitter is None:
+            return ("undecided", self.family.candidate_policy)
+        children = [child.describe_subtree(policies) for child in self.child_nodes]
+        return ("split", self.splitter, self.suboptions, children)
 
     def double_check(self, quotient, prop, policies):
         assert self.sat is not None
@@ -110,21 +407,26 @@ class PolicyTreeNode:
         if len(indices) <= 1:
             return
         target = indices[0]
+        target_node = self.child_nodes[target]
+        # the family of the target grows, update its contribution to the aggregates
+        self.tree.forget_leaf(target_node)
         for j in reversed(indices[1:]):
             self.suboptions[target] += self.suboptions[j]
-            self.child_nodes[target].family.hole_set_options(self.splitter,self.suboptions[target])
+            self.tree.remove_subtree(self.child_nodes[j])
             self.suboptions.pop(j)
             self.child_nodes.pop(j)
+        target_node.family.hole_set_options(self.splitter,self.suboptions[target])
+        self.tree.track_leaf(target_node)
 
         if len(self.child_nodes) > 1:
             return
         # a single child remains, can be merged into parent
         child_node = self.child_nodes[0]
-        self.sat = child_node.sat
-        self.policy_index = child_node.policy_index
+        self.tree.remove_subtree(child_node)
         self.splitter = None
         self.suboptions = []
         self.child_nodes = []
+        self.tree.set_leaf(self, child_node.sat, child_node.policy_index)
 
     def merge_children_sat(self):
         indices = [i for i,child in enumerate(self.child_nodes) if child.sat is True]
@@ -165,25 +467,26 @@ class PolicyTreeNode:
         policy12,policy21 = merge_policies_exclusively(policy1,policy2)
 
         # try policy1 for family2
-        policy,mdp = quotient.fix_and_apply_policy_to_family(node2.family, policy12)
+        (policy,_),mdp = quotient.fix_and_apply_policy_to_family(node2.family, policy12)
         policy_result = mdp.model_check_property(prop, alt=True)
         PolicyTreeNode.mdps_model_checked += 1
         if policy_result.sat:
-            return policy
+            return policy_from_list(policy)
 
         # try policy2 for family1
-        policy,mdp = quotient.fix_and_apply_policy_to_family(node1.family, policy21)
+        (policy,_),mdp = quotient.fix_and_apply_policy_to_family(node1.family, policy21)
         policy_result = mdp.model_check_property(prop, alt=True)
         PolicyTreeNode.mdps_model_checked += 2
         if policy_result.sat:
-            return policy
+            return policy_from_list(policy)
 
         # neither fits
         return None
 
-    def merge_children_having_compatible_policies(self, quotient, prop, policies):
+    def merge_children_having_compatible_policies(self, quotient, prop):
         if self.is_leaf:
             return
+        policies = self.tree.policies
         i = 0
         while i < len(self.child_nodes):
             child1 = self.child_nodes[i]
@@ -222,6 +525,7 @@ class PolicyTreeNode:
                 for grandchild_index,grandchild in enumerate(child.child_nodes):
                     suboptions.append(child.suboptions[grandchild_index])
                     child_nodes.append(grandchild)
+                self.tree.remove_node(child)
         self.suboptions = suboptions
         self.child_nodes = child_nodes
 
@@ -239,6 +543,8 @@ class PolicyTreeNode:
         elif self.sat is True:
             # node_label = "✓"
             node_label = f"p{self.policy_index}"
+        elif self.is_undecided:
+            node_label = "?"
         graphviz_tree.node(self.node_id, label=node_label, shape="ellipse", width="0.15", height="0.15")
         # enumerating in reverse to print policies in ascending order, from left to right
         for child in reversed(self.child_nodes):
@@ -258,62 +564,100 @@ class PolicyTreeNode:
 class PolicyTree:
 
     def __init__(self, family):
-        self.root = PolicyTreeNode(family)
-        self.policies = []
+        # nodes, leaves and SAT leaves of the tree and the aggregates over them are maintained incrementally as the tree
+        #   is modified; dictionaries are used as insertion-ordered sets, so parents precede their children
+        self.nodes = {}
+        self.leaves = {}
+        self.sat_leaves = {}
+        self.members_satisfied = 0
+        self.num_leaves_singleton = 0
+        self.policies = PolicyStore()
+        self.root = PolicyTreeNode(family, self)
+        self.add_node(self.root)
 
     def new_policy(self, policy):
-        policy_index = len(self.policies)
-        mask = [state for state,action in enumerate(policy) if action is not None]
-        self.policies.append( (policy,mask) )
-        return policy_index
+        ''' Store a policy given as a list of actions. '''
+        return self.add_policy(policy_from_list(policy))
+
+    def add_policy(self, policy):
+        ''' Store a policy given in the array representation. '''
+        return self.policies.append(policy)
+
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_leaves(self):
+        return len(self.leaves)
 
+    @property
+    def num_sat_leaves(self):
+        return len(self.sat_leaves)
+
+    def add_node(self, node):
+        self.nodes[node] = None
+        self.track_leaf(node)
+
+    def remove_node(self, node):
+        ''' Remove the node but not its children, which are expected to be adopted by another node. '''
+        self.forget_leaf(node)
+        del self.nodes[node]
+
+    def remove_subtree(self, node):
+        for subtree_node in node.subtree_nodes():
+            self.remove_node(subtree_node)
+
+    def track_leaf(self, node):
+        ''' Add the contribution of the node to the aggregates over leaves. '''
+        if not node.is_leaf or node in self.leaves:
+            return
+        self.leaves[node] = None
+        if node.family.size == 1:
+            self.num_leaves_singleton += 1
+        if node.sat:
+            self.sat_leaves[node] = None
+            self.members_satisfied += node.family.size
+
+    def forget_leaf(self, node):
+        ''' Remove the contribution of the node to the aggregates over leaves, must precede changes of the leaf. '''
+        if node not in self.leaves:
+            return
+        del self.leaves[node]
+        if node.family.size == 1:
+            self.num_leaves_singleton -= 1
+        if node in self.sat_leaves:
+            del self.sat_leaves[node]
+            self.members_satisfied -= node.family.size
+
+    def set_leaf(self, node, sat, policy_index=None):
+        self.forget_leaf(node)
+        node.sat = sat
+        node.policy_index = policy_index
+        self.track_leaf(node)
+
+    # the collect_* methods return nodes in the breadth-first order, the indices of the tree only serve for counting
     def collect_all(self):
-        node_queue = [self.root]
-        all_nodes = []
-        while node_queue:
-            node = node_queue.pop(0)
-            all_nodes.append(node)
-            node_queue += node.child_nodes
-        return all_nodes
+        return self.root.subtree_nodes()
     
     def collect_leaves(self):
-        node_queue = [self.root]
-        leaves = []
-        while node_queue:
-            node = node_queue.pop(0)
-            if node.is_leaf:
-                leaves.append(node)
-            else:
-                node_queue = node_queue + node.child_nodes
-        return leaves
+        return [node for node in self.root.subtree_nodes() if node.is_leaf]
 
     def collect_nonleaves(self):
-        node_queue = [self.root]
-        nonleaves = []
-        while node_queue:
-            node = node_queue.pop(0)
-            if not node.is_leaf:
-                nonleaves.append(node)
-                node_queue = node_queue + node.child_nodes
-        return nonleaves
+        return [node for node in self.root.subtree_nodes() if not node.is_leaf]
 
     def collect_sat(self):
-        node_queue = [self.root]
-        sat = []
-        while node_queue:
-            node = node_queue.pop(0)
-            if node.sat:
-                sat.append(node)
-            else:
-                node_queue += node.child_nodes
-        return sat
+        return [node for node in self.root.subtree_nodes() if node.sat]
+
+    def collect_undecided(self):
+        return [node for node in self.root.subtree_nodes() if node.is_undecided]
 
 
     def double_check(self, quotient, prop):
         leaves = self.collect_leaves()
         logger.info("double-checking {} families...".format(len(leaves)))
         for leaf in leaves:
-            leaf.double_check(quotient,prop)
+            leaf.double_check(quotient,prop,self.policies)
         logger.info("all solutions are OK")
 
     
@@ -334,20 +678,16 @@ class PolicyTree:
         members_total = self.root.family.size
         num_policies = len(self.policies)
         
-        members_satisfied = 0
-        num_leaves_singleton = 0
-        leaves = self.collect_leaves()
-        for node in leaves:
-            if node.family.size==1:
-                num_leaves_singleton += 1
-            if node.sat:
-                members_satisfied += node.family.size
+        members_satisfied = self.members_satisfied
+        num_leaves_singleton = self.num_leaves_singleton
         satisfied_percentage = round(members_satisfied/members_total*100,0)
-        members_unsatisfied = members_total-members_satisfied
+        undecided = self.collect_undecided()
+        members_undecided = sum([node.family.size for node in undecided])
+        members_unsatisfied = members_total-members_satisfied-members_undecided
 
-        num_nodes = len(self.collect_all())
-        num_leaves = len(leaves)
-        num_leaves_solvable = len(self.collect_sat())
+        num_nodes = self.num_nodes
+        num_leaves = self.num_leaves
+        num_leaves_solvable = self.num_sat_leaves
         num_leaves_unsolvable = num_leaves-num_leaves_solvable
         if num_leaves_solvable > 0:
             leaf_solvable_avg = round(members_satisfied / num_leaves_solvable,1)
@@ -367,34 +707,35 @@ class PolicyTree:
         print("\t  solvable leaves: {} (avg.size: {})".format(num_leaves_solvable,leaf_solvable_avg))
         print("\tunsolvable leaves: {} (avg.size: {})".format(num_leaves_unsolvable,leaf_unsolvable_avg))
         print("\t singleton leaves: {}".format(num_leaves_singleton))
+        if undecided:
+            print("{} nodes covering {} family members remain undecided".format(len(undecided),members_undecided))
+        logger.debug("policies are stored using {:.1f} MB".format(self.policies.nbytes()/2**20))
 
         print("--------------------")
 
     def discard_unused_policies(self):
-        policy_old_to_new  = [None for _ in self.policies]
-        num_policies = 0
-        for policy_index,policy in enumerate(self.policies):
-            if policy is not None:
-                policy_old_to_new[policy_index] = num_policies
-                num_policies += 1
-        self.policies = [policy for policy in self.policies if policy is not None]
-        assert num_policies == len(self.policies)
-        for leaf in self.collect_sat():
+        policy_old_to_new = self.policies.compact()
+        for leaf in self.sat_leaves:
             leaf.policy_index = policy_old_to_new[leaf.policy_index]
             assert leaf.policy_index is not None
 
     def merge_compatible_policies(self, policy_indices):
-        policy_old_to_new_map = [policy_index for policy_index,_ in enumerate(self.policies)]
+        policy_old_to_new_map = list(range(len(self.policies)))
+        signature_index = PolicySignatureIndex(self.policies)
 
         for policy1_index_index,policy1_index in enumerate(policy_indices):
-            policy1 = self.policies[policy1_index]
-            if policy1 is None:
+            if self.policies.is_discarded(policy1_index):
                 continue
-            for policy2_index in policy_indices[policy1_index_index+1:]:
-                policy2 = self.policies[policy2_index]
-                if policy2 is None:
-                    continue
-                policy = merge_policies(policy1,policy2)
+            remaining = [
+                policy2_index for policy2_index in policy_indices[policy1_index_index+1:]
+                if not self.policies.is_discarded(policy2_index)
+            ]
+            if not remaining:
+                continue
+            policy1 = self.policies[policy1_index]
+            # policy1 only grows by merging, so policies rejected by its current signature stay incompatible
+            for policy2_index in signature_index.candidates(policy1_index, remaining):
+                policy = merge_policies(policy1,self.policies[policy2_index])
                 if policy is None:
                     continue
                 # store updated policy
@@ -403,7 +744,7 @@ class PolicyTree:
                 # discard irrelevant policy
                 policy_old_to_new_map[policy2_index] = policy1_index
                 self.policies[policy2_index] = None
-        
+
         return policy_old_to_new_map
     
     def postprocess(self, quotient, prop):
@@ -414,36 +755,36 @@ class PolicyTree:
 
         logger.info("merging SAT siblings solved by non-exclusively compatible policies...")
         PolicyTreeNode.mdps_model_checked = 0
-        nodes_before = self.root.num_nodes()
+        nodes_before = self.num_nodes
         for node in reversed(self.collect_all()):
-            node.merge_children_having_compatible_policies(quotient, prop, self.policies)
+            node.merge_children_having_compatible_policies(quotient, prop)
         self.discard_unused_policies()
-        nodes_removed = nodes_before - self.root.num_nodes()
+        nodes_removed = nodes_before - self.num_nodes
         logger.info("additional {} MDPs were model checked".format(PolicyTreeNode.mdps_model_checked))
         logger.info("removed {} nodes".format(nodes_removed))
 
         logger.info("merging all exclusively compatible policies...")
         policies_before = len(self.policies)
-        policy_indices = [index for index,_ in enumerate(self.policies)]
+        policy_indices = list(range(len(self.policies)))
         policy_old_to_new_map = self.merge_compatible_policies(policy_indices)
-        for leaf in self.collect_sat():
+        for leaf in self.sat_leaves:
             leaf.policy_index = policy_old_to_new_map[leaf.policy_index]
         self.discard_unused_policies()
         policies_removed = policies_before - len(self.policies)
         logger.info("removed {} policies".format(policies_removed))
 
         logger.info("reducing tree height...")
-        nodes_before = self.root.num_nodes()
+        nodes_before = self.num_nodes
         for node in reversed(self.collect_nonleaves()):
             node.skip_redundant_children()
-        nodes_removed = nodes_before - self.root.num_nodes()
+        nodes_removed = nodes_before - self.num_nodes
         logger.info("removed {} nodes".format(nodes_removed))
 
         logger.info("merging siblings that have the same solution...")
-        nodes_before = self.root.num_nodes()
+        nodes_before = self.num_nodes
         for node in reversed(self.collect_nonleaves()):
             node.merge_children_having_same_solution()
-        nodes_removed = nodes_before - self.root.num_nodes()
+        nodes_removed = nodes_before - self.num_nodes
         logger.info("removed {} nodes".format(nodes_removed))
 
         postprocessing_timer.stop()
@@ -453,10 +794,9 @@ class PolicyTree:
 
     
     def extract_policies(self, quotient):
-        return {
-            f"p{policy_index}" : quotient.policy_to_state_valuation_actions(policy)
-            for policy_index,policy in enumerate(self.policies)
-        }
+        ''' :return a generator of pairs (policy id, state valuation actions), policies are decoded one by one '''
+        for policy_index,policy in enumerate(self.policies):
+            yield f"p{policy_index}", quotient.policy_to_state_valuation_actions(policy)
 
     def extract_policy_tree(self, quotient):
         logging.getLogger("graphviz").setLevel(logging.WARNING)
@@ -478,6 +818,8 @@ class MdpFamilyResult:
         self.game_policy = None
         self.hole_selection = None
         self.splitter = None
+        # solution of the game abstraction to warm-start the games of the subfamilies
+        self.game_solution = None
 
 class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
 
@@ -485,6 +827,12 @@ class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
     double_check_policy_tree_leaves = False
     # if True, unreachable choices will be discarded from the splitting scheduler
     discard_unreachable_choices = False
+    # if True, game abstractions of subfamilies will be solved starting from the solution of the parent game
+    warm_start = False
+    # number of worker processes expanding independent subtrees of the policy tree, 1 means sequential synthesis
+    num_workers = 1
+    # number of families a worker analyzes before the undecided nodes of its subtree are returned to the shared queue
+    worker_family_budget = 64
     
     @property
     def method_name(self):
@@ -492,7 +840,7 @@ class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
 
     @staticmethod
     def double_check_policy(quotient, family, prop, policy):
-        _,mdp = quotient.fix_and_apply_policy_to_family(family, policy)
+        _,mdp = quotient.fix_and_apply_policy_to_family(family, policy_to_list(policy))
         if family.size == 1:
             quotient.assert_mdp_is_deterministic(mdp, family)
         
@@ -525,11 +873,14 @@ class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
         return policy
 
 
-    def solve_game_abstraction(self, family, prop, game_solver):
+    def solve_game_abstraction(self, family, prop, game_solver, parent_game_solution=None):
         # construct and solve the game abstraction
         # logger.debug("solving game abstraction...")
 
-        game_solver.solve_sg(family.selected_choices)
+        if SynthesizerPolicyTree.warm_start and parent_game_solution is not None:
+            game_solver.solve_sg(family.selected_choices, parent_game_solution)
+        else:
+            game_solver.solve_sg(family.selected_choices)
         # game_solver.solve_smg(family.selected_choices)
 
         game_value = game_solver.solution_value
@@ -558,7 +909,7 @@ class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
         state_values = game_solver.solution_state_values
         return scheduler_choices,hole_selection,state_values
 
-    def verify_family(self, family, game_solver, prop):
+    def verify_family(self, family, game_solver, prop, parent_game_solution=None):
         # logger.info("investigating family of size {}".format(family.size))
         self.quotient.build(family)
         mdp_family_result = MdpFamilyResult()
@@ -568,10 +919,14 @@ class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
             return mdp_family_result
         
         if family.candidate_policy is None:
-            game_policy,game_sat = self.solve_game_abstraction(family,prop,game_solver)
+            game_policy,game_sat = self.solve_game_abstraction(family,prop,game_solver,parent_game_solution)
+            if SynthesizerPolicyTree.warm_start:
+                mdp_family_result.game_solution = game_solver.solution()
         else:
             game_policy = family.candidate_policy
             game_sat = False
+            # the game was not solved, pass the solution of the parent game to the subfamilies
+            mdp_family_result.game_solution = parent_game_solution
 
         mdp_family_result.game_policy = game_policy
         if game_sat:
@@ -670,63 +1025,157 @@ class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
         return suboptions,subfamilies
 
     
+    def expand_node(self, policy_tree, policy_tree_node, prop, game_solver):
+        '''
+        Analyze the family of an undecided node: the node either becomes a leaf or is split.
+        :return the child nodes to be analyzed
+        '''
+        family = policy_tree_node.family
+        result = self.verify_family(family,game_solver,prop,policy_tree_node.parent_game_solution)
+        family.candidate_policy = None
+        policy_tree_node.parent_game_solution = None
+
+        if result.policy is not None:
+            self.explore(family)
+            if policy_tree_node != policy_tree.root:
+                family.mdp = None
+            if result.policy is False:
+                policy_tree.set_leaf(policy_tree_node, False)
+            else:
+                policy_tree.set_leaf(policy_tree_node, True, policy_tree.new_policy(result.policy))
+            return []
+
+        # refine
+        suboptions,subfamilies = self.split(family, prop, result.hole_selection, result.splitter, result.game_policy)
+        if policy_tree_node != policy_tree.root:
+            family.mdp = None
+        policy_tree_node.split(result.splitter,suboptions,subfamilies,result.game_solution)
+        return policy_tree_node.child_nodes
+
+    def graft_subtree(self, policy_tree, policy_tree_node, description, undecided_leaves):
+        '''
+        Reconstruct the subtree described by a worker below the given node. Families of the subtree are obtained by
+        splitting the family of the node, undecided nodes are appended to the list of undecided leaves.
+        '''
+        stack = [(policy_tree_node,description)]
+        while stack:
+            node,description = stack.pop(-1)
+            if description[0] == "leaf":
+                _,sat,policy = description
+                policy_tree.set_leaf(node, sat, policy_tree.add_policy(policy) if sat else None)
+                self.explore(node.family)
+            elif description[0] == "undecided":
+                node.family.candidate_policy = description[1]
+                undecided_leaves.append(node)
+            else:
+                _,splitter,suboptions,children = description
+                node.split(splitter,suboptions,node.family.split(splitter,suboptions))
+                stack += zip(node.child_nodes,children)
+
+    def add_worker_iterations(self, iterations):
+        for key,value in iterations.items():
+            if value is None:
+                continue
+            current = getattr(self.stat, key)
+            setattr(self.stat, key, value if current is None else current + value)
+        self.stat.print_status()
+
+    def expand_tree_parallel(self, policy_tree, prop):
+        '''
+        Expand the policy tree using a pool of forked workers. Undecided nodes form a shared queue; each task expands
+        the subtree of one node using the game solver of the worker and the coordinator grafts the returned subtree
+        into the policy tree.
+        '''
+        global subtree_synthesizer, subtree_prop, subtree_game_solver
+        subtree_synthesizer = self
+        subtree_prop = prop
+        subtree_game_solver = None
+
+        num_workers = SynthesizerPolicyTree.num_workers
+        logger.debug(f"expanding the policy tree using {num_workers} workers")
+        results = queue.Queue()
+        undecided_leaves = [policy_tree.root]
+        # nodes whose subtrees are being expanded by the workers
+        pending_nodes = []
+        try:
+            with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+                while undecided_leaves or pending_nodes:
+                    if self.resource_limit_reached():
+                        break
+                    # keep every worker busy with one task and one task in reserve
+                    while undecided_leaves and len(pending_nodes) < 2*num_workers:
+                        node = undecided_leaves.pop(-1)
+                        pool.apply_async(
+                            expand_subtree,
+                            (node.family.to_bytes(), node.family.candidate_policy, SynthesizerPolicyTree.worker_family_budget),
+                            callback=lambda result, node=node: results.put((node,result,None)),
+                            error_callback=lambda error, node=node: results.put((node,None,error))
+                        )
+                        pending_nodes.append(node)
+                    try:
+                        node,result,error = results.get(timeout=1)
+                    except queue.Empty:
+                        continue
+                    pending_nodes.remove(node)
+                    if error is not None:
+                        raise error
+                    description,iterations = result
+                    self.add_worker_iterations(iterations)
+                    self.graft_subtree(policy_tree, node, description, undecided_leaves)
+        finally:
+            subtree_synthesizer = None
+            subtree_prop = None
+
+        # results of the interrupted tasks are discarded, their nodes stay undecided together with the queued ones
+        undecided_leaves += pending_nodes
+        if undecided_leaves:
+            members_undecided = sum([node.family.size for node in undecided_leaves])
+            logger.warning(f"policy tree expansion was interrupted, {len(undecided_leaves)} nodes covering "
+                f"{members_undecided} family members remain undecided")
+
     def evaluate_all(self, family, prop, keep_value_only=False):
         assert not prop.reward, "expecting reachability probability propery"
-        game_solver = self.quotient.build_game_abstraction_solver(prop)
         family.candidate_policy = None
         policy_tree = PolicyTree(family)
 
-        undecided_leaves = [policy_tree.root]
-        while undecided_leaves:
-
-            # gi = self.stat.iterations_game
-            # if gi is not None and gi > 1000:
-            #     return None
-
-            policy_tree_node = undecided_leaves.pop(-1)
-            family = policy_tree_node.family
-            result = self.verify_family(family,game_solver,prop)
-            family.candidate_policy = None
-
-            if result.policy is not None:
-                self.explore(family)
-                if policy_tree_node != policy_tree.root:
-                    family.mdp = None
-                if result.policy is False:
-                    policy_tree_node.sat = False
-                else:
-                    policy_tree_node.sat = True
-                    policy_tree_node.policy_index = policy_tree.new_policy(result.policy)
-                continue
-
-            # refine
-            suboptions,subfamilies = self.split(family, prop, result.hole_selection, result.splitter, result.game_policy)
-            if policy_tree_node != policy_tree.root:
-                family.mdp = None
-            policy_tree_node.split(result.splitter,suboptions,subfamilies)
-            undecided_leaves += policy_tree_node.child_nodes
+        if SynthesizerPolicyTree.num_workers > 1:
+            self.expand_tree_parallel(policy_tree, prop)
+        else:
+            game_solver = self.quotient.build_game_abstraction_solver(prop)
+            undecided_leaves = [policy_tree.root]
+            while undecided_leaves:
+                policy_tree_node = undecided_leaves.pop(-1)
+                undecided_leaves += self.expand_node(policy_tree, policy_tree_node, prop, game_solver)
 
         if SynthesizerPolicyTree.double_check_policy_tree_leaves:
             policy_tree.double_check(self.quotient, prop)
         policy_tree.print_stats()
 
         self.stat.num_mdps_total = self.quotient.family.size
-        self.stat.num_mdps_sat = sum([n.family.size for n in policy_tree.collect_sat()])
-        self.stat.num_nodes = len(policy_tree.collect_all())
-        self.stat.num_leaves = len(policy_tree.collect_leaves())
+        self.stat.num_mdps_sat = policy_tree.members_satisfied
+        self.stat.num_nodes = policy_tree.num_nodes
+        self.stat.num_leaves = policy_tree.num_leaves
         self.stat.num_policies = len(policy_tree.policies)
         postprocessing_time = policy_tree.postprocess(self.quotient, prop)
         policy_tree.print_stats()
         self.stat.postprocessing_time = postprocessing_time
-        self.stat.num_nodes_merged = len(policy_tree.collect_all())
-        self.stat.num_leaves_merged = len(policy_tree.collect_leaves())
+        self.stat.num_nodes_merged = policy_tree.num_nodes
+        self.stat.num_leaves_merged = policy_tree.num_leaves
         self.stat.num_policies_merged = len(policy_tree.policies)
         self.policy_tree = policy_tree
 
-        # convert policy tree to family evaluation
+        # convert policy tree to family evaluation, leaves sharing a policy share its decoded arrays; families of
+        #   undecided nodes are reported with unknown satisfiability
         evaluations = []
-        for node in policy_tree.collect_leaves():
-            policy = policy_tree.policies[node.policy_index] if node.sat else None
+        decoded_policies = {}
+        for node in policy_tree.collect_all():
+            if not node.is_leaf and not node.is_undecided:
+                continue
+            policy = None
+            if node.sat:
+                if node.policy_index not in decoded_policies:
+                    decoded_policies[node.policy_index] = policy_tree.policies[node.policy_index]
+                policy = decoded_policies[node.policy_index]
             evaluation = paynt.synthesizer.synthesizer.FamilyEvaluation(node.family,None,node.sat,policy=policy)
             evaluations.append(evaluation)
         return evaluations
@@ -738,17 +1187,15 @@ class SynthesizerPolicyTree(paynt.synthesizer.synthesizer.Synthesizer):
 
     def export_evaluation_result(self, evaluations, export_filename_base):
         import json
-        policies = self.policy_tree.extract_policies(self.quotient)
-        policies_json = {}
-        for index,key_value in enumerate(policies.items()):
-            policy_id,policy = key_value
-            policy_json = self.quotient.policy_to_json(policy)
-            policies_json[policy_id] = policy_json
-        policies_string = json.dumps(policies_json, indent=4)
-
+        # policies are exported one by one to avoid holding all of them in memory
         policies_filename = export_filename_base + ".json"
         with open(policies_filename, 'w') as file:
-            file.write(policies_string)
+            separator = "{\n"
+            for policy_id,policy in self.policy_tree.extract_policies(self.quotient):
+                policy_json = json.dumps(self.quotient.policy_to_json(policy), indent=4).replace("\n","\n    ")
+                file.write(f"{separator}    {json.dumps(policy_id)}: {policy_json}")
+                separator = ",\n"
+            file.write("{}" if separator == "{\n" else "\n}")
 
         logger.info(f"exported policies to {policies_filename}")
 
@@ -1,6 +1,7 @@
 import stormpy.storage
 
 import paynt.utils.timer
+import paynt.utils.telemetry
 import paynt.synthesizer.synthesizer
 import paynt.models.models
 
@@ -48,6 +49,8 @@ class Statistic:
         self.avg_size_game = 0
 
         self.synthesized_assignment = None
+        # optimum of the synthesized assignment, recorded before the synthesizer resets the specification
+        self.synthesized_value = None
         self.job_type = None
 
         # MDP family
@@ -58,6 +61,21 @@ class Statistic:
         self.num_policies = None
         self.num_policies_merged = None
 
+        # number of model checking queries of AR that were not needed to decide the family
+        self.num_queries_skipped = 0
+
+        # parallel AR: for each worker, a tuple (busy time, total time, iterations)
+        self.worker_stats = None
+
+        # AR: families analysed and pruned, time spent building sub-MDPs, model checking them and splitting families
+        self.families_analysed = 0
+        self.families_pruned = 0
+        self.build_timer = paynt.utils.timer.Timer()
+        self.check_timer = paynt.utils.timer.Timer()
+        self.split_timer = paynt.utils.timer.Timer()
+        # times of the timers above at the end of the previous family analysis
+        self.family_timestamps = (0,0,0)
+
         self.family_size = None
         self.synthesis_timer = paynt.utils.timer.Timer()
         self.status_horizon = Statistic.status_period_seconds
@@ -69,6 +87,12 @@ class Statistic:
         self.synthesis_timer.start()
         if not self.synthesis_timer_total.running:
             self.synthesis_timer_total.start()
+        if paynt.utils.telemetry.Telemetry.enabled():
+            paynt.utils.telemetry.Telemetry.emit("synthesis_started",
+                method=self.synthesizer.method_name, family_size=family.size, num_holes=family.num_holes,
+                quotient_states=self.quotient.quotient_mdp.nr_states,
+                quotient_choices=self.quotient.quotient_mdp.nr_choices
+            )
     
     def iteration(self, model):
         ''' Identify the type of the model and count corresponding iteration. '''
@@ -102,6 +126,38 @@ class Statistic:
         self.acc_size_game += size_game
         self.print_status()
 
+    def family_analysed(self, family, pruned):
+        '''
+        Record the analysis of a family in AR: the sub-MDP was built and model checked and the family was either
+        pruned or split.
+        '''
+        self.families_analysed += 1
+        if pruned:
+            self.families_pruned += 1
+        timestamps = (self.build_timer.read(), self.check_timer.read(), self.split_timer.read())
+        build_time,check_time,split_time = [now-last for now,last in zip(timestamps,self.family_timestamps)]
+        self.family_timestamps = timestamps
+        if not paynt.utils.telemetry.Telemetry.sample():
+            return
+        mdp = family.mdp
+        paynt.utils.telemetry.Telemetry.emit("family",
+            iteration=self.families_analysed, sample_weight=paynt.utils.telemetry.Telemetry.sample_period,
+            elapsed=round(self.synthesis_timer.read(), 6), family_size=family.size, depth=family.refinement_depth,
+            mdp_states=mdp.states if mdp is not None else None, mdp_choices=mdp.model.nr_choices if mdp is not None else None,
+            build_time=round(build_time, 6), check_time=round(check_time, 6), split_time=round(split_time, 6),
+            pruned=pruned
+        )
+
+    def queries_skipped(self, num_queries):
+        self.num_queries_skipped += num_queries
+
+    def workers_finished(self, worker_stats):
+        self.worker_stats = worker_stats
+
+    def worker_utilisation(self):
+        ''' For each worker, the fraction of time spent analyzing families. '''
+        return [safe_division(busy_time, total_time) for busy_time,total_time,_ in self.worker_stats]
+
     def new_fsc_found(self, value, assignment, size):
         time_elapsed = round(self.synthesis_timer_total.read(),1)
         # print(f'new opt: {value}')
@@ -156,10 +212,37 @@ class Statistic:
         return ret_str
 
 
+    def status_event(self):
+        ''' :return dictionary of the numeric progress indicators and cumulative times '''
+        fraction_explored = self.synthesizer.explored / self.family_size
+        elapsed = self.synthesis_timer.read()
+        event = {
+            "method": self.synthesizer.method_name,
+            "explored": fraction_explored,
+            "elapsed": round(elapsed, 3),
+            "estimated": round(safe_division(elapsed, fraction_explored), 3),
+            "iterations_game": self.iterations_game,
+            "iterations_mdp": self.iterations_mdp,
+            "iterations_dtmc": self.iterations_dtmc,
+            "families_analysed": self.families_analysed,
+            "families_pruned": self.families_pruned,
+            "build_time": round(self.build_timer.read(), 3),
+            "check_time": round(self.check_timer.read(), 3),
+            "split_time": round(self.split_timer.read(), 3),
+        }
+        opt = self.synthesizer.best_assignment_value
+        if opt is None and self.quotient.specification.has_optimality:
+            opt = self.quotient.specification.optimality.optimum
+        if opt is not None:
+            event["optimum"] = float(opt)
+        return event
+
     def print_status(self):
         if not self.synthesis_timer.read() > self.status_horizon:
             return
         print(self.status(), flush=True)
+        if paynt.utils.telemetry.Telemetry.enabled():
+            paynt.utils.telemetry.Telemetry.emit("status", **self.status_event())
         self.status_horizon = self.synthesis_timer.read() + Statistic.status_period_seconds
 
 
@@ -167,6 +250,14 @@ class Statistic:
         self.job_type = "synthesis"
         self.synthesis_timer.stop()
         self.synthesized_assignment = self.synthesizer.best_assignment
+        spec = self.quotient.specification
+        if self.synthesized_assignment is not None and spec.has_optimality:
+            self.synthesized_value = self.synthesizer.best_assignment_value
+            if self.synthesized_value is None:
+                self.synthesized_value = spec.optimality.optimum
+        if paynt.utils.telemetry.Telemetry.enabled():
+            paynt.utils.telemetry.Telemetry.emit("synthesis_finished",
+                feasible=self.synthesized_assignment is not None, **self.status_event())
 
     def finished_evaluation(self, evaluations):
         self.job_type = "evaluation"
@@ -194,13 +285,39 @@ class Statistic:
             avg_size = round(safe_division(self.acc_size_mdp, self.iterations_mdp))
             type_stats = f"MDP stats: avg MDP size: {avg_size}, iterations: {self.iterations_mdp}"
             iterations += f"{type_stats}\n"
+            if self.num_queries_skipped > 0:
+                iterations += f"MDP queries skipped: {self.num_queries_skipped}\n"
+
+        if self.families_analysed > 0:
+            iterations += f"AR families: {self.families_analysed} (pruned {self.families_pruned}), " \
+                f"build {round(self.build_timer.read(), 2)} s, model checking {round(self.check_timer.read(), 2)} s, " \
+                f"splitting {round(self.split_timer.read(), 2)} s\n"
 
         if self.iterations_dtmc is not None:
             avg_size = round(safe_division(self.acc_size_dtmc, self.iterations_dtmc))
             type_stats = f"DTMC stats: avg DTMC size: {avg_size}, iterations: {self.iterations_dtmc}"
             iterations += f"{type_stats}\n"
+
+        cache = self.quotient.assignment_cache
+        if cache is not None and cache.hits + cache.misses > 0:
+            iterations += f"DTMC cache: {cache}\n"
+        conflict_store = getattr(self.synthesizer, "conflict_store", None)
+        if conflict_store is not None and conflict_store.conflicts_total > 0:
+            iterations += f"conflict store: {conflict_store}\n"
         return iterations
 
+    def get_summary_workers(self):
+        if not self.worker_stats:
+            return ""
+        utilisation = [round(u*100) for u in self.worker_utilisation()]
+        avg_utilisation = round(sum(utilisation) / len(utilisation))
+        worker_iterations = [iterations for _,_,iterations in self.worker_stats]
+        workers = f"workers: {len(self.worker_stats)}, utilisation: avg {avg_utilisation} %, " \
+            f"min {min(utilisation)} %, max {max(utilisation)} %\n"
+        workers += "worker utilisation (%): " + ", ".join([str(u) for u in utilisation]) + "\n"
+        workers += "worker iterations: " + ", ".join([str(i) for i in worker_iterations]) + "\n"
+        return workers
+
     def get_summary_synthesis(self):
         spec = self.quotient.specification
         if spec.has_optimality and spec.optimality.optimum is not None:
@@ -234,6 +351,7 @@ class Statistic:
         timing = f"method: {self.synthesizer.method_name}, synthesis time: {round(self.synthesis_timer.time, 2)} s"
 
         iterations = self.get_summary_iterations()
+        iterations += self.get_summary_workers()
         
         if self.job_type == "synthesis":
             result = self.get_summary_synthesis()
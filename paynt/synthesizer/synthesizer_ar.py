@@ -1,17 +1,81 @@
+import payntbind
+
 import paynt.quotient.posmg
 import paynt.synthesizer.synthesizer
 import paynt.quotient.pomdp
 import paynt.verification.property_result
 
+import numpy
+
 import logging
 logger = logging.getLogger(__name__)
 
 class SynthesizerAR(paynt.synthesizer.synthesizer.Synthesizer):
 
+    # if True, model checking of subfamilies will start from the values computed for the parent family
+    warm_start = False
+
     @property
     def method_name(self):
         return "AR"
 
+    def parent_hint(self, parent_state_indices, parent_result, alt=False):
+        '''
+        Map the values computed for the parent family to the states of the sub-MDP of this family. Since the sub-MDP
+        has fewer choices, the minimum of the parent bounds the minimum of the family from below and can be used as
+        a sound starting point of the solver; maximizing queries are started cold.
+        :param parent_state_indices for each state of the sub-MDP, the corresponding state of the parent sub-MDP
+        :param parent_result MdpPropertyResult of the parent family (can be None)
+        :param alt if True, the hint is computed for the secondary direction
+        :return an array of state values or None if no hint is available
+        '''
+        if parent_state_indices is None or parent_result is None:
+            return None
+        minimizing = parent_result.minimizing != alt
+        property_result = parent_result.primary if not alt else parent_result.secondary
+        if not minimizing or property_result is None:
+            return None
+        parent_values = payntbind.synthesis.check_result_values_array(property_result.result)
+        return parent_values[parent_state_indices]
+
+    def parent_state_indices(self, family):
+        '''
+        :return for each state of the sub-MDP of the family, the index of the same quotient state in the sub-MDP of
+            the parent family, or None if the map is not available
+        '''
+        parent_state_map = numpy.asarray(family.parent_info.state_map, dtype=numpy.int64)
+        state_map = numpy.asarray(family.mdp.quotient_state_map, dtype=numpy.int64)
+        # sub-MDP construction preserves the order of the states, so both maps are sorted
+        indices = numpy.searchsorted(parent_state_map, state_map)
+        if indices.size > 0 and (indices[-1] >= len(parent_state_map) or \
+                not numpy.array_equal(parent_state_map[indices], state_map)):
+            return None
+        return indices
+
+    def parent_results(self, family, model):
+        '''
+        Collect the constraint and optimality results of the parent family, if available, together with the map of
+        the states of the family to the states of the parent (see parent_state_indices).
+        '''
+        num_constraints = len(self.quotient.specification.constraints)
+        no_results = [None] * num_constraints, None, None
+        if not SynthesizerAR.warm_start or family.parent_info is None or model is not family.mdp:
+            return no_results
+        parent_result = family.parent_info.analysis_result
+        if parent_result is None or family.parent_info.state_map is None or family.mdp.model.is_exact:
+            return no_results
+        parent_state_indices = self.parent_state_indices(family)
+        if parent_state_indices is None:
+            return no_results
+        constraint_results = [None] * num_constraints
+        if parent_result.constraints_result is not None:
+            constraint_results = parent_result.constraints_result.results
+        return constraint_results, parent_result.optimality_result, parent_state_indices
+
+    def queries_skipped(self, num_queries=1):
+        if self.stat is not None:
+            self.stat.queries_skipped(num_queries)
+
     def check_specification(self, family):
         ''' Check specification for mdp or smg based on self.quotient '''
         mdp = family.mdp
@@ -21,21 +85,25 @@ class SynthesizerAR(paynt.synthesizer.synthesizer.Synthesizer):
         else:
             model = mdp
 
-        # check constraints
+        parent_constraint_results,parent_optimality_result,parent_state_indices = self.parent_results(family, model)
+
+        # check primary direction of the constraints
         admissible_assignment = None
         spec = self.quotient.specification
         if family.constraint_indices is None:
             family.constraint_indices = spec.all_constraint_indices()
         results = [None for _ in spec.constraints]
+        constraints_violated = False
         for index in family.constraint_indices:
             constraint = spec.constraints[index]
             result = paynt.verification.property_result.MdpPropertyResult(constraint)
             results[index] = result
 
-            # check primary direction
-            result.primary = model.model_check_property(constraint)
+            hint = self.parent_hint(parent_state_indices, parent_constraint_results[index])
+            result.primary = model.model_check_property(constraint, hint_values=hint)
             if result.primary.sat is False:
                 result.sat = False
+                constraints_violated = True
                 break
 
             # check if the primary scheduler is consistent
@@ -44,28 +112,35 @@ class SynthesizerAR(paynt.synthesizer.synthesizer.Synthesizer):
                 assignment = family.assume_options_copy(result.primary_selection)
                 dtmc = self.quotient.build_assignment(assignment)
                 res = dtmc.check_specification(self.quotient.specification)
-                if res.accepting_dtmc(self.quotient.specification):
+                accepting,_ = res.accepting_dtmc(self.quotient.specification)
+                if accepting:
+                    # admissible assignment found, the secondary direction is not needed
                     result.sat = True
                     admissible_assignment = assignment
+                    self.queries_skipped()
+                    continue
 
-            # primary direction is SAT: check secondary direction to see whether all SAT
-            result.secondary = model.model_check_property(constraint, alt=True)
-            if mdp.is_deterministic and result.primary.value != result.secondary.value:
-                logger.warning("WARNING: model is deterministic but min<max")
-            if result.secondary.sat:
+            if mdp.is_deterministic:
+                # primary and secondary directions coincide
+                result.secondary = result.primary
                 result.sat = True
-                continue
+                self.queries_skipped()
 
-        spec_result = paynt.verification.property_result.MdpSpecificationResult()
-        spec_result.constraints_result = paynt.verification.property_result.ConstraintsResult(results)
+        # primary direction is SAT: secondary direction is checked after optimality since it might not be needed
+        secondary_indices = []
+        if not constraints_violated:
+            secondary_indices = [index for index in family.constraint_indices if results[index].sat is None]
 
         # check optimality
-        if spec.has_optimality and not spec_result.constraints_result.sat is False:
+        optimality_result = None
+        if spec.has_optimality and not constraints_violated:
             opt = spec.optimality
             result = paynt.verification.property_result.MdpOptimalityResult(opt)
+            optimality_result = result
 
             # check primary direction
-            result.primary = model.model_check_property(opt)
+            hint = self.parent_hint(parent_state_indices, parent_optimality_result)
+            result.primary = model.model_check_property(opt, hint_values=hint)
             if not result.primary.improves_optimum:
                 # OPT <= LB
                 result.can_improve = False
@@ -82,13 +157,31 @@ class SynthesizerAR(paynt.synthesizer.synthesizer.Synthesizer):
                     if res.constraints_result.sat and spec.optimality.improves_optimum(res.optimality_result.value):
                         result.improving_assignment = assignment
                         result.improving_value = res.optimality_result.value
-            spec_result.optimality_result = result
+            if not result.can_improve:
+                # no member can improve the optimum, so the family is pruned regardless of the constraints
+                self.queries_skipped(len(secondary_indices))
+                secondary_indices = []
+
+        # check secondary direction to see whether all SAT
+        for index in secondary_indices:
+            constraint = spec.constraints[index]
+            result = results[index]
+            hint = self.parent_hint(parent_state_indices, parent_constraint_results[index], alt=True)
+            result.secondary = model.model_check_property(constraint, alt=True, hint_values=hint)
+            if result.secondary.sat:
+                result.sat = True
+
+        spec_result = paynt.verification.property_result.MdpSpecificationResult()
+        spec_result.constraints_result = paynt.verification.property_result.ConstraintsResult(results)
+        spec_result.optimality_result = optimality_result
 
         spec_result.evaluate(family, admissible_assignment)
         family.analysis_result = spec_result
 
     def verify_family(self, family):
+        self.stat.build_timer.start()
         self.quotient.build(family)
+        self.stat.build_timer.stop()
 
         # TODO include iteration_game in iteration? is it necessary?
         if isinstance(self.quotient, paynt.quotient.posmg.PosmgQuotient):
@@ -96,7 +189,16 @@ class SynthesizerAR(paynt.synthesizer.synthesizer.Synthesizer):
         else:
             self.stat.iteration(family.mdp)
 
+        self.stat.check_timer.start()
         self.check_specification(family)
+        self.stat.check_timer.stop()
+
+    def split_family(self, family):
+        self.stat.split_timer.start()
+        subfamilies = self.quotient.split(family)
+        self.stat.split_timer.stop()
+        self.stat.family_analysed(family, pruned=False)
+        return subfamilies
 
     def update_optimum(self, family):
         ia = family.analysis_result.improving_assignment
@@ -129,8 +231,9 @@ class SynthesizerAR(paynt.synthesizer.synthesizer.Synthesizer):
             # break
             if family.analysis_result.can_improve is False:
                 self.explore(family)
+                self.stat.family_analysed(family, pruned=True)
                 continue
             # undecided
-            subfamilies = self.quotient.split(family)
+            subfamilies = self.split_family(family)
             families = families + subfamilies
         return self.best_assignment
@@ -165,6 +165,7 @@ class SynthesizerARStorm(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
             # family can be pruned
             if family.analysis_result.can_improve == False:
                 self.explore(family)
+                self.stat.family_analysed(family, pruned=True)
                 # if there are no more families in the main buffer coninue the exploration in the subfamilies
                 if not families and self.subfamilies_buffer:
                     logger.info("Main family synthesis done")
@@ -174,7 +175,7 @@ class SynthesizerARStorm(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
                 continue
 
             # undecided
-            subfamilies = self.quotient.split(family)
+            subfamilies = self.split_family(family)
             families = families + subfamilies
 
         return self.best_assignment
@@ -2,20 +2,51 @@ import paynt.synthesizer.synthesizer
 import paynt.synthesizer.conflict_generator.dtmc
 import paynt.synthesizer.conflict_generator.mdp
 import paynt.family.smt
+import paynt.family.enumerator
+import paynt.family.conflict_store
+
+import multiprocessing
 
 import logging
 logger = logging.getLogger(__name__)
 
 
+# global variables for batch CEGIS: the synthesizer and the analyzed family are inherited by the forked workers
+batch_synthesizer = None
+batch_family = None
+
+def evaluate_assignment_batch(assignment_bytes, optimum):
+    '''
+    Evaluate the assignment in a worker process of batch CEGIS.
+    :param optimum current optimum of the coordinator (or None)
+    :return the size of the DTMC, the list of conflicts, whether the DTMC is accepting and the improving value
+    '''
+    synthesizer = batch_synthesizer
+    if optimum is not None:
+        synthesizer.quotient.specification.optimality.update_optimum(optimum)
+    assignment = batch_family.from_bytes(assignment_bytes)
+    dtmc = synthesizer.quotient.build_assignment(assignment)
+    conflicts,accepting,improving_value = synthesizer.analyze_dtmc_cegis(batch_family, assignment, dtmc)
+    return dtmc.states, [list(conflict) for conflict in conflicts], accepting, improving_value
+
+
 class SynthesizerCEGIS(paynt.synthesizer.synthesizer.Synthesizer):
 
     # CLI argument selecting conflict generator
     conflict_generator_type = None
+    # CLI argument selecting the solver exploring the design space: "smt" or "native"
+    design_space_solver_type = "smt"
+    # number of worker processes evaluating assignments in batch CEGIS, 1 means sequential CEGIS
+    num_workers = 1
+    # batch CEGIS: the size of the batch is adapted between num_workers and batch_size_factor*num_workers
+    batch_size_factor = 4
 
     def __init__(self, quotient):
         super().__init__(quotient)
 
         self.conflict_generator = self.choose_conflict_generator(quotient)
+        # conflicts learned during the synthesis
+        self.conflict_store = None
 
         # assert that no reward formula is maximizing
         assert not self.quotient.specification.contains_maximizing_reward_properties, \
@@ -31,10 +62,24 @@ class SynthesizerCEGIS(paynt.synthesizer.synthesizer.Synthesizer):
         return conflict_generator
 
     
+    def create_design_space_solver(self, family):
+        if SynthesizerCEGIS.design_space_solver_type == "native":
+            return paynt.family.enumerator.FamilyEnumerator(family)
+        # default design space solver
+        return paynt.family.smt.SmtSolver(family)
+
     @property
     def method_name(self):
         return "CEGIS " + self.conflict_generator.name
 
+    def exclude_conflicts(self, smt_solver, family, assignment, conflicts):
+        '''
+        Exclude conflicts from the design space solver, conflicts subsumed by the stored ones are skipped.
+        :return estimate of pruned assignments
+        '''
+        conflicts = self.conflict_store.add_conflicts(family, assignment, conflicts)
+        return smt_solver.exclude_conflicts(family, assignment, conflicts)
+
     
     def collect_conflict_requests(self, family, mc_result):
         '''
@@ -68,21 +113,28 @@ class SynthesizerCEGIS(paynt.synthesizer.synthesizer.Synthesizer):
 
         dtmc = self.quotient.build_assignment(assignment)
         self.stat.iteration(dtmc)
+        conflicts,accepting,_ = self.analyze_dtmc_cegis(family, assignment, dtmc)
+        accepting_assignment = assignment if accepting else None
+        return conflicts, accepting_assignment
+
+    def analyze_dtmc_cegis(self, family, assignment, dtmc):
+        """
+        :return (1) list of conflicts to exclude from design space (might be empty)
+        :return (2) whether the DTMC is accepting
+        :return (3) new optimal value associated with the accepting DTMC (or None)
+        """
         result = dtmc.check_specification(self.quotient.specification, family.constraint_indices, short_evaluation=True)
         # analyze model checking results
-        accepting_assignment = None
         accepting,improving_value = result.accepting_dtmc(self.quotient.specification)
-        if accepting:
-            accepting_assignment = assignment
         if improving_value is not None:
             self.quotient.specification.optimality.update_optimum(improving_value)
         if accepting and not self.quotient.specification.can_be_improved():
-            return [], accepting_assignment
+            return [], accepting, improving_value
 
         conflict_requests = self.collect_conflict_requests(family, result)
         conflicts = self.conflict_generator.construct_conflicts(family, assignment, dtmc, conflict_requests)
 
-        return conflicts, accepting_assignment
+        return conflicts, accepting, improving_value
 
 
     def synthesize_one(self, family):
@@ -92,8 +144,14 @@ class SynthesizerCEGIS(paynt.synthesizer.synthesizer.Synthesizer):
         self.conflict_generator.initialize()
 
         # use sketch design space as a SAT baseline (TODO why?)
-        smt_solver = paynt.family.smt.SmtSolver(self.quotient.family)
-        
+        smt_solver = self.create_design_space_solver(self.quotient.family)
+        self.conflict_store = paynt.family.conflict_store.ConflictStore()
+
+        if SynthesizerCEGIS.num_workers > 1:
+            if "fork" in multiprocessing.get_all_start_methods():
+                return self.synthesize_one_batch(family, smt_solver)
+            logger.warning("batch CEGIS requires forked worker processes, running sequential CEGIS")
+
         # CEGIS loop
         assignment = smt_solver.pick_assignment(family)
         while assignment is not None:
@@ -104,9 +162,94 @@ class SynthesizerCEGIS(paynt.synthesizer.synthesizer.Synthesizer):
                 if not self.quotient.specification.can_be_improved():
                     return self.best_assignment
 
-            pruned = smt_solver.exclude_conflicts(family, assignment, conflicts)
+            pruned = self.exclude_conflicts(smt_solver, family, assignment, conflicts)
             self.explored += pruned
             
             # construct next assignment
             assignment = smt_solver.pick_assignment(family)
         return self.best_assignment
+
+
+    def pick_assignment_batch(self, family, smt_solver, batch_size):
+        ''' Pick up to batch_size pairwise distinct assignments, each picked assignment is excluded from the solver. '''
+        assignments = []
+        all_holes = list(range(family.num_holes))
+        while len(assignments) < batch_size:
+            assignment = smt_solver.pick_assignment(family)
+            if assignment is None:
+                break
+            assignments.append(assignment)
+            smt_solver.exclude_conflict(family, assignment, all_holes)
+        return assignments
+
+    def adapt_batch_size(self, batch_size, assignments, results):
+        '''
+        Adapt the size of the batch to the observed conflicts. A member of the batch is redundant if it is excluded by a
+        conflict of another member: sequential CEGIS would not have picked it. Small conflicts exclude many members,
+        in which case the batch shrinks towards the number of workers (a batch of this size costs no extra time); large
+        conflicts exclude few, in which case the batch grows to keep the workers busy.
+        '''
+        num_workers = SynthesizerCEGIS.num_workers
+        hole_to_option = [
+            [assignment.hole_options(hole)[0] for hole in range(assignment.num_holes)] for assignment in assignments
+        ]
+        redundant = 0
+        for index,options in enumerate(hole_to_option):
+            for other,(_,conflicts,_,_) in enumerate(results):
+                if other == index:
+                    continue
+                other_options = hole_to_option[other]
+                if any(all(options[hole] == other_options[hole] for hole in conflict) for conflict in conflicts):
+                    redundant += 1
+                    break
+        redundant_ratio = redundant / len(assignments)
+        if redundant_ratio > 0.5:
+            batch_size = max(num_workers, batch_size // 2)
+        elif redundant_ratio < 0.25 and len(assignments) == batch_size:
+            batch_size = min(num_workers * SynthesizerCEGIS.batch_size_factor, batch_size * 2)
+        return batch_size
+
+    def synthesize_one_batch(self, family, smt_solver):
+        '''
+        Batch CEGIS: in each round, pick a batch of distinct assignments, evaluate their DTMCs and construct
+        counterexamples in a pool of worker processes, and exclude all resulting conflicts before the next round.
+        '''
+        global batch_synthesizer, batch_family
+        batch_synthesizer = self
+        batch_family = family
+
+        num_workers = SynthesizerCEGIS.num_workers
+        logger.debug(f"starting batch CEGIS with {num_workers} workers")
+        spec = self.quotient.specification
+        batch_size = num_workers
+        try:
+            with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+                while True:
+                    assignments = self.pick_assignment_batch(family, smt_solver, batch_size)
+                    if not assignments:
+                        break
+                    optimum = spec.optimality.optimum if spec.has_optimality else None
+                    tasks = [(assignment.to_bytes(),optimum) for assignment in assignments]
+                    results = pool.starmap(evaluate_assignment_batch, tasks)
+
+                    for assignment,(dtmc_states,conflicts,accepting,improving_value) in zip(assignments,results):
+                        self.stat.iteration_dtmc(dtmc_states)
+                        if not accepting:
+                            continue
+                        # members of the batch were evaluated against the same optimum, accept only improvements
+                        if improving_value is not None:
+                            if not spec.optimality.improves_optimum(improving_value):
+                                continue
+                            spec.optimality.update_optimum(improving_value)
+                        self.best_assignment = assignment
+                        if not spec.can_be_improved():
+                            return self.best_assignment
+
+                    # conflicts constructed against a weaker optimum remain valid
+                    for assignment,(_,conflicts,_,_) in zip(assignments,results):
+                        self.explored += self.exclude_conflicts(smt_solver, family, assignment, conflicts)
+                    batch_size = self.adapt_batch_size(batch_size, assignments, results)
+        finally:
+            batch_synthesizer = None
+            batch_family = None
+        return self.best_assignment
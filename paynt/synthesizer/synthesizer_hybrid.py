@@ -3,6 +3,7 @@ import paynt.synthesizer.synthesizer_ar
 import paynt.synthesizer.synthesizer_cegis
 
 import paynt.family.smt
+import paynt.family.conflict_store
 import paynt.utils.timer
 
 import logging
@@ -94,7 +95,8 @@ class SynthesizerHybrid(paynt.synthesizer.synthesizer_ar.SynthesizerAR, paynt.sy
     def synthesize_one(self, family):
 
         self.conflict_generator.initialize()
-        smt_solver = paynt.family.smt.SmtSolver(self.quotient.family)
+        smt_solver = self.create_design_space_solver(self.quotient.family)
+        self.conflict_store = paynt.family.conflict_store.ConflictStore()
 
         # AR-CEGIS loop
         families = [family]
@@ -109,6 +111,11 @@ class SynthesizerHybrid(paynt.synthesizer.synthesizer_ar.SynthesizerAR, paynt.sy
 
             # reset SMT solver level
             smt_solver.level(family.refinement_depth)
+            self.conflict_store.level(family.refinement_depth)
+
+            if self.conflict_store.covers(family):
+                # all members were rejected by a conflict, these were already counted as explored by CEGIS
+                continue
 
             # analyze the family
             self.verify_family(family)
@@ -116,6 +123,7 @@ class SynthesizerHybrid(paynt.synthesizer.synthesizer_ar.SynthesizerAR, paynt.sy
             if family.analysis_result.can_improve == False:
                 self.explore(family)
                 self.stage_control.prune_ar(family.size)
+                self.stat.family_analysed(family, pruned=True)
                 continue
 
             # undecided: initiate CEGIS analysis
@@ -143,7 +151,7 @@ class SynthesizerHybrid(paynt.synthesizer.synthesizer_ar.SynthesizerAR, paynt.sy
                     break   # explored whole family
                 
                 conflicts, accepting_assignment = self.analyze_family_assignment_cegis(family, assignment)
-                pruned = smt_solver.exclude_conflicts(family, assignment, conflicts)
+                pruned = self.exclude_conflicts(smt_solver, family, assignment, conflicts)
                 self.explored += pruned
                 self.stage_control.prune_cegis(pruned)
 
@@ -155,9 +163,10 @@ class SynthesizerHybrid(paynt.synthesizer.synthesizer_ar.SynthesizerAR, paynt.sy
                 # assignment is UNSAT: move on to the next assignment
 
             if family_explored:
+                self.stat.family_analysed(family, pruned=True)
                 continue
         
-            subfamilies = self.quotient.split(family)
+            subfamilies = self.split_family(family)
             families = families + subfamilies
 
         return self.best_assignment
@@ -1,144 +1,280 @@
 from paynt.synthesizer.synthesizer import Synthesizer
 from paynt.synthesizer.synthesizer_ar import SynthesizerAR
+import paynt.utils.timer
 
+import gc
 import os
-import time
+import queue
+import traceback
 import multiprocessing
 
 import logging
 logger = logging.getLogger(__name__)
 
 
-import cProfile, pstats
-
 # global variables
-# when a new process is spawned (forked), it will inherit these variables from the parent
+# forked workers inherit the quotient and all class-level settings from the parent
 quotient = None
-profiler = None
 
-# helper functions for family serialization
-def family_to_hole_options(family):
-    return [family.hole_options(hole) for hole in range(family.num_holes)]
+# helper functions for family serialization: families are transferred as packed bit arrays of hole options
+def family_to_bytes(family):
+    return family.to_bytes()
 
-def hole_options_to_family(hole_options):
-    family = quotient.family.copy()
-    for hole,options in enumerate(hole_options):
-        family.hole_set_options(hole,options)
-    return family
+def bytes_to_family(data):
+    return quotient.family.from_bytes(data)
 
 
-def solve_family(args):
+class ArWorker:
     '''
-    Build the quotient, analyze it and, if necessary, split into subfamilies.
+    AR worker exploring its own DFS stack of families. The worker receives messages from the coordinator via its
+    inbox and reports back via the (shared) outbox. Messages are tuples whose first item is a tag:
+    - inbox: ("family", family_bytes), ("optimum", value), ("steal",), ("stop",)
+    - outbox: ("iteration", worker, mdp_states, stack_size, explored), ("improve", worker, value, family_bytes),
+        ("stolen", worker, family_bytes), ("steal_failed", worker), ("idle", worker),
+        ("stats", worker, busy_time, total_time, iterations), ("error", worker, traceback)
     '''
-    try:
 
-        if args is None:
-            pstats.Stats(profiler).sort_stats('tottime').print_stats(10)
+    def __init__(self, worker_id, inbox, outbox):
+        self.worker_id = worker_id
+        self.inbox = inbox
+        self.outbox = outbox
+        # model checking of the families is delegated to the sequential AR
+        self.synthesizer = SynthesizerAR(quotient)
+        # DFS stack of families, the deepest family is at the top
+        self.families = []
+        self.running = True
+
+        self.iterations = 0
+        self.timer_busy = paynt.utils.timer.Timer()
+        self.timer_total = paynt.utils.timer.Timer()
+
+    def update_optimum(self, value):
+        optimality = quotient.specification.optimality
+        if optimality.improves_optimum(value):
+            optimality.update_optimum(value)
+
+    def steal(self):
+        ''' Give away the shallowest family, i.e. the largest chunk of remaining work. '''
+        if len(self.families) <= 1:
+            self.outbox.put(("steal_failed", self.worker_id))
             return
-
-        hole_options, optimum = args
-        # re-construct the family
-        family = hole_options_to_family(hole_options)
-
-        # synchronize optimum
-        if optimum is not None:
-            quotient.specification.optimality.optimum = optimum
-
+        family = self.families.pop(0)
+        # the family will be built by another worker
+        if family.parent_info is not None:
+            family.parent_info.release_child()
+        self.outbox.put(("stolen", self.worker_id, family_to_bytes(family)))
+
+    def handle_message(self, message):
+        tag = message[0]
+        if tag == "family":
+            self.families.append(bytes_to_family(message[1]))
+        elif tag == "optimum":
+            self.update_optimum(message[1])
+        elif tag == "steal":
+            self.steal()
+        elif tag == "stop":
+            self.running = False
+
+    def process_inbox(self, block):
+        if block:
+            self.handle_message(self.inbox.get())
+        while self.running:
+            try:
+                message = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            self.handle_message(message)
+
+    def solve_family(self, family):
+        ''' Build the quotient, analyze it and, if necessary, split into subfamilies. '''
         quotient.build(family)
-        quotient.check_specification_for_mdp(family)
+        self.synthesizer.check_specification(family)
+        self.iterations += 1
         res = family.analysis_result
-        improving_value = res.improving_value
-        improving_assignment = res.improving_assignment
-        if improving_assignment is not None:
-            improving_assignment = family_to_hole_options(improving_assignment)
-
-        subfamilies = []
-        if res.can_improve:
-            subfamilies = quotient.split(family)
-            subfamilies = [ family_to_hole_options(family) for family in subfamilies ]
 
-        return (family.mdp.states, improving_value, improving_assignment, subfamilies)
+        if res.improving_assignment is not None:
+            improving_value = res.improving_value
+            if improving_value is not None:
+                self.update_optimum(improving_value)
+            family_bytes = family_to_bytes(res.improving_assignment)
+            self.outbox.put(("improve", self.worker_id, improving_value, family_bytes))
 
+        explored = 0
+        if res.can_improve:
+            self.families += quotient.split(family)
+        else:
+            explored = family.size
+        self.outbox.put(("iteration", self.worker_id, family.mdp.states, len(self.families), explored))
+
+    def run(self):
+        self.timer_total.start()
+        idle_announced = False
+        while self.running:
+            if not self.families:
+                if not idle_announced:
+                    self.outbox.put(("idle", self.worker_id))
+                    idle_announced = True
+                self.process_inbox(block=True)
+                continue
+            idle_announced = False
+            self.timer_busy.start()
+            self.solve_family(self.families.pop(-1))
+            self.timer_busy.stop()
+            self.process_inbox(block=False)
+        self.timer_total.stop()
+        self.outbox.put(("stats", self.worker_id, self.timer_busy.read(), self.timer_total.read(), self.iterations))
+
+
+def run_worker(worker_id, inbox, outbox):
+    try:
+        ArWorker(worker_id, inbox, outbox).run()
     except:
-        logger.error("Worker sub-process encountered an error.")
-        return None
+        outbox.put(("error", worker_id, traceback.format_exc()))
 
 
 
 class SynthesizerMultiCoreAR(SynthesizerAR):
+    '''
+    Asynchronous AR: each worker explores its own DFS stack of families, idle workers steal the shallowest
+    family from the busiest worker and improving optima are broadcast to all workers as soon as they are found.
+    '''
+
+    # number of worker processes, if None, os.cpu_count() processes will be spawned
+    num_workers = None
+    # how long (s) the coordinator waits for a message before re-checking resource limits
+    coordinator_poll_seconds = 1
 
     @property
     def method_name(self):
         return "AR (multicore)"
 
     def synthesize_one(self, family):
-
-        satisfying_assignment = None
-        families = [family]
-
         global quotient
         quotient = self.quotient
-        profiling = False
-        if profiling:
-            global profiler
-            profiler = cProfile.Profile()
-            profiler.enable()
-
-        # create a pool of processes
-        # by default, os.cpu_count() processes will be spawned
-        with multiprocessing.Pool(
-            # processes=1
-        ) as pool:
-
-            while families:
-
-                # get current optimum
-                optimum = None
-                if self.quotient.specification.has_optimality:
-                    optimum = self.quotient.specification.optimality.optimum
-
-                # work with some number of families
-                # print("submitting ", len(families), " families")
-
-                split = os.cpu_count() * 1
-                input_families = families[-split:]
-                input_families_size = sum([family.size for family in input_families])
-                remaining_families = families[:-split]
-                input_families = [family_to_hole_options(family) for family in input_families]
-
-                inputs = zip(input_families, [optimum] * len(input_families))
-
-                results = pool.map(solve_family, inputs)
-                # results = pool.imap_unordered(solve_family, inputs, chunksize=10)
-                # results = pool.map(solve_batch, inputs)
-
-                # process the results
-                new_families = []
-                for r in results:
-                    if r is None:
-                        logger.error("Worker sub-process encountered an error.")
-                        exit()
-                    mdp_states, improving_value, improving_assignment, subfamilies_hole_options = r
-                    self.stat.iteration_mdp(mdp_states)
-
-                    if improving_value is not None:
-                        if self.quotient.specification.optimality.improves_optimum(improving_value):
-                            self.quotient.specification.optimality.update_optimum(improving_value)
-                            improving_assignment = hole_options_to_family(improving_assignment)
-                            satisfying_assignment = improving_assignment
-
-                    subfamilies = [hole_options_to_family(hole_options) for hole_options in subfamilies_hole_options]
-                    new_families += subfamilies
-
-                new_families_size = sum([family.size for family in new_families])
-                self.explored += input_families_size-new_families_size
-
-                families = remaining_families + new_families
-
-            if profiling:
-                pool.apply(solve_family, (None,))
-
-        if profiling:
-            pstats.Stats(profiler).sort_stats('tottime').print_stats(10)
-        return satisfying_assignment
+        try:
+            return self.run_workers(family)
+        finally:
+            quotient = None
+
+    def run_workers(self, family):
+
+        num_workers = SynthesizerMultiCoreAR.num_workers
+        if num_workers is None:
+            num_workers = os.cpu_count()
+        logger.debug(f"starting {num_workers} AR workers")
+
+        # the workers are always forked, regardless of the default start method, to inherit the quotient
+        context = multiprocessing.get_context("fork")
+        outbox = context.Queue()
+        inboxes = [context.Queue() for _ in range(num_workers)]
+        processes = [
+            context.Process(target=run_worker, args=(worker,inboxes[worker],outbox))
+            for worker in range(num_workers)
+        ]
+        # move all objects into the permanent generation, such that garbage collections in the workers do not write
+        #   into (and thereby copy) the pages of objects inherited from the coordinator
+        gc.freeze()
+        try:
+            for process in processes:
+                process.start()
+        finally:
+            gc.unfreeze()
+
+        # coordinator's view of the workers
+        worker_stack_size = [0] * num_workers
+        worker_steal_pending = [False] * num_workers
+        idle_workers = []
+        # the root family is assigned to the first worker that reports being idle
+        root_family_bytes = family_to_bytes(family)
+
+        def assign_family(family_bytes):
+            worker = idle_workers.pop(0)
+            inboxes[worker].put(("family", family_bytes))
+
+        def request_steal():
+            # pick the busy worker with the largest stack that is not being stolen from already
+            num_pending = sum(worker_steal_pending)
+            if len(idle_workers) <= num_pending:
+                return
+            candidates = [
+                worker for worker in range(num_workers)
+                if worker not in idle_workers and not worker_steal_pending[worker] and worker_stack_size[worker] > 1
+            ]
+            if not candidates:
+                return
+            victim = max(candidates, key=lambda worker: worker_stack_size[worker])
+            worker_steal_pending[victim] = True
+            inboxes[victim].put(("steal",))
+
+        # traceback of a failed worker
+        worker_error = None
+        while True:
+            if self.resource_limit_reached():
+                break
+            if root_family_bytes is None and len(idle_workers) == num_workers and not any(worker_steal_pending):
+                # all workers are idle and no family is in transit
+                break
+            try:
+                message = outbox.get(timeout=SynthesizerMultiCoreAR.coordinator_poll_seconds)
+            except queue.Empty:
+                continue
+
+            tag,worker = message[0],message[1]
+            if tag == "error":
+                worker_error = (worker,message[2])
+                break
+            if tag == "iteration":
+                _,_,mdp_states,stack_size,explored = message
+                self.stat.iteration_mdp(mdp_states)
+                self.explored += explored
+                worker_stack_size[worker] = stack_size
+            elif tag == "improve":
+                _,_,improving_value,family_bytes = message
+                if not self.quotient.specification.has_optimality:
+                    self.best_assignment = bytes_to_family(family_bytes)
+                    break
+                optimality = self.quotient.specification.optimality
+                if optimality.improves_optimum(improving_value):
+                    optimality.update_optimum(improving_value)
+                    self.best_assignment = bytes_to_family(family_bytes)
+                    self.best_assignment_value = improving_value
+                    for other in range(num_workers):
+                        if other != worker:
+                            inboxes[other].put(("optimum", improving_value))
+            elif tag == "idle":
+                worker_stack_size[worker] = 0
+                idle_workers.append(worker)
+                if root_family_bytes is not None:
+                    assign_family(root_family_bytes)
+                    root_family_bytes = None
+            elif tag == "stolen":
+                worker_steal_pending[worker] = False
+                worker_stack_size[worker] -= 1
+                assign_family(message[2])
+            elif tag == "steal_failed":
+                worker_steal_pending[worker] = False
+            request_steal()
+
+        # stop the workers and collect their statistics
+        for inbox in inboxes:
+            inbox.put(("stop",))
+        worker_stats = [None] * num_workers
+        while None in worker_stats:
+            try:
+                message = outbox.get(timeout=SynthesizerMultiCoreAR.coordinator_poll_seconds)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+                continue
+            if message[0] == "stats":
+                _,worker,busy_time,total_time,iterations = message
+                worker_stats[worker] = (busy_time,total_time,iterations)
+        for process in processes:
+            process.join()
+        if worker_error is not None:
+            # families of the failed worker were not explored, the result would be unsound
+            worker,worker_traceback = worker_error
+            raise RuntimeError(f"AR worker {worker} encountered an error:\n{worker_traceback}")
+        self.stat.workers_finished([stats for stats in worker_stats if stats is not None])
+
+        return self.best_assignment
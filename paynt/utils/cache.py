@@ -0,0 +1,54 @@
+import collections
+
+
+class LruCache:
+    '''
+    Least-recently-used cache with a memory cap. The size of each item is provided by the caller (e.g. an estimate in
+    bytes); when the total size exceeds the cap, the least recently used items are evicted.
+    '''
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # key -> (value, size), ordered from the least to the most recently used
+        self.items = collections.OrderedDict()
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def clear(self):
+        self.items.clear()
+        self.size = 0
+
+    def get(self, key):
+        ''' :return the value associated with the key or None if the key is not cached '''
+        item = self.items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value, size):
+        ''' Store the value, items larger than the cap are not stored. '''
+        if key in self.items:
+            self.size -= self.items.pop(key)[1]
+        if size > self.max_size:
+            return
+        self.items[key] = (value, size)
+        self.size += size
+        while self.size > self.max_size:
+            _,(_,evicted_size) = self.items.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def __str__(self):
+        return f"hits: {self.hits}, misses: {self.misses}, evictions: {self.evictions}"
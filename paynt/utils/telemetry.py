@@ -0,0 +1,140 @@
+import collections
+import json
+import os
+import time
+
+
+class TelemetrySink:
+    ''' Receiver of telemetry events, each event is a dictionary with the event type stored under the key "event". '''
+
+    def emit(self, event):
+        ''' to be overridden '''
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlSink(TelemetrySink):
+    ''' Writes each event as a JSON line. '''
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+
+    def emit(self, event):
+        self.file.write(json.dumps(event, default=str) + "\n")
+        if event["event"] != "family":
+            # status and lifecycle events are rare, make them visible to readers of the file immediately
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class RingBufferSink(TelemetrySink):
+    ''' Keeps the most recent events in memory, e.g. for inspection from an embedding application. '''
+
+    def __init__(self, capacity=10000):
+        self.buffer = collections.deque(maxlen=capacity)
+
+    def emit(self, event):
+        self.buffer.append(event)
+
+    def events(self, event_type=None):
+        ''' :return list of buffered events, optionally only of the given type '''
+        return [event for event in self.buffer if event_type is None or event["event"] == event_type]
+
+
+class PrometheusSink(TelemetrySink):
+    '''
+    Exports numeric fields of the status and lifecycle events as gauges in the Prometheus text format, to be picked up
+    by the textfile collector of node_exporter. The file is rewritten atomically at most once per write period.
+    '''
+
+    # minimum period (s) between two writes of the file
+    write_period_seconds = 10
+
+    def __init__(self, path, prefix="paynt"):
+        self.path = path
+        self.prefix = prefix
+        self.labels = {}
+        self.gauges = {}
+        self.last_write = None
+
+    def emit(self, event):
+        if event["event"] == "family":
+            return
+        for key,value in event.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int,float)):
+                self.gauges[key] = value
+            elif key == "method" and value is not None:
+                self.labels[key] = str(value)
+        if self.last_write is None or event["event"] != "status" or \
+                time.time() - self.last_write >= PrometheusSink.write_period_seconds:
+            self.write()
+
+    def write(self):
+        labels = ",".join([f'{key}="{value}"' for key,value in self.labels.items()])
+        lines = []
+        for key,value in self.gauges.items():
+            name = f"{self.prefix}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{{{labels}}} {value}")
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+        self.last_write = time.time()
+
+    def close(self):
+        if self.gauges:
+            self.write()
+
+
+class Telemetry:
+    '''
+    Global dispatcher of structured telemetry events to the registered sinks. Per-family events are sampled: only
+    every sample_period-th event is emitted and carries the sample period as its weight; status and lifecycle events
+    are always emitted.
+    '''
+
+    sinks = []
+    sample_period = 1
+    num_samples = 0
+
+    @classmethod
+    def add_sink(cls, sink):
+        cls.sinks.append(sink)
+
+    @classmethod
+    def enabled(cls):
+        return len(cls.sinks) > 0
+
+    @classmethod
+    def sample(cls):
+        ''' :return True if the next sampled event is to be emitted '''
+        if not cls.sinks:
+            return False
+        cls.num_samples += 1
+        return (cls.num_samples - 1) % cls.sample_period == 0
+
+    @classmethod
+    def emit(cls, event_type, **fields):
+        if not cls.sinks:
+            return
+        event = {"event": event_type, "timestamp": round(time.time(), 3)}
+        event.update(fields)
+        for sink in cls.sinks:
+            sink.emit(event)
+
+    @classmethod
+    def close(cls):
+        ''' Close all sinks and reset the dispatcher to its initial state. '''
+        sinks = cls.sinks
+        cls.sinks = []
+        cls.sample_period = 1
+        cls.num_samples = 0
+        for sink in sinks:
+            sink.close()
@@ -87,11 +87,17 @@ class Property:
     def model_check(cls, model, formula):
         return stormpy.model_checking(model, formula, extract_scheduler=True, environment=cls.environment)
 
+    @classmethod
+    def model_check_with_hint(cls, model, formula, hint_values):
+        ''' Model check starting from the given values that bound the result from below. '''
+        return payntbind.synthesis.verify_mdp_with_hint(cls.environment, model, formula, hint_values)
+
     @classmethod
     def compute_expected_visits(cls, model):
         result = stormpy.compute_expected_number_of_visits(cls.environment, model)
-        values = list(result.get_values())
-        return values
+        if model.is_exact:
+            return list(result.get_values())
+        return payntbind.synthesis.check_result_values_array(result)
 
     @staticmethod
     def above_model_checking_precision(a, b):
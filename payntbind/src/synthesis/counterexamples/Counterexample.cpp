@@ -43,9 +43,9 @@ namespace synthesis {
     CounterexampleGenerator<ValueType,StateType>::CounterexampleGenerator (
         storm::models::sparse::Mdp<ValueType> const& quotient_mdp,
         uint64_t hole_count,
-        std::vector<std::set<uint64_t>> const& mdp_holes,
+        Coloring const& coloring,
         std::vector<std::shared_ptr<storm::logic::Formula const>> const& formulae
-        ) : quotient_mdp(quotient_mdp), hole_count(hole_count), mdp_holes(mdp_holes) {
+        ) : quotient_mdp(quotient_mdp), hole_count(hole_count), mdp_holes(coloring.getStateToHoles()) {
 
         // create label formulae for our own labels
         std::shared_ptr<storm::logic::Formula const> const& target_label_formula = std::make_shared<storm::logic::AtomicLabelFormula>(this->target_label);
@@ -132,11 +132,11 @@ namespace synthesis {
         this->hole_wave.resize(this->hole_count,0);
         
         // Associate states of a DTMC with relevant holes and store their count
-        std::vector<std::set<uint64_t>> dtmc_holes(dtmc_states);
+        std::vector<storm::storage::BitVector const*> dtmc_holes(dtmc_states);
         std::vector<uint64_t> unregistered_holes_count(dtmc_states, 0);
         for(StateType state = 0; state < dtmc_states; state++) {
-            dtmc_holes[state] = this->mdp_holes[state_map[state]];
-            unregistered_holes_count[state] = dtmc_holes[state].size();
+            dtmc_holes[state] = &this->mdp_holes[state_map[state]];
+            unregistered_holes_count[state] = dtmc_holes[state]->getNumberOfSetBits();
         }
 
         // Prepare to explore
@@ -209,7 +209,7 @@ namespace synthesis {
             blocking_candidate_set = false;
             
             // Register all unregistered holes of this blocking state
-            for(uint64_t hole: dtmc_holes[blocking_candidate]) {
+            for(uint64_t hole: *dtmc_holes[blocking_candidate]) {
                 if(this->hole_wave[hole] == 0) {
                     hole_wave[hole] = current_wave;
                     // std::cout << "[storm] hole " << hole << " expanded in wave " << current_wave << std::endl;
@@ -219,7 +219,7 @@ namespace synthesis {
             // Recompute number of unregistered holes in each state
             for(StateType state = 0; state < dtmc_states; state++) {
                 unregistered_holes_count[state] = 0;
-                for(uint64_t hole: dtmc_holes[state]) {
+                for(uint64_t hole: *dtmc_holes[state]) {
                     if(this->hole_wave[hole] == 0) {
                         unregistered_holes_count[state]++;
                     }
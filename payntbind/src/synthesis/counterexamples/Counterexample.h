@@ -9,6 +9,8 @@
 #include "storm/models/sparse/Dtmc.h"
 #include "storm/utility/Stopwatch.h"
 
+#include "src/synthesis/quotient/Coloring.h"
+
 namespace synthesis {
 
     template<typename ValueType = double, typename StateType = uint64_t>
@@ -21,15 +23,16 @@ namespace synthesis {
          * deterministic sub-MDPs (DTMCs).
          * @param quotient_mdp The quotient MDP.
          * @param hole_count Total number of holes.
-         * @param mdp_holes For each state of a quotient MDP, a set of
-         *   indices of significant holes.
+         * @param coloring Coloring of the quotient MDP, its state-to-holes
+         *   mapping identifies significant holes of each state; the coloring
+         *   must outlive the generator.
          * @param formulae Formulae to check, can be both
          *   probabilistic and reward-based.
          */
         CounterexampleGenerator(
             storm::models::sparse::Mdp<ValueType> const& quotient_mdp,
             uint64_t hole_count,
-            std::vector<std::set<uint64_t>> const& mdp_holes,
+            Coloring const& coloring,
             std::vector<std::shared_ptr<storm::logic::Formula const>> const& formulae
             );
 
@@ -121,8 +124,8 @@ namespace synthesis {
         storm::models::sparse::Mdp<ValueType> const& quotient_mdp;
         // Number of significant holes
         uint64_t hole_count;
-        // Significant holes in MDP states
-        std::vector<std::set<uint64_t>> mdp_holes;
+        // Significant holes in MDP states (owned by the coloring)
+        std::vector<storm::storage::BitVector> const& mdp_holes;
 
         // Formula bounds: safety (<,<=) or liveness (>,>=)
         std::vector<bool> formula_safety;
@@ -42,9 +42,9 @@ template <typename ValueType, typename StateType>
 CounterexampleGeneratorMdp<ValueType,StateType>::CounterexampleGeneratorMdp (
     storm::models::sparse::Mdp<ValueType> const& quotient_mdp,
     uint64_t hole_count,
-    std::vector<std::set<uint64_t>> const& quotient_holes,
+    Coloring const& coloring,
     std::vector<std::shared_ptr<storm::logic::Formula const>> const& formulae
-    ) : quotient_mdp(quotient_mdp), hole_count(hole_count), quotient_holes(quotient_holes) {
+    ) : quotient_mdp(quotient_mdp), hole_count(hole_count), quotient_holes(coloring.getStateToHoles()) {
 
     // create label formulae for our own labels
     std::shared_ptr<storm::logic::Formula const> const& target_label_formula = std::make_shared<storm::logic::AtomicLabelFormula>(this->target_label);
@@ -134,7 +134,7 @@ void CounterexampleGeneratorMdp<ValueType,StateType>::prepareMdp(
     this->wave_states.clear();
     this->state_horizon_blocking.clear();
     this->unregistered_holes_count = std::vector<uint64_t>(mdp_states);
-    this->mdp_holes = std::vector<std::set<uint64_t>>(mdp_states);
+    this->mdp_holes = std::vector<storm::storage::BitVector const*>(mdp_states);
     this->current_wave = 0;
     this->reachable_flag = storm::storage::BitVector(mdp_states, false);
     this->blocking_candidate_set = false;
@@ -145,8 +145,8 @@ void CounterexampleGeneratorMdp<ValueType,StateType>::prepareMdp(
 
     // Associate states of a MDP with relevant holes and store their count
     for(StateType state = 0; state < mdp_states; state++) {
-        this->mdp_holes[state] = this->quotient_holes[state_map[state]];
-        for(uint64_t hole : this->mdp_holes[state]) {
+        this->mdp_holes[state] = &this->quotient_holes[state_map[state]];
+        for(uint64_t hole : *this->mdp_holes[state]) {
             // Hole is unregistered
             if(this->hole_wave[hole] == 0) {
                 unregistered_holes_count[state]++;
@@ -220,7 +220,7 @@ bool CounterexampleGeneratorMdp<ValueType,StateType>::exploreWave () {
     blocking_candidate_set = false;
 
     // Register all unregistered holes of this blocking state
-    for(uint64_t hole: mdp_holes[blocking_candidate]) {
+    for(uint64_t hole: *mdp_holes[blocking_candidate]) {
         if(this->hole_wave[hole] == 0) {
             hole_wave[hole] = current_wave;
             // std::cout << "[storm] hole " << hole << " expanded in wave " << current_wave << std::endl;
@@ -230,7 +230,7 @@ bool CounterexampleGeneratorMdp<ValueType,StateType>::exploreWave () {
     // Recompute number of unregistered holes in each state
     for(StateType state = 0; state < mdp_states; state++) {
         unregistered_holes_count[state] = 0;
-        for(uint64_t hole: mdp_holes[state]) {
+        for(uint64_t hole: *mdp_holes[state]) {
             if(this->hole_wave[hole] == 0) {
                 unregistered_holes_count[state]++;
             }
@@ -10,6 +10,8 @@
 
 #include <stack>
 
+#include "src/synthesis/quotient/Coloring.h"
+
 namespace synthesis {
 
 template<typename ValueType = double, typename StateType = uint64_t>
@@ -25,15 +27,16 @@ public:
      * deterministic sub-MDPs (DTMCs).
      * @param quotient_mdp The quotient MDP.
      * @param hole_count Total number of holes.
-     * @param mdp_holes For each state of a quotient MDP, a set of
-     *   indices of significant holes.
+     * @param coloring Coloring of the quotient MDP, its state-to-holes
+     *   mapping identifies significant holes of each state; the coloring
+     *   must outlive the generator.
      * @param formulae Formulae to check, can be both
      *   probabilistic and reward-based.
      */
     CounterexampleGeneratorMdp(
         storm::models::sparse::Mdp<ValueType> const& quotient_mdp,
         uint64_t hole_count,
-        std::vector<std::set<uint64_t>> const& quotient_holes,
+        Coloring const& coloring,
         std::vector<std::shared_ptr<storm::logic::Formula const>> const& formulae
         );
 
@@ -132,8 +135,8 @@ protected:
     storm::models::sparse::Mdp<ValueType> const& quotient_mdp;
     // Number of significant holes
     uint64_t hole_count;
-    // Significant holes in Quotient states
-    std::vector<std::set<uint64_t>> quotient_holes;
+    // Significant holes in Quotient states (owned by the coloring)
+    std::vector<storm::storage::BitVector> const& quotient_holes;
     
 
     // Formula bounds: safety (<,<=) or liveness (>,>=)
@@ -168,7 +171,7 @@ protected:
     // horizon containing, for a current wave, only blocking states
     std::vector<StateType> state_horizon_blocking;
     // relevant holes
-    std::vector<std::set<uint64_t>> mdp_holes;
+    std::vector<storm::storage::BitVector const*> mdp_holes;
     // relevant holes count
     std::vector<uint64_t> unregistered_holes_count;
     // true if the state was reached during exploration (expanded states + both horizons)
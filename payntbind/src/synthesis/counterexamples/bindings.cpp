@@ -9,10 +9,12 @@ void bindings_counterexamples(py::module& m) {
         .def(
             py::init<
                 storm::models::sparse::Mdp<double> const&, uint64_t,
-                std::vector<std::set<uint64_t>> const&,
+                synthesis::Coloring const&,
                 std::vector<std::shared_ptr<storm::logic::Formula const>> const&
             >(),
-            py::arg("quotient_mdp"), py::arg("hole_count"), py::arg("mdp_holes"), py::arg("formulae")
+            py::arg("quotient_mdp"), py::arg("hole_count"), py::arg("coloring"), py::arg("formulae"),
+            // the generator refers to the state-to-holes mapping of the coloring
+            py::keep_alive<1,4>()
         )
         .def("prepare_dtmc", &synthesis::CounterexampleGenerator<>::prepareDtmc, py::arg("dtmc"), py::arg("quotient_state_map"))
         .def(
@@ -28,10 +30,12 @@ void bindings_counterexamples(py::module& m) {
         .def(
             py::init<
                 storm::models::sparse::Mdp<double> const&, uint64_t,
-                std::vector<std::set<uint64_t>> const&,
+                synthesis::Coloring const&,
                 std::vector<std::shared_ptr<storm::logic::Formula const>> const&
             >(),
-            py::arg("quotient_mdp"), py::arg("hole_count"), py::arg("mdp_holes"), py::arg("formulae")
+            py::arg("quotient_mdp"), py::arg("hole_count"), py::arg("coloring"), py::arg("formulae"),
+            // the generator refers to the state-to-holes mapping of the coloring
+            py::keep_alive<1,4>()
         )
         .def("prepare_mdp", &synthesis::CounterexampleGeneratorMdp<>::prepareMdp)
         .def("construct_conflict", &synthesis::CounterexampleGeneratorMdp<>::constructConflict)
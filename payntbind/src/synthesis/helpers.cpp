@@ -14,6 +14,10 @@
 #include <storm/environment/solver/MinMaxSolverEnvironment.h>
 #include <storm/storage/SparseMatrix.h>
 #include <storm/models/sparse/Model.h>
+#include <storm/models/sparse/StandardRewardModel.h>
+#include <storm/modelchecker/results/ExplicitQuantitativeCheckResult.h>
+
+#include <pybind11/numpy.h>
 
 #include <storm/storage/jani/TemplateEdge.h>
 
@@ -49,6 +53,25 @@ bool janiTemplateEdgeAddTransientAssignment(storm::jani::TemplateEdge & template
     return template_edge.addTransientAssignment(assignment,add_to_existing);
 }
 
+/** Move the vector into a numpy array without copying its contents. */
+template<typename ValueType>
+py::array_t<ValueType> vectorToArray(std::vector<ValueType>&& vector) {
+    auto data = new std::vector<ValueType>(std::move(vector));
+    py::capsule owner(data, [](void *pointer) { delete reinterpret_cast<std::vector<ValueType>*>(pointer); });
+    return py::array_t<ValueType>(data->size(), data->data(), owner);
+}
+
+/**
+ * View the vector as a read-only numpy array without copying its contents. The array keeps a reference to the owner,
+ * i.e. to the Python object owning the vector, so the vector outlives the array.
+ */
+template<typename ValueType>
+py::array_t<ValueType> vectorView(std::vector<ValueType> const& vector, py::handle owner) {
+    py::array_t<ValueType> array(vector.size(), vector.data(), owner);
+    array.attr("setflags")(py::arg("write") = false);
+    return array;
+}
+
 void janiTemplateEdgeAddAssignments(storm::jani::TemplateEdge & template_edge, storm::jani::OrderedAssignments const& assignments) {
     for(auto const& assignment: assignments) {
         template_edge.addTransientAssignment(assignment);
@@ -85,6 +108,27 @@ void define_helpers(py::module& m) {
         return result;
     }, py::arg("matrix"), py::arg("vector"));
 
+    // numpy variants of the helpers above, used for vectorized computations over large models
+    m.def("multiply_with_vector_array", [] (
+        storm::storage::SparseMatrix<double> const& matrix,
+        py::array_t<double, py::array::c_style | py::array::forcecast> vector
+    ) {
+        // Storm multiplies std::vectors only, so the input is copied once in bulk; the result is moved into numpy
+        std::vector<double> input(vector.data(), vector.data()+vector.size());
+        std::vector<double> result(matrix.getRowCount());
+        matrix.multiplyWithVector(input, result);
+        return synthesis::vectorToArray(std::move(result));
+    }, py::arg("matrix"), py::arg("vector"));
+    // the following return read-only views of vectors stored in Storm objects, the views keep the objects alive
+    m.def("state_action_rewards_array", [] (py::object reward_model_object) {
+        auto const& reward_model = reward_model_object.cast<storm::models::sparse::StandardRewardModel<double> const&>();
+        return synthesis::vectorView(reward_model.getStateActionRewardVector(), reward_model_object);
+    }, py::arg("reward_model"));
+    m.def("check_result_values_array", [] (py::object result_object) {
+        auto const& result = result_object.cast<storm::modelchecker::ExplicitQuantitativeCheckResult<double> const&>();
+        return synthesis::vectorView(result.getValueVector(), result_object);
+    }, py::arg("result"));
+
     m.def("janiTemplateEdgeAddAssignments", &synthesis::janiTemplateEdgeAddAssignments, py::arg("template_edge"), py::arg("assignments"));
 }
 
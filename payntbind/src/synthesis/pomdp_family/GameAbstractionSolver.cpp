@@ -11,8 +11,11 @@
 #include <storm/models/sparse/Smg.h>
 #include <storm/solver/GameSolver.h>
 #include <storm/storage/PlayerIndex.h>
+#include <storm/storage/Scheduler.h>
 #include <storm/utility/builder.h>
 
+#include <algorithm>
+#include <iterator>
 #include <queue>
 
 namespace synthesis {
@@ -79,7 +82,19 @@ namespace synthesis {
 
 
     template<typename ValueType>
-    void GameAbstractionSolver<ValueType>::solveSg(storm::storage::BitVector const& quotient_choice_mask) {
+    std::shared_ptr<GameSolution> GameAbstractionSolver<ValueType>::solution() const {
+        auto solution = std::make_shared<GameSolution>();
+        solution->state_to_player1_action = this->solution_state_to_player1_action;
+        solution->state_to_quotient_choice = this->solution_state_to_quotient_choice;
+        return solution;
+    }
+
+
+    template<typename ValueType>
+    void GameAbstractionSolver<ValueType>::solveSg(
+        storm::storage::BitVector const& quotient_choice_mask,
+        std::shared_ptr<GameSolution const> hint
+    ) {
         if(profiling_enabled) {
             this->timer_total.start();
         }
@@ -103,10 +118,12 @@ namespace synthesis {
             unexplored_states.pop();
             uint64_t player1_state = state_to_player1_state.translate(state);
             player1_state_to_actions.resize(state_to_player1_state.numTranslations());
-            for(uint64_t choice = quotient_row_group_indices[state]; choice < quotient_row_group_indices[state+1]; choice++) {
-                if(not quotient_choice_mask[choice]) {
-                    continue;
-                }
+            // visit only the choices that remained in the sub-MDP
+            uint64_t row_group_end = quotient_row_group_indices[state+1];
+            for(
+                uint64_t choice = quotient_choice_mask.getNextSetIndex(quotient_row_group_indices[state]);
+                choice < row_group_end; choice = quotient_choice_mask.getNextSetIndex(choice+1)
+            ) {
                 uint64_t action = choice_to_action[choice];
                 player1_state_to_actions[player1_state].insert(action);
                 uint64_t player2_state = state_action_to_player2_state.translate(state,action);
@@ -192,7 +209,44 @@ namespace synthesis {
         solver->setTrackSchedulers(true);
         auto player1_direction = this->getOptimizationDirection(this->player1_maximizing);
         auto player2_direction = this->getOptimizationDirection(not this->player1_maximizing);
+        // the values are not seeded from the hint: in the presence of end components with zero reward, values of the
+        // super-game are not guaranteed to lie on the correct side of the fixed point of the sub-game, and value
+        // iteration started from them may converge to a wrong fixed point
         std::vector<double> player1_state_values(player1_num_states,0);
+        if(hint != nullptr) {
+            // initial policies of both players: the hinted choice if it remained in the sub-game, the first one otherwise
+            storm::storage::Scheduler<ValueType> player1_hint(player1_num_states);
+            storm::storage::Scheduler<ValueType> player2_hint(player2_num_states);
+            for(uint64_t player1_state=0; player1_state<player1_num_states; player1_state++) {
+                player1_hint.setChoice(storm::storage::SchedulerChoice<ValueType>(0),player1_state);
+            }
+            for(uint64_t player2_state=0; player2_state<player2_num_states; player2_state++) {
+                player2_hint.setChoice(storm::storage::SchedulerChoice<ValueType>(0),player2_state);
+            }
+            for(uint64_t player1_state=0; player1_state<player1_num_states-1; player1_state++) {
+                uint64_t state = state_to_player1_state.retrieve(player1_state);
+                auto const& actions = player1_state_to_actions[player1_state];
+                auto action_it = actions.find(hint->state_to_player1_action[state]);
+                if(action_it == actions.end()) {
+                    continue;
+                }
+                player1_hint.setChoice(
+                    storm::storage::SchedulerChoice<ValueType>(std::distance(actions.begin(),action_it)),player1_state
+                );
+                if(this->state_is_target[state]) {
+                    continue;
+                }
+                uint64_t player2_state = state_action_to_player2_state.translate(state,*action_it);
+                auto const& choices = player2_state_to_choices[player2_state];
+                auto choice_it = std::find(choices.begin(),choices.end(),hint->state_to_quotient_choice[state]);
+                if(choice_it != choices.end()) {
+                    player2_hint.setChoice(
+                        storm::storage::SchedulerChoice<ValueType>(std::distance(choices.begin(),choice_it)),player2_state
+                    );
+                }
+            }
+            solver->setSchedulerHints(std::move(player1_hint),std::move(player2_hint));
+        }
         if(profiling_enabled) {
             this->timer_game_solving.start();
         }
@@ -7,6 +7,15 @@
 
 namespace synthesis {
 
+    /**
+     * Strategies of a game abstraction, mapped to the states of the quotient. State values are deliberately not kept:
+     * values of a super-game are not a sound initial guess for a sub-game (see solveSg).
+     */
+    struct GameSolution {
+        std::vector<uint64_t> state_to_player1_action;
+        std::vector<uint64_t> state_to_quotient_choice;
+    };
+
     template<typename ValueType>
     class GameAbstractionSolver {
 
@@ -45,8 +54,14 @@ namespace synthesis {
         /**
          * Solve the game induced by the sub-MDP.
          * @param quotient_choice_mask Choices of the quotient that remained in the sub-MDP.
+         * @param hint If not null, solution of a game of a super-MDP (e.g. of the parent family): its strategies of
+         *  both players are used as the initial policies of policy iteration. Only choices that remained in the
+         *  sub-MDP are taken from the hint. Values are always solved from zero.
          */
-        void solveSg(storm::storage::BitVector const& quotient_choice_mask);
+        void solveSg(
+            storm::storage::BitVector const& quotient_choice_mask,
+            std::shared_ptr<GameSolution const> hint = nullptr
+        );
         void solveSmg(storm::storage::BitVector const& quotient_choice_mask);
 
         /** For each state, the value of the game. */
@@ -65,6 +80,9 @@ namespace synthesis {
          */
         std::vector<uint64_t> solution_state_to_quotient_choice;
 
+        /** Copy of the current solution, can be used as a hint for solving the games of sub-MDPs. */
+        std::shared_ptr<GameSolution> solution() const;
+
         // Profiling
         void enableProfiling(bool enable);
         void printProfiling();
@@ -33,6 +33,8 @@ void bindings_pomdp_family(py::module& m) {
         ;
 
     // m.def("randomize_action_variant", &synthesis::randomizeActionVariant<double>);
+    py::class_<synthesis::GameSolution, std::shared_ptr<synthesis::GameSolution>>(m, "GameSolution");
+
     py::class_<synthesis::GameAbstractionSolver<double>>(m, "GameAbstractionSolver")
         .def(
             py::init<
@@ -46,12 +48,13 @@ void bindings_pomdp_family(py::module& m) {
             >(),
             py::arg("quotient"), py::arg("num_actions"), py::arg("choice_to_action"), py::arg("formula"), py::arg("player1_maximizing"), py::arg("target_label"), py::arg("precision")
         )
-        .def("solve_sg", &synthesis::GameAbstractionSolver<double>::solveSg)
+        .def("solve_sg", &synthesis::GameAbstractionSolver<double>::solveSg, py::arg("quotient_choice_mask"), py::arg("hint") = nullptr)
         .def("solve_smg", &synthesis::GameAbstractionSolver<double>::solveSmg)
         .def_property_readonly("solution_state_values", [](synthesis::GameAbstractionSolver<double>& solver) {return solver.solution_state_values;})
         .def_property_readonly("solution_value", [](synthesis::GameAbstractionSolver<double>& solver) {return solver.solution_value;})
         .def_property_readonly("solution_state_to_player1_action", [](synthesis::GameAbstractionSolver<double>& solver) {return solver.solution_state_to_player1_action;})
         .def_property_readonly("solution_state_to_quotient_choice", [](synthesis::GameAbstractionSolver<double>& solver) {return solver.solution_state_to_quotient_choice;})
+        .def("solution", &synthesis::GameAbstractionSolver<double>::solution)
         .def("enable_profiling", &synthesis::GameAbstractionSolver<double>::enableProfiling)
         .def("print_profiling", &synthesis::GameAbstractionSolver<double>::printProfiling)
         ;
@@ -51,6 +51,22 @@ std::vector<BitVector> const& Coloring::getStateToHoles() const {
     return state_to_holes;
 }
 
+std::vector<std::vector<std::vector<uint64_t>>> const& Coloring::getHoleOptionToChoices() const {
+    if(not hole_option_to_choices.empty() or family.numHoles() == 0) {
+        return hole_option_to_choices;
+    }
+    hole_option_to_choices.resize(family.numHoles());
+    for(uint64_t hole = 0; hole < family.numHoles(); ++hole) {
+        hole_option_to_choices[hole].resize(family.holeNumOptionsTotal(hole));
+    }
+    for(uint64_t choice = 0; choice < numChoices(); ++choice) {
+        for(auto const& [hole,option]: choice_to_assignment[choice]) {
+            hole_option_to_choices[hole][option].push_back(choice);
+        }
+    }
+    return hole_option_to_choices;
+}
+
 BitVector Coloring::selectCompatibleChoices(Family const& subfamily) const {
     auto selection = BitVector(uncolored_choices);
     for(auto choice: colored_choices) {
@@ -61,6 +77,16 @@ BitVector Coloring::selectCompatibleChoices(Family const& subfamily) const {
     return selection;
 }
 
+BitVector Coloring::selectCompatibleChoices(Family const& subfamily, BitVector const& base_choices) const {
+    auto selection = uncolored_choices & base_choices;
+    for(auto choice: colored_choices & base_choices) {
+        if(subfamily.includesAssignment(choice_to_assignment[choice])) {
+            selection.set(choice,true);
+        }
+    }
+    return selection;
+}
+
 
 
 std::vector<BitVector> Coloring::collectHoleOptionsMask(BitVector const& choices) const {
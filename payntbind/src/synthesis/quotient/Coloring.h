@@ -25,9 +25,13 @@ public:
     std::vector<std::vector<std::pair<uint64_t,uint64_t>>> const& getChoiceToAssignment() const;
     /** Get a mapping from states to holes involved in its choices. */
     std::vector<BitVector> const& getStateToHoles() const;
+    /** Get a mapping from hole-option pairs to choices labeled by them; computed on the first call. */
+    std::vector<std::vector<std::vector<uint64_t>>> const& getHoleOptionToChoices() const;
     
     /** Get a mask of choices compatible with the family. */
     BitVector selectCompatibleChoices(Family const& subfamily) const;
+    /** Get a mask of choices compatible with the family, considering only the base choices. */
+    BitVector selectCompatibleChoices(Family const& subfamily, BitVector const& base_choices) const;
     /** For each hole, collect options (colors) involved in any of the given choices. */
     std::vector<std::vector<uint64_t>> collectHoleOptions(BitVector const& choices) const;
     
@@ -46,6 +50,9 @@ protected:
     /** For each state, identification of holes associated with its choices. */
     std::vector<BitVector> state_to_holes;
 
+    /** For each hole and each of its options, a list of choices labeled by this hole-option pair. */
+    mutable std::vector<std::vector<std::vector<uint64_t>>> hole_option_to_choices;
+
     /** Choices not labeled by any hole. */
     BitVector uncolored_choices;
     /** Choices labeled by some hole. */
@@ -0,0 +1,83 @@
+#include "CsrExport.h"
+
+namespace synthesis {
+
+    std::tuple<uint64_t,uint64_t,uint64_t> matrixCsrSize(storm::storage::SparseMatrix<double> const& matrix) {
+        return std::make_tuple(matrix.getRowGroupCount(), matrix.getRowCount(), matrix.getEntryCount());
+    }
+
+    void matrixToCsr(
+        storm::storage::SparseMatrix<double> const& matrix,
+        uint64_t *row_group_indices, uint64_t *row_indications, uint64_t *columns, double *values
+    ) {
+        auto const& matrix_row_groups = matrix.getRowGroupIndices();
+        for(uint64_t group = 0; group < matrix_row_groups.size(); ++group) {
+            row_group_indices[group] = matrix_row_groups[group];
+        }
+        uint64_t entry_index = 0;
+        for(uint64_t row = 0; row < matrix.getRowCount(); ++row) {
+            row_indications[row] = entry_index;
+            for(auto const& entry: matrix.getRow(row)) {
+                columns[entry_index] = entry.getColumn();
+                values[entry_index] = entry.getValue();
+                entry_index++;
+            }
+        }
+        row_indications[matrix.getRowCount()] = entry_index;
+    }
+
+    storm::storage::SparseMatrix<double> matrixFromCsr(
+        uint64_t num_row_groups, uint64_t num_rows, uint64_t num_entries,
+        uint64_t const* row_group_indices, uint64_t const* row_indications,
+        uint64_t const* columns, double const* values
+    ) {
+        storm::storage::SparseMatrixBuilder<double> builder(
+            num_rows, num_row_groups, num_entries, true, true, num_row_groups
+        );
+        for(uint64_t group = 0; group < num_row_groups; ++group) {
+            builder.newRowGroup(row_group_indices[group]);
+            for(uint64_t row = row_group_indices[group]; row < row_group_indices[group+1]; ++row) {
+                for(uint64_t entry_index = row_indications[row]; entry_index < row_indications[row+1]; ++entry_index) {
+                    builder.addNextValue(row, columns[entry_index], values[entry_index]);
+                }
+            }
+        }
+        return builder.build();
+    }
+
+    uint64_t coloringCsrSize(Coloring const& coloring) {
+        uint64_t size = 0;
+        for(auto const& assignment: coloring.getChoiceToAssignment()) {
+            size += assignment.size();
+        }
+        return size;
+    }
+
+    void coloringToCsr(Coloring const& coloring, uint64_t *choice_offsets, uint64_t *holes, uint64_t *options) {
+        auto const& choice_to_assignment = coloring.getChoiceToAssignment();
+        uint64_t index = 0;
+        for(uint64_t choice = 0; choice < choice_to_assignment.size(); ++choice) {
+            choice_offsets[choice] = index;
+            for(auto const& [hole,option]: choice_to_assignment[choice]) {
+                holes[index] = hole;
+                options[index] = option;
+                index++;
+            }
+        }
+        choice_offsets[choice_to_assignment.size()] = index;
+    }
+
+    std::vector<std::vector<std::pair<uint64_t,uint64_t>>> choiceToAssignmentFromCsr(
+        uint64_t num_choices, uint64_t const* choice_offsets, uint64_t const* holes, uint64_t const* options
+    ) {
+        std::vector<std::vector<std::pair<uint64_t,uint64_t>>> choice_to_assignment(num_choices);
+        for(uint64_t choice = 0; choice < num_choices; ++choice) {
+            choice_to_assignment[choice].reserve(choice_offsets[choice+1]-choice_offsets[choice]);
+            for(uint64_t index = choice_offsets[choice]; index < choice_offsets[choice+1]; ++index) {
+                choice_to_assignment[choice].push_back(std::make_pair(holes[index],options[index]));
+            }
+        }
+        return choice_to_assignment;
+    }
+
+}
@@ -0,0 +1,56 @@
+#pragma once
+
+#include "src/synthesis/quotient/Coloring.h"
+
+#include <storm/storage/SparseMatrix.h>
+
+#include <cstdint>
+#include <tuple>
+#include <vector>
+
+namespace synthesis {
+
+    /*
+     * Helpers to move the quotient into flat (CSR) buffers and back. The buffers are allocated by the caller
+     * (e.g. to be written to a file), so that the quotient can be reconstructed without the sketch.
+     */
+
+    /** Number of row groups, rows and entries of the matrix. */
+    std::tuple<uint64_t,uint64_t,uint64_t> matrixCsrSize(storm::storage::SparseMatrix<double> const& matrix);
+
+    /**
+     * Write the matrix into CSR buffers.
+     * @param row_group_indices (output) num_row_groups+1 items
+     * @param row_indications (output) num_rows+1 items
+     * @param columns (output) num_entries items
+     * @param values (output) num_entries items
+     */
+    void matrixToCsr(
+        storm::storage::SparseMatrix<double> const& matrix,
+        uint64_t *row_group_indices, uint64_t *row_indications, uint64_t *columns, double *values
+    );
+
+    /** Construct the matrix from CSR buffers created by matrixToCsr. */
+    storm::storage::SparseMatrix<double> matrixFromCsr(
+        uint64_t num_row_groups, uint64_t num_rows, uint64_t num_entries,
+        uint64_t const* row_group_indices, uint64_t const* row_indications,
+        uint64_t const* columns, double const* values
+    );
+
+    /** Total number of hole-option pairs in the choice-to-assignment mapping. */
+    uint64_t coloringCsrSize(Coloring const& coloring);
+
+    /**
+     * Write the choice-to-assignment mapping into CSR buffers.
+     * @param choice_offsets (output) num_choices+1 items
+     * @param holes (output) coloringCsrSize() items
+     * @param options (output) coloringCsrSize() items
+     */
+    void coloringToCsr(Coloring const& coloring, uint64_t *choice_offsets, uint64_t *holes, uint64_t *options);
+
+    /** Construct the choice-to-assignment mapping from CSR buffers created by coloringToCsr. */
+    std::vector<std::vector<std::pair<uint64_t,uint64_t>>> choiceToAssignmentFromCsr(
+        uint64_t num_choices, uint64_t const* choice_offsets, uint64_t const* holes, uint64_t const* options
+    );
+
+}
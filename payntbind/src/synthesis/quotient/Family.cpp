@@ -1,5 +1,8 @@
 #include "Coloring.h"
 
+#include <storm/exceptions/InvalidArgumentException.h>
+#include <storm/utility/macros.h>
+
 #include <iostream>
 
 
@@ -131,6 +134,49 @@ std::vector<BitVector>::iterator Family::end() {
 }
 
 
+std::string Family::toBytes() const {
+    uint64_t num_bits = 0;
+    for(uint64_t hole = 0; hole < numHoles(); ++hole) {
+        num_bits += holeNumOptionsTotal(hole);
+    }
+    std::string bytes((num_bits+7)/8, 0);
+    uint64_t offset = 0;
+    for(uint64_t hole = 0; hole < numHoles(); ++hole) {
+        for(auto option: hole_options[hole]) {
+            uint64_t bit = offset+option;
+            bytes[bit/8] |= (char)(1 << (bit%8));
+        }
+        offset += holeNumOptionsTotal(hole);
+    }
+    return bytes;
+}
+
+void Family::fromBytes(std::string const& bytes) {
+    uint64_t num_bits = 0;
+    for(uint64_t hole = 0; hole < numHoles(); ++hole) {
+        num_bits += holeNumOptionsTotal(hole);
+    }
+    STORM_LOG_THROW(
+        bytes.size() == (num_bits+7)/8, storm::exceptions::InvalidArgumentException,
+        "Size of the serialized family does not match the number of hole options."
+    );
+    uint64_t offset = 0;
+    for(uint64_t hole = 0; hole < numHoles(); ++hole) {
+        uint64_t num_options = holeNumOptionsTotal(hole);
+        hole_options_mask[hole].clear();
+        hole_options[hole].clear();
+        for(uint64_t option = 0; option < num_options; ++option) {
+            uint64_t bit = offset+option;
+            if((bytes[bit/8] >> (bit%8)) & 1) {
+                hole_options_mask[hole].set(option);
+                hole_options[hole].push_back(option);
+            }
+        }
+        offset += num_options;
+    }
+}
+
+
 void Family::setChoices(BitVector const& choices) {
     this->choices = BitVector(choices);
 }
@@ -5,6 +5,7 @@
 #include <cstdint>
 #include <vector>
 #include <map>
+#include <string>
 
 namespace synthesis {
 
@@ -42,6 +43,16 @@ public:
     std::vector<BitVector>::iterator begin();
     std::vector<BitVector>::iterator end();
 
+    /**
+     * Serialize hole options into a packed bit array: for each hole, holeNumOptionsTotal(hole) bits, one per option,
+     * are stored consecutively; the resulting bit string is padded to whole bytes.
+     */
+    std::string toBytes() const;
+    /**
+     * Set hole options from a bit array created by toBytes() of a family with the same holes.
+     */
+    void fromBytes(std::string const& bytes);
+
     // choice operations
     void setChoices(BitVector const& choices);
     void setChoices(BitVector&& choices);
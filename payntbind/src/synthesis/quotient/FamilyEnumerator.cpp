@@ -0,0 +1,209 @@
+#include "FamilyEnumerator.h"
+
+#include <storm/exceptions/InvalidOperationException.h>
+#include <storm/utility/macros.h>
+
+#include <algorithm>
+#include <tuple>
+
+namespace synthesis {
+
+FamilyEnumerator::FamilyEnumerator(Family const& family) {
+    for(uint64_t hole = 0; hole < family.numHoles(); ++hole) {
+        hole_num_options.push_back(family.holeNumOptionsTotal(hole));
+    }
+    hole_watches.resize(family.numHoles());
+}
+
+uint64_t FamilyEnumerator::numClauses() const {
+    return clauses.size();
+}
+
+void FamilyEnumerator::addClause(std::vector<Literal>&& literals) {
+    std::vector<Literal> clause;
+    for(Literal& literal: literals) {
+        if(not literal.options.empty()) {
+            clause.push_back(std::move(literal));
+        }
+    }
+    uint64_t clause_index = clauses.size();
+    if(clause.size() <= 1) {
+        short_clauses.push_back(clause_index);
+        clause_watches.emplace_back(0,0);
+    } else {
+        clause_watches.emplace_back(0,1);
+        hole_watches[clause[0].hole].push_back(clause_index);
+        hole_watches[clause[1].hole].push_back(clause_index);
+    }
+    clauses.push_back(std::move(clause));
+}
+
+void FamilyEnumerator::excludeConflict(
+    Family const& family, Family const& assignment, std::vector<uint64_t> const& conflict
+) {
+    BitVector in_conflict(family.numHoles(),false);
+    for(uint64_t hole: conflict) {
+        in_conflict.set(hole);
+    }
+    std::vector<Literal> literals;
+    for(uint64_t hole = 0; hole < family.numHoles(); ++hole) {
+        if(in_conflict[hole]) {
+            // the hole is assigned a different option
+            BitVector options(hole_num_options[hole],true);
+            options.set(assignment.holeOptions(hole)[0],false);
+            literals.push_back({hole,std::move(options)});
+        } else if(family.holeNumOptions(hole) < hole_num_options[hole]) {
+            // the hole is outside of the family
+            literals.push_back({hole,~family.holeOptionsMask(hole)});
+        }
+    }
+    addClause(std::move(literals));
+}
+
+void FamilyEnumerator::push() {
+    scopes.push_back(clauses.size());
+}
+
+void FamilyEnumerator::pop() {
+    STORM_LOG_THROW(not scopes.empty(), storm::exceptions::InvalidOperationException, "no scope to pop");
+    uint64_t num_clauses = scopes.back();
+    scopes.pop_back();
+    clauses.erase(clauses.begin()+num_clauses, clauses.end());
+    clause_watches.erase(clause_watches.begin()+num_clauses, clause_watches.end());
+    auto removed = [num_clauses](uint64_t clause_index) { return clause_index >= num_clauses; };
+    short_clauses.erase(std::remove_if(short_clauses.begin(), short_clauses.end(), removed), short_clauses.end());
+    for(std::vector<uint64_t>& watches: hole_watches) {
+        watches.erase(std::remove_if(watches.begin(), watches.end(), removed), watches.end());
+    }
+}
+
+bool FamilyEnumerator::isFalsified(Literal const& literal) const {
+    return domains[literal.hole].isDisjointFrom(literal.options);
+}
+
+bool FamilyEnumerator::restrict(uint64_t hole, BitVector const& mask) {
+    if(domains[hole].isSubsetOf(mask)) {
+        return true;
+    }
+    BitVector restricted = domains[hole] & mask;
+    if(restricted.empty()) {
+        return false;
+    }
+    trail.emplace_back(hole,std::move(domains[hole]));
+    domains[hole] = std::move(restricted);
+    propagation_queue.push_back(hole);
+    return true;
+}
+
+void FamilyEnumerator::backtrack(uint64_t trail_size) {
+    while(trail.size() > trail_size) {
+        auto& [hole,domain] = trail.back();
+        domains[hole] = std::move(domain);
+        trail.pop_back();
+    }
+    propagation_queue.clear();
+}
+
+bool FamilyEnumerator::propagate() {
+    while(not propagation_queue.empty()) {
+        uint64_t hole = propagation_queue.back();
+        propagation_queue.pop_back();
+        std::vector<uint64_t>& watches = hole_watches[hole];
+        uint64_t index = 0;
+        while(index < watches.size()) {
+            uint64_t clause_index = watches[index];
+            std::vector<Literal> const& clause = clauses[clause_index];
+            auto& [watch,other] = clause_watches[clause_index];
+            if(clause[watch].hole != hole) {
+                std::swap(watch,other);
+            }
+            if(not isFalsified(clause[watch])) {
+                index++;
+                continue;
+            }
+            // find a replacement for the falsified watch, the literal is over a different hole
+            bool replaced = false;
+            for(uint64_t literal = 0; literal < clause.size(); ++literal) {
+                if(literal == watch or literal == other or isFalsified(clause[literal])) {
+                    continue;
+                }
+                watch = literal;
+                hole_watches[clause[literal].hole].push_back(clause_index);
+                watches[index] = watches.back();
+                watches.pop_back();
+                replaced = true;
+                break;
+            }
+            if(replaced) {
+                continue;
+            }
+            // the clause is unit: the other watch must be satisfied
+            if(not restrict(clause[other].hole, clause[other].options)) {
+                return false;
+            }
+            index++;
+        }
+    }
+    return true;
+}
+
+std::optional<std::vector<uint64_t>> FamilyEnumerator::pickAssignment(Family const& family) {
+    uint64_t num_holes = hole_num_options.size();
+    domains.clear();
+    trail.clear();
+    propagation_queue.clear();
+    for(uint64_t hole = 0; hole < num_holes; ++hole) {
+        domains.push_back(family.holeOptionsMask(hole));
+        // watched literals over the holes restricted by the family might be falsified
+        if(family.holeNumOptions(hole) < hole_num_options[hole]) {
+            propagation_queue.push_back(hole);
+        }
+    }
+    for(uint64_t clause_index: short_clauses) {
+        std::vector<Literal> const& clause = clauses[clause_index];
+        if(clause.empty() or not restrict(clause[0].hole, clause[0].options)) {
+            return std::nullopt;
+        }
+    }
+
+    // decisions: the hole, its decided option and the size of the trail before the decision
+    std::vector<std::tuple<uint64_t,uint64_t,uint64_t>> decisions;
+    bool consistent = propagate();
+    while(true) {
+        if(not consistent) {
+            // undo the last decision and exclude its option
+            if(decisions.empty()) {
+                return std::nullopt;
+            }
+            auto [hole,option,trail_size] = decisions.back();
+            decisions.pop_back();
+            backtrack(trail_size);
+            BitVector mask(hole_num_options[hole],true);
+            mask.set(option,false);
+            consistent = restrict(hole,mask) and propagate();
+            continue;
+        }
+
+        // holes are decided in a fixed order, so the holes preceding the last decision are already fixed
+        uint64_t decision_hole = decisions.empty() ? 0 : std::get<0>(decisions.back());
+        while(decision_hole < num_holes and domains[decision_hole].getNumberOfSetBits() == 1) {
+            decision_hole++;
+        }
+        if(decision_hole == num_holes) {
+            break;
+        }
+        uint64_t option = domains[decision_hole].getNextSetIndex(0);
+        decisions.emplace_back(decision_hole,option,trail.size());
+        BitVector mask(hole_num_options[decision_hole],false);
+        mask.set(option);
+        consistent = restrict(decision_hole,mask) and propagate();
+    }
+
+    std::vector<uint64_t> assignment(num_holes);
+    for(uint64_t hole = 0; hole < num_holes; ++hole) {
+        assignment[hole] = domains[hole].getNextSetIndex(0);
+    }
+    return assignment;
+}
+
+}
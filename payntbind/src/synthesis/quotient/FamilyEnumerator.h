@@ -0,0 +1,90 @@
+#pragma once
+
+#include "src/synthesis/quotient/Family.h"
+
+#include <storm/storage/BitVector.h>
+
+#include <cstdint>
+#include <optional>
+#include <vector>
+
+namespace synthesis {
+
+using BitVector = storm::storage::BitVector;
+
+/**
+ * Enumerator of hole assignments of a design space that excludes learned conflicts. Each hole is one-hot encoded as
+ * a domain of its options, a clause is a disjunction of literals of the form "hole is assigned an option from the
+ * mask". Clauses are propagated using two watched literals and the assignments are enumerated via DPLL search with
+ * chronological backtracking. Clauses can be scoped using push/pop.
+ */
+class FamilyEnumerator {
+public:
+
+    /** Create an enumerator over the holes of the (unrefined) family. */
+    FamilyEnumerator(Family const& family);
+
+    /**
+     * Find an assignment of the family that satisfies all clauses.
+     * @return for each hole, its option, or nothing if no such assignment exists
+     */
+    std::optional<std::vector<uint64_t>> pickAssignment(Family const& family);
+
+    /**
+     * Add a clause excluding the members of the family that agree with the assignment on the conflicting holes.
+     * @param family base family
+     * @param assignment hole assignment that was found unsatisfiable
+     * @param conflict indices of the relevant holes
+     */
+    void excludeConflict(Family const& family, Family const& assignment, std::vector<uint64_t> const& conflict);
+
+    /** Open a new scope of clauses. */
+    void push();
+    /** Remove clauses added since the matching push. */
+    void pop();
+
+    /** Number of clauses currently stored. */
+    uint64_t numClauses() const;
+
+protected:
+
+    /** A literal is satisfied if the hole is assigned one of the options in the mask. */
+    struct Literal {
+        uint64_t hole;
+        BitVector options;
+    };
+
+    /** For each hole, the number of its options. */
+    std::vector<uint64_t> hole_num_options;
+
+    /** Clauses: disjunctions of literals, each hole appears in at most one literal of a clause. */
+    std::vector<std::vector<Literal>> clauses;
+    /** For each clause with at least two literals, indices of its two watched literals. */
+    std::vector<std::pair<uint64_t,uint64_t>> clause_watches;
+    /** For each hole, clauses watching a literal over this hole. */
+    std::vector<std::vector<uint64_t>> hole_watches;
+    /** Clauses with at most one literal, these are not watched. */
+    std::vector<uint64_t> short_clauses;
+    /** For each scope, the number of clauses at the time of the push. */
+    std::vector<uint64_t> scopes;
+
+    /** Current domain of each hole during the search. */
+    std::vector<BitVector> domains;
+    /** Trail of domain restrictions: the hole and its previous domain. */
+    std::vector<std::pair<uint64_t,BitVector>> trail;
+    /** Holes whose domains were restricted, but the clauses watching them were not yet visited. */
+    std::vector<uint64_t> propagation_queue;
+
+    /** Add a clause, literals with empty masks are dropped. */
+    void addClause(std::vector<Literal>&& literals);
+    /** Whether the literal cannot be satisfied within the current domains. */
+    bool isFalsified(Literal const& literal) const;
+    /** Intersect the domain of the hole with the mask. @return false if the domain became empty */
+    bool restrict(uint64_t hole, BitVector const& mask);
+    /** Undo restrictions until the trail has the given size. */
+    void backtrack(uint64_t trail_size);
+    /** Visit clauses watching the restricted holes. @return false if some clause is falsified */
+    bool propagate();
+};
+
+}
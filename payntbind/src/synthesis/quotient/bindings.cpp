@@ -2,8 +2,10 @@
 
 #include "JaniChoices.h"
 #include "Family.h"
+#include "FamilyEnumerator.h"
 #include "Coloring.h"
 #include "ColoringSmt.h"
+#include "CsrExport.h"
 #include "src/synthesis/translation/componentTranslations.h"
 
 #include <storm/storage/expressions/ExpressionManager.h>
@@ -23,6 +25,11 @@
 
 #include <z3++.h>
 
+#include <pybind11/numpy.h>
+
+#include <stdexcept>
+#include <string>
+
 namespace synthesis {
 
 template<typename ValueType>
@@ -191,6 +198,70 @@ std::map<uint64_t,double> computeInconsistentHoleVariance(
 }
 
 
+/**
+ * Compute hole scores for the posterior-unaware unfolding of a POMDP. In this unfolding, the k-th choice labeled
+ * by a hole-option pair corresponds to the k-th choice labeled by any other option of this hole, and the score of
+ * the hole is the average difference between the values of these corresponding choices, weighted by the expected
+ * number of visits of their source state.
+ */
+std::map<uint64_t,double> computeInconsistentHoleDifference(
+    Coloring const& coloring, uint64_t num_global_choices,
+    std::vector<uint64_t> const& row_groups, std::vector<uint64_t> const& choice_to_global_choice,
+    std::vector<double> const& choice_to_value,
+    std::map<uint64_t,std::vector<uint64_t>> const& hole_to_inconsistent_options,
+    std::vector<double> const& state_to_expected_visits
+) {
+    auto const& hole_option_to_choices = coloring.getHoleOptionToChoices();
+
+    // inverse of the choice map, choices not present in the sub-MDP are marked as invalid
+    uint64_t invalid_choice = choice_to_global_choice.size();
+    std::vector<uint64_t> global_choice_to_choice(num_global_choices, invalid_choice);
+    for(uint64_t choice = 0; choice < choice_to_global_choice.size(); ++choice) {
+        global_choice_to_choice[choice_to_global_choice[choice]] = choice;
+    }
+    std::vector<uint64_t> choice_to_state(choice_to_global_choice.size());
+    for(uint64_t state = 0; state < row_groups.size()-1; ++state) {
+        for(uint64_t choice = row_groups[state]; choice < row_groups[state+1]; ++choice) {
+            choice_to_state[choice] = state;
+        }
+    }
+
+    std::map<uint64_t,double> inconsistent_differences;
+    for(auto const& [hole,options]: hole_to_inconsistent_options) {
+        double difference_sum = 0;
+        uint64_t states_affected = 0;
+        auto const& choices_0 = hole_option_to_choices[hole][options[0]];
+        for(uint64_t index = 0; index < choices_0.size(); ++index) {
+            auto choice_0 = global_choice_to_choice[choices_0[index]];
+            if(choice_0 == invalid_choice) {
+                continue;
+            }
+            double visits = state_to_expected_visits[choice_to_state[choice_0]];
+            if(visits == 0) {
+                continue;
+            }
+            double min_value = choice_to_value[choice_0];
+            double max_value = min_value;
+            for(auto option: options) {
+                auto const& choices = hole_option_to_choices[hole][option];
+                STORM_LOG_ASSERT(choices.size() > index, "options of a hole are expected to label the same number of choices");
+                auto choice = global_choice_to_choice[choices[index]];
+                if(choice == invalid_choice) {
+                    continue;
+                }
+                double value = choice_to_value[choice];
+                min_value = std::min(min_value,value);
+                max_value = std::max(max_value,value);
+            }
+            difference_sum += (max_value-min_value)*visits;
+            states_affected++;
+        }
+        inconsistent_differences[hole] = states_affected == 0 ? 0 : difference_sum / states_affected;
+    }
+    return inconsistent_differences;
+}
+
+
 /*storm::storage::BitVector keepReachableChoices(
     storm::storage::BitVector enabled_choices, uint64_t initial_state,
     std::vector<uint64_t> const& row_groups, std::vector<std::vector<uint64_t>> const& choice_destinations
@@ -236,6 +307,28 @@ storm::storage::BitVector policyToChoicesForFamily(
     return choices & family_choices;
 }
 
+storm::storage::BitVector quotientChoicesToSubmodelChoices(
+    storm::storage::BitVector const& quotient_choices,
+    std::vector<uint64_t> const& choice_map
+) {
+    storm::storage::BitVector choices(choice_map.size(),false);
+    for(uint64_t choice = 0; choice < choice_map.size(); ++choice) {
+        if(quotient_choices[choice_map[choice]]) {
+            choices.set(choice,true);
+        }
+    }
+    return choices;
+}
+
+/** Compose the maps of a submodel of a submodel: map each item to inner_map and then to outer_map. */
+std::vector<uint64_t> composeMaps(std::vector<uint64_t> const& inner_map, std::vector<uint64_t> const& outer_map) {
+    std::vector<uint64_t> composed(inner_map.size());
+    for(uint64_t item = 0; item < inner_map.size(); ++item) {
+        composed[item] = outer_map[inner_map[item]];
+    }
+    return composed;
+}
+
 
 /*std::pair<std::vector<uint64_t>,storm::storage::BitVector> fixPolicyForFamily(
     std::vector<uint64_t> const& policy, uint64_t invalid_action,
@@ -285,6 +378,39 @@ storm::storage::BitVector policyToChoicesForFamily(
 }
 
 
+namespace {
+
+/**
+ * Access the memory of a Python buffer (e.g. a memoryview of a bytearray) as an array of T.
+ * @param size minimum number of items of the buffer
+ * @param writable if true, the buffer must not be read-only
+ * @throws std::invalid_argument if the buffer is not a contiguous one-dimensional array of T of sufficient size
+ */
+template<typename T>
+T* bufferData(py::buffer const& buffer, uint64_t size, bool writable) {
+    py::buffer_info info = buffer.request(writable);
+    if(info.ndim != 1 or info.itemsize != sizeof(T) or info.format != py::format_descriptor<T>::format()) {
+        throw std::invalid_argument(
+            "expected a one-dimensional buffer of format " + py::format_descriptor<T>::format() +
+            ", got format " + info.format
+        );
+    }
+    if(info.strides[0] != (py::ssize_t)sizeof(T)) {
+        throw std::invalid_argument("expected a contiguous buffer");
+    }
+    if((uint64_t)info.size < size) {
+        throw std::invalid_argument(
+            "expected a buffer of at least " + std::to_string(size) + " items, got " + std::to_string(info.size)
+        );
+    }
+    if(writable and info.readonly) {
+        throw std::invalid_argument("expected a writable buffer");
+    }
+    return static_cast<T*>(info.ptr);
+}
+
+}
+
 void bindings_coloring(py::module& m) {
 
     m.def("addStateValuations", &synthesis::addStateValuations<double>);
@@ -294,9 +420,93 @@ void bindings_coloring(py::module& m) {
     m.def("schedulerToStateToGlobalChoice", &synthesis::schedulerToStateToGlobalChoice<double>);
     m.def("schedulerToStateToGlobalChoiceExact", &synthesis::schedulerToStateToGlobalChoice<storm::RationalNumber>);
 
-    m.def("computeInconsistentHoleVariance", &synthesis::computeInconsistentHoleVariance);
+    m.def("computeInconsistentHoleVariance", [](
+        synthesis::Family const& family,
+        std::vector<uint64_t> const& row_groups, std::vector<uint64_t> const& choice_to_global_choice,
+        py::array_t<double, py::array::c_style | py::array::forcecast> choice_to_value,
+        synthesis::Coloring const& coloring, std::map<uint64_t,std::vector<uint64_t>> const& hole_to_inconsistent_options,
+        py::array_t<double, py::array::c_style | py::array::forcecast> state_to_expected_visits
+    ) {
+        // numpy arrays (or lists) of values are copied in bulk
+        std::vector<double> values(choice_to_value.data(), choice_to_value.data()+choice_to_value.size());
+        std::vector<double> visits(
+            state_to_expected_visits.data(), state_to_expected_visits.data()+state_to_expected_visits.size()
+        );
+        return synthesis::computeInconsistentHoleVariance(
+            family, row_groups, choice_to_global_choice, values, coloring, hole_to_inconsistent_options, visits
+        );
+    });
+
+    m.def("computeInconsistentHoleDifference", [](
+        synthesis::Coloring const& coloring, uint64_t num_global_choices,
+        std::vector<uint64_t> const& row_groups, std::vector<uint64_t> const& choice_to_global_choice,
+        py::array_t<double, py::array::c_style | py::array::forcecast> choice_to_value,
+        std::map<uint64_t,std::vector<uint64_t>> const& hole_to_inconsistent_options,
+        py::array_t<double, py::array::c_style | py::array::forcecast> state_to_expected_visits
+    ) {
+        std::vector<double> values(choice_to_value.data(), choice_to_value.data()+choice_to_value.size());
+        std::vector<double> visits(
+            state_to_expected_visits.data(), state_to_expected_visits.data()+state_to_expected_visits.size()
+        );
+        return synthesis::computeInconsistentHoleDifference(
+            coloring, num_global_choices, row_groups, choice_to_global_choice, values, hole_to_inconsistent_options, visits
+        );
+    });
 
     m.def("policyToChoicesForFamily", &synthesis::policyToChoicesForFamily);
+    m.def("quotientChoicesToSubmodelChoices", &synthesis::quotientChoicesToSubmodelChoices);
+    m.def("composeMaps", &synthesis::composeMaps);
+
+    // CSR export of the quotient to caller-provided buffers, used to share the quotient between processes
+    m.def("matrixCsrSize", &synthesis::matrixCsrSize);
+    m.def("matrixToCsr", [](
+        storm::storage::SparseMatrix<double> const& matrix,
+        py::buffer row_group_indices, py::buffer row_indications, py::buffer columns, py::buffer values
+    ) {
+        auto [num_row_groups,num_rows,num_entries] = synthesis::matrixCsrSize(matrix);
+        synthesis::matrixToCsr(
+            matrix,
+            bufferData<uint64_t>(row_group_indices,num_row_groups+1,true),
+            bufferData<uint64_t>(row_indications,num_rows+1,true),
+            bufferData<uint64_t>(columns,num_entries,true), bufferData<double>(values,num_entries,true)
+        );
+    });
+    m.def("matrixFromCsr", [](
+        uint64_t num_row_groups, uint64_t num_rows, uint64_t num_entries,
+        py::buffer row_group_indices, py::buffer row_indications, py::buffer columns, py::buffer values
+    ) {
+        return synthesis::matrixFromCsr(
+            num_row_groups, num_rows, num_entries,
+            bufferData<uint64_t>(row_group_indices,num_row_groups+1,false),
+            bufferData<uint64_t>(row_indications,num_rows+1,false),
+            bufferData<uint64_t>(columns,num_entries,false), bufferData<double>(values,num_entries,false)
+        );
+    });
+    m.def("coloringCsrSize", &synthesis::coloringCsrSize);
+    m.def("coloringToCsr", [](
+        synthesis::Coloring const& coloring, py::buffer choice_offsets, py::buffer holes, py::buffer options
+    ) {
+        uint64_t num_choices = coloring.getChoiceToAssignment().size();
+        uint64_t num_pairs = synthesis::coloringCsrSize(coloring);
+        synthesis::coloringToCsr(
+            coloring, bufferData<uint64_t>(choice_offsets,num_choices+1,true),
+            bufferData<uint64_t>(holes,num_pairs,true), bufferData<uint64_t>(options,num_pairs,true)
+        );
+    });
+    m.def("coloringFromCsr", [](
+        synthesis::Family const& family, uint64_t num_row_groups, py::buffer row_group_indices, uint64_t num_choices,
+        py::buffer choice_offsets, py::buffer holes, py::buffer options
+    ) {
+        uint64_t const* row_groups_data = bufferData<uint64_t>(row_group_indices,num_row_groups+1,false);
+        std::vector<uint64_t> row_groups(row_groups_data, row_groups_data+num_row_groups+1);
+        uint64_t const* choice_offsets_data = bufferData<uint64_t>(choice_offsets,num_choices+1,false);
+        uint64_t num_pairs = choice_offsets_data[num_choices];
+        auto choice_to_assignment = synthesis::choiceToAssignmentFromCsr(
+            num_choices, choice_offsets_data,
+            bufferData<uint64_t>(holes,num_pairs,false), bufferData<uint64_t>(options,num_pairs,false)
+        );
+        return std::make_unique<synthesis::Coloring>(family, row_groups, choice_to_assignment);
+    });
 
     py::class_<synthesis::Family>(m, "Family")
         .def(py::init<>())
@@ -311,6 +521,21 @@ void bindings_coloring(py::module& m) {
         .def("holeNumOptions", &synthesis::Family::holeNumOptions)
         .def("holeNumOptionsTotal", &synthesis::Family::holeNumOptionsTotal)
         .def("holeContains", &synthesis::Family::holeContains)
+        .def("to_bytes", [](synthesis::Family const& family) {
+            return py::bytes(family.toBytes());
+        })
+        .def("from_bytes", [](synthesis::Family& family, py::bytes const& bytes) {
+            family.fromBytes(std::string(bytes));
+        }, py::arg("bytes"))
+        ;
+
+    py::class_<synthesis::FamilyEnumerator>(m, "FamilyEnumerator", "Enumerator of hole assignments excluding conflicts")
+        .def(py::init<synthesis::Family const&>(), py::arg("family"))
+        .def("pickAssignment", &synthesis::FamilyEnumerator::pickAssignment, py::arg("family"))
+        .def("excludeConflict", &synthesis::FamilyEnumerator::excludeConflict, py::arg("family"), py::arg("assignment"), py::arg("conflict"))
+        .def("push", &synthesis::FamilyEnumerator::push)
+        .def("pop", &synthesis::FamilyEnumerator::pop)
+        .def("numClauses", &synthesis::FamilyEnumerator::numClauses)
         ;
 
     py::class_<synthesis::Coloring>(m, "Coloring")
@@ -321,7 +546,9 @@ void bindings_coloring(py::module& m) {
         >())
         .def("getChoiceToAssignment", &synthesis::Coloring::getChoiceToAssignment)
         .def("getStateToHoles", &synthesis::Coloring::getStateToHoles)
-        .def("selectCompatibleChoices", &synthesis::Coloring::selectCompatibleChoices)
+        .def("getHoleOptionToChoices", &synthesis::Coloring::getHoleOptionToChoices)
+        .def("selectCompatibleChoices", py::overload_cast<synthesis::Family const&>(&synthesis::Coloring::selectCompatibleChoices, py::const_))
+        .def("selectCompatibleChoices", py::overload_cast<synthesis::Family const&, storm::storage::BitVector const&>(&synthesis::Coloring::selectCompatibleChoices, py::const_))
         .def("collectHoleOptions", &synthesis::Coloring::collectHoleOptions)
         ;
 
@@ -10,6 +10,7 @@ void define_synthesis(py::module& m) {
     bindings_pomdp_family(m);
 
     bindings_coloring(m);
+    bindings_verification(m);
 
     #ifndef DISABLE_SMG
     bindings_smg(m);
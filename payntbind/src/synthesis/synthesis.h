@@ -13,5 +13,6 @@ void bindings_pomdp_family(py::module &m);
 void bindings_posmg(py::module &m);
 
 void bindings_coloring(py::module &m);
+void bindings_verification(py::module &m);
 
 void bindings_smg(py::module &m);
@@ -1,7 +1,10 @@
 #include "MdpModelChecker.h"
 
 #include "storm/modelchecker/prctl/SparseMdpPrctlModelChecker.h"
+#include "storm/modelchecker/hints/ExplicitModelCheckerHint.h"
 #include "storm/exceptions/NotSupportedException.h"
+#include "storm/exceptions/InvalidArgumentException.h"
+#include "storm/utility/macros.h"
 
 namespace synthesis {
 
@@ -18,10 +21,39 @@ namespace synthesis {
         return modelchecker.check(env, task);
     }
 
+    template<typename ValueType>
+    std::shared_ptr<storm::modelchecker::CheckResult> verifyMdpWithHint(
+        storm::Environment const& env,
+        std::shared_ptr<storm::models::sparse::Mdp<ValueType>> const& mdp,
+        storm::logic::Formula const& formula,
+        std::vector<ValueType> const& hint_values,
+        bool produce_schedulers
+    ) {
+        STORM_LOG_THROW(
+            hint_values.size() == mdp->getNumberOfStates(), storm::exceptions::InvalidArgumentException,
+            "expected one hint value per state"
+        );
+        storm::modelchecker::CheckTask<storm::logic::Formula, ValueType> task(formula);
+        task.setProduceSchedulers(produce_schedulers);
+        storm::modelchecker::ExplicitModelCheckerHint<ValueType> hint;
+        hint.setResultHint(hint_values);
+        task.setHint(std::make_shared<storm::modelchecker::ExplicitModelCheckerHint<ValueType>>(hint));
+        storm::modelchecker::SparseMdpPrctlModelChecker<storm::models::sparse::Mdp<ValueType>> modelchecker(*mdp);
+        return modelchecker.check(env, task);
+    }
+
     template std::shared_ptr<storm::modelchecker::CheckResult> verifyMdp<double>(
         storm::Environment const& env,
         std::shared_ptr<storm::models::sparse::Mdp<double>> const& mdp,
         storm::logic::Formula const& formula,
         bool produce_schedulers
     );
+
+    template std::shared_ptr<storm::modelchecker::CheckResult> verifyMdpWithHint<double>(
+        storm::Environment const& env,
+        std::shared_ptr<storm::models::sparse::Mdp<double>> const& mdp,
+        storm::logic::Formula const& formula,
+        std::vector<double> const& hint_values,
+        bool produce_schedulers
+    );
 }
@@ -15,4 +15,17 @@ namespace synthesis {
         bool produce_schedulers
     );
 
+    /**
+     * Model check the MDP using the given values as the starting point of the solver.
+     * @param hint_values for each state of the MDP, a lower bound on its value
+     */
+    template<typename ValueType>
+    std::shared_ptr<storm::modelchecker::CheckResult> verifyMdpWithHint(
+        storm::Environment const& env,
+        std::shared_ptr<storm::models::sparse::Mdp<ValueType>> const& mdp,
+        storm::logic::Formula const& formula,
+        std::vector<ValueType> const& hint_values,
+        bool produce_schedulers
+    );
+
 }
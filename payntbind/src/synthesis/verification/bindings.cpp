@@ -0,0 +1,7 @@
+#include "../synthesis.h"
+
+#include "MdpModelChecker.h"
+
+void bindings_verification(py::module& m) {
+    m.def("verify_mdp_with_hint", &synthesis::verifyMdpWithHint<double>, py::arg("env"), py::arg("mdp"), py::arg("formula"), py::arg("hint_values"), py::arg("produce_schedulers") = true);
+}
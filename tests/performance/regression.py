@@ -0,0 +1,177 @@
+"""
+Performance regression suite: runs the benchmarks listed in suite.json using the batch runner (paynt/benchmark.py) and
+compares wall time, synthesis time, iteration counts and peak memory of each job against the baselines stored in
+baselines.json. A metric regresses if it exceeds its baseline by more than the tolerance band of the metric.
+
+Usage:
+    python3 tests/performance/regression.py [--workers N] [--filter SUBSTRING] [--update-baselines]
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+import click
+
+SUITE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SUITE_DIR, "..", ".."))
+
+import paynt.benchmark
+
+SUITE_PATH = os.path.join(SUITE_DIR, "suite.json")
+BASELINES_PATH = os.path.join(SUITE_DIR, "baselines.json")
+
+# for each metric, the relative and the absolute tolerance: a metric regresses if its value exceeds
+#   baseline * (1 + relative) + absolute
+TOLERANCES = {
+    "wall_time": (0.5, 2.0),
+    "synthesis_time": (0.5, 1.0),
+    "iterations_mdp": (0.1, 2),
+    "iterations_dtmc": (0.1, 2),
+    "iterations_game": (0.1, 2),
+    "peak_memory_mb": (0.3, 64),
+}
+# relative tolerance of the synthesized value
+VALUE_TOLERANCE = 1e-4
+
+
+def load_jobs(job_filter=None):
+    jobs = paynt.benchmark.load_manifest(SUITE_PATH, {})
+    if job_filter is not None:
+        jobs = [job for job in jobs if job_filter in job.id]
+    return jobs
+
+
+def run_suite(jobs, results_path, workers):
+    '''
+    Run the jobs via the batch runner, jobs already recorded in the results file are not rerun.
+    :return for each job id, its latest record
+    '''
+    finished = paynt.benchmark.load_finished(results_path, retry_failed=True)
+    pending = [job for job in jobs if job.id not in finished]
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(results_path)), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    paynt.benchmark.BenchmarkRunner(pending, results_path, log_dir, workers).run()
+
+    records = {}
+    with open(results_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["id"]] = record
+    return {job.id: records[job.id] for job in jobs if job.id in records}
+
+
+def metrics(record):
+    ''' :return measured metrics of the job record '''
+    result = record.get("result", {})
+    measured = {
+        "wall_time": record.get("wall_time"),
+        "synthesis_time": result.get("synthesis_time"),
+        "iterations_mdp": result.get("iterations_mdp"),
+        "iterations_dtmc": result.get("iterations_dtmc"),
+        "iterations_game": result.get("iterations_game"),
+        "peak_memory_mb": record.get("peak_memory_mb"),
+        "value": result.get("value"),
+    }
+    return {metric:value for metric,value in measured.items() if value is not None}
+
+
+def compare(record, baseline):
+    '''
+    Compare the job record against its baseline.
+    :return a list of regressions and a list of improvements, each a human-readable message
+    '''
+    if record.get("status") != "ok":
+        return [f"job finished with status {record.get('status')}"], []
+    measured = metrics(record)
+    regressions = []
+    improvements = []
+    for metric,(relative,absolute) in TOLERANCES.items():
+        if metric not in baseline:
+            continue
+        if metric not in measured:
+            regressions.append(f"{metric} not reported (baseline {baseline[metric]})")
+            continue
+        expected = baseline[metric]
+        value = measured[metric]
+        if value > expected * (1 + relative) + absolute:
+            regressions.append(f"{metric}: {value} > {expected} (+{int(relative*100)}% +{absolute})")
+        elif value < expected * (1 - relative) - absolute:
+            improvements.append(f"{metric}: {value} < {expected}")
+    if "value" in baseline:
+        expected = baseline["value"]
+        value = measured.get("value")
+        if value is None or abs(value - expected) > VALUE_TOLERANCE * max(1, abs(expected)):
+            regressions.append(f"value: {value} != {expected}")
+    return regressions, improvements
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def save_baselines(baselines):
+    with open(BASELINES_PATH, "w") as f:
+        json.dump(baselines, f, indent=4, sort_keys=True)
+        f.write("\n")
+
+
+@click.command()
+@click.option("--workers", type=int, default=1, show_default=True,
+    help="number of jobs to run in parallel, use 1 for stable timings")
+@click.option("--filter", "job_filter", default=None,
+    help="run only jobs whose id contains the given substring")
+@click.option("--results", type=click.Path(), default=None,
+    help="JSON lines file with job results, allows to resume an interrupted run (default: temporary file)")
+@click.option("--update-baselines", is_flag=True, default=False,
+    help="store the measured metrics of successful jobs as new baselines")
+def main(workers, job_filter, results, update_baselines):
+    jobs = load_jobs(job_filter)
+    if results is None:
+        results = os.path.join(tempfile.mkdtemp(prefix="paynt-regression-"), "results.jsonl")
+    records = run_suite(jobs, results, workers)
+    baselines = load_baselines()
+
+    num_regressions = 0
+    for job in jobs:
+        record = records.get(job.id)
+        if record is None:
+            print(f"{job.id}: no result")
+            num_regressions += 1
+            continue
+        if update_baselines:
+            if record.get("status") == "ok":
+                baselines[job.id] = metrics(record)
+                print(f"{job.id}: baseline updated")
+            else:
+                print(f"{job.id}: status {record.get('status')}, baseline kept")
+            continue
+        if job.id not in baselines:
+            print(f"{job.id}: no baseline")
+            continue
+        regressions,improvements = compare(record, baselines[job.id])
+        num_regressions += len(regressions)
+        status = "REGRESSION" if regressions else "ok"
+        print(f"{job.id}: {status}")
+        for message in regressions:
+            print(f"    regression: {message}")
+        for message in improvements:
+            print(f"    improvement: {message}")
+
+    print(f"results: {results}")
+    if update_baselines:
+        save_baselines(baselines)
+        return
+    if num_regressions > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
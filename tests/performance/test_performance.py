@@ -0,0 +1,29 @@
+import os
+import pytest
+
+import regression
+
+"""
+Performance regression tests: each benchmark of the suite must stay within the tolerance bands of its baseline.
+The number of parallel jobs can be set via the environment variable PAYNT_BENCHMARK_WORKERS.
+"""
+
+JOBS = regression.load_jobs()
+BASELINES = regression.load_baselines()
+
+
+@pytest.fixture(scope="module")
+def suite_results(tmp_path_factory):
+    workers = int(os.environ.get("PAYNT_BENCHMARK_WORKERS", 1))
+    results_path = tmp_path_factory.mktemp("performance") / "results.jsonl"
+    jobs = [job for job in JOBS if job.id in BASELINES]
+    return regression.run_suite(jobs, str(results_path), workers)
+
+
+@pytest.mark.parametrize("job_id", [job.id for job in JOBS])
+def test_performance(suite_results, job_id):
+    if job_id not in BASELINES:
+        pytest.skip("no baseline, record it via regression.py --update-baselines")
+    assert job_id in suite_results, "job produced no result"
+    regressions,_ = regression.compare(suite_results[job_id], BASELINES[job_id])
+    assert not regressions, "; ".join(regressions)
@@ -0,0 +1,72 @@
+import unittest
+
+from paynt.utils.cache import LruCache
+
+"""
+Unit tests of the LRU cache used for DTMCs induced by hole assignments.
+"""
+
+
+class LruCacheTestSuite(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LruCache(max_size=10)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1, 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIn("a", cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 3)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 1, 0))
+
+    def test_eviction_of_least_recently_used(self):
+        cache = LruCache(max_size=10)
+        cache.put("a", 1, 4)
+        cache.put("b", 2, 4)
+        # using a makes b the least recently used item
+        cache.get("a")
+        cache.put("c", 3, 4)
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_eviction_of_multiple_items(self):
+        cache = LruCache(max_size=10)
+        for key in range(5):
+            cache.put(key, key, 2)
+        self.assertEqual(cache.size, 10)
+        cache.put("large", None, 7)
+        self.assertEqual(list(cache.items), [4, "large"])
+        self.assertEqual(cache.size, 9)
+        self.assertEqual(cache.evictions, 4)
+
+    def test_replace_updates_size(self):
+        cache = LruCache(max_size=10)
+        cache.put("a", 1, 6)
+        cache.put("a", 2, 3)
+        self.assertEqual(cache.get("a"), 2)
+        self.assertEqual(cache.size, 3)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_item_larger_than_cap_is_not_stored(self):
+        cache = LruCache(max_size=10)
+        cache.put("a", 1, 4)
+        cache.put("b", 2, 11)
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertEqual(cache.size, 4)
+        # replacing an item by one larger than the cap drops the old value
+        cache.put("a", 3, 11)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.size, 0)
+
+    def test_clear(self):
+        cache = LruCache(max_size=10)
+        cache.put("a", 1, 4)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+        self.assertIsNone(cache.get("a"))
@@ -0,0 +1,151 @@
+import unittest
+
+from paynt.family.conflict_store import ConflictStore
+import paynt.family.solver
+
+"""
+Unit tests of the subsumption index of CEGIS conflicts.
+"""
+
+
+class BoxFamily:
+    ''' Minimal family exposing the interface used by ConflictStore. '''
+
+    def __init__(self, hole_options, hole_num_options_total):
+        self.options = [list(options) for options in hole_options]
+        self.num_options_total = hole_num_options_total
+
+    @property
+    def num_holes(self):
+        return len(self.options)
+
+    def hole_options(self, hole):
+        return self.options[hole]
+
+    def hole_num_options(self, hole):
+        return len(self.options[hole])
+
+    def hole_num_options_total(self, hole):
+        return self.num_options_total[hole]
+
+
+NUM_OPTIONS_TOTAL = [3, 2, 4, 1]
+
+def family(*hole_options):
+    ''' Family restricting each hole to the given options, None stands for all options. '''
+    options = [
+        range(NUM_OPTIONS_TOTAL[hole]) if hole_options[hole] is None else hole_options[hole]
+        for hole in range(len(NUM_OPTIONS_TOTAL))
+    ]
+    return BoxFamily(options, NUM_OPTIONS_TOTAL)
+
+def assignment(*options):
+    return family(*[[option] for option in options])
+
+FULL = family(None, None, None, None)
+
+
+class RecordingSolver(paynt.family.solver.DesignSpaceSolver):
+    ''' Solver recording its push/pop scopes, used to run DesignSpaceSolver.level without an SMT solver. '''
+
+    def __init__(self):
+        super().__init__()
+        self.depth = 0
+
+    def push(self):
+        self.depth += 1
+
+    def pop(self):
+        self.depth -= 1
+
+
+class ConflictStoreTestSuite(unittest.TestCase):
+
+    def test_find_superset(self):
+        store = ConflictStore()
+        store.add_box({0: frozenset([0,1]), 2: frozenset([3])})
+        self.assertIsNotNone(store.find_superset({0: frozenset([1]), 2: frozenset([3])}))
+        self.assertIsNotNone(store.find_superset({0: frozenset([0]), 1: frozenset([1]), 2: frozenset([3])}))
+        # an option outside of the stored box
+        self.assertIsNone(store.find_superset({0: frozenset([2]), 2: frozenset([3])}))
+        self.assertIsNone(store.find_superset({0: frozenset([1,2]), 2: frozenset([3])}))
+        # the stored box restricts a hole the box does not restrict
+        self.assertIsNone(store.find_superset({0: frozenset([1])}))
+        # a box restricting no hole contains everything
+        store.add_box({})
+        self.assertIsNotNone(store.find_superset({0: frozenset([2])}))
+
+    def test_find_subsets(self):
+        store = ConflictStore()
+        store.add_box({0: frozenset([0]), 2: frozenset([3])})
+        store.add_box({0: frozenset([1]), 1: frozenset([0]), 2: frozenset([1,2])})
+        store.add_box({0: frozenset([2])})
+        store.add_box({1: frozenset([0])})
+        self.assertEqual(sorted(store.find_subsets({0: frozenset([0,1])})), [0,1])
+        self.assertEqual(sorted(store.find_subsets({0: frozenset([0,1]), 2: frozenset([1,2,3])})), [0,1])
+        self.assertEqual(store.find_subsets({0: frozenset([0,1]), 2: frozenset([3])}), [0])
+        self.assertEqual(sorted(store.find_subsets({})), [0,1,2,3])
+
+    def test_add_conflicts_subsumption(self):
+        store = ConflictStore()
+        # conflict on hole 0 rejects all members with option 1 at hole 0
+        new = store.add_conflicts(FULL, assignment(1,0,2,0), [[0]])
+        self.assertEqual(new, [[0]])
+        # subsumed: a more specific conflict of a member of the rejected box
+        new = store.add_conflicts(FULL, assignment(1,1,3,0), [[0,1]])
+        self.assertEqual(new, [])
+        self.assertEqual(store.conflicts_subsumed, 1)
+        # supersedes the stored box (the conflict over hole 3, which has a single option, restricts nothing)
+        store.add_conflicts(FULL, assignment(2,0,0,0), [[0,2]])
+        new = store.add_conflicts(FULL, assignment(2,0,0,0), [[0,3]])
+        self.assertEqual(new, [[0,3]])
+        self.assertEqual(store.boxes_superseded, 1)
+        self.assertEqual(len(store), 2)
+
+    def test_conflict_within_subfamily(self):
+        store = ConflictStore()
+        subfamily = family([0,1], None, [2], None)
+        store.add_conflicts(subfamily, assignment(0,1,2,0), [[1]])
+        # the box is restricted to the subfamily
+        self.assertTrue(store.covers(family([0], [1], [2], None)))
+        self.assertTrue(store.covers(family([0,1], [1], [2], None)))
+        self.assertFalse(store.covers(family([0,1,2], [1], [2], None)))
+        self.assertFalse(store.covers(family([0], [1], [1,2], None)))
+        self.assertFalse(store.covers(family([0], None, [2], None)))
+
+    def test_covers(self):
+        store = ConflictStore()
+        self.assertFalse(store.covers(FULL))
+        store.add_conflicts(FULL, assignment(1,0,2,0), [[0,2]])
+        self.assertTrue(store.covers(family([1], None, [2], None)))
+        self.assertTrue(store.covers(assignment(1,1,2,0)))
+        self.assertFalse(store.covers(family([1], None, [1,2], None)))
+        self.assertFalse(store.covers(FULL))
+        self.assertEqual(store.families_pruned, 2)
+
+    def test_level_mirrors_solver_scopes(self):
+        store = ConflictStore()
+        solver = RecordingSolver()
+        for depth in [0, 1, 2, 3, 2, 3, 1, 2, 2, 1, 4]:
+            solver.level(depth)
+            store.level(depth)
+            self.assertEqual(len(store.scopes)-1, solver.depth)
+
+    def test_level_removes_scoped_boxes(self):
+        store = ConflictStore()
+        store.add_conflicts(FULL, assignment(0,0,0,0), [[0]])
+        store.level(1)
+        store.add_conflicts(FULL, assignment(1,0,0,0), [[0]])
+        store.level(2)
+        store.add_conflicts(FULL, assignment(2,0,0,0), [[0]])
+        self.assertTrue(store.covers(assignment(2,1,1,0)))
+        # back to a sibling of depth 2: the box of the previous depth-2 scope is removed
+        store.level(2)
+        self.assertFalse(store.covers(assignment(2,1,1,0)))
+        self.assertTrue(store.covers(assignment(1,1,1,0)))
+        # back to a sibling of depth 1
+        store.level(1)
+        self.assertFalse(store.covers(assignment(1,1,1,0)))
+        self.assertTrue(store.covers(assignment(0,1,1,0)))
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.index.keys(), {(0,0)})
@@ -0,0 +1,105 @@
+import itertools
+import random
+import unittest
+
+import paynt.family.family
+import paynt.family.smt
+import paynt.family.enumerator
+
+"""
+The native design space enumerator must explore the same assignments as the SMT solver once the same conflicts are
+excluded.
+"""
+
+HOLE_NUM_OPTIONS = [3, 2, 4, 2, 3]
+
+
+def create_family():
+    family = paynt.family.family.Family()
+    for hole,num_options in enumerate(HOLE_NUM_OPTIONS):
+        family.add_hole(f"h{hole}", [f"o{option}" for option in range(num_options)])
+    return family
+
+
+def create_subfamily(family):
+    ''' Subfamily with some holes restricted. '''
+    suboptions = [family.hole_options(hole) for hole in range(family.num_holes)]
+    suboptions[0] = [0, 2]
+    suboptions[2] = [1, 2, 3]
+    return family.assume_options_copy(suboptions)
+
+
+def members(family):
+    return set(itertools.product(*[family.hole_options(hole) for hole in range(family.num_holes)]))
+
+
+def random_conflicts(family, num_conflicts, seed):
+    ''' :return a list of pairs (assignment, conflicting holes) with assignments from the family '''
+    rng = random.Random(seed)
+    conflicts = []
+    for _ in range(num_conflicts):
+        assignment = tuple(rng.choice(family.hole_options(hole)) for hole in range(family.num_holes))
+        conflict = sorted(rng.sample(range(family.num_holes), rng.randint(1, family.num_holes)))
+        conflicts.append((assignment, conflict))
+    return conflicts
+
+
+def explore(solver_class, conflicts):
+    '''
+    Exclude the conflicts from the subfamily, then enumerate the remaining members, excluding each picked
+    assignment. Each solver works on its own family objects since families cache their encoding.
+    :return the list of visited assignments
+    '''
+    family = create_family()
+    subfamily = create_subfamily(family)
+    solver = solver_class(family)
+    subfamily.encode(solver)
+    for assignment,conflict in conflicts:
+        assignment = subfamily.assume_options_copy([[option] for option in assignment])
+        solver.exclude_conflicts(subfamily, assignment, [conflict])
+    visited = []
+    all_holes = list(range(family.num_holes))
+    while True:
+        assignment = solver.pick_assignment(subfamily)
+        if assignment is None:
+            break
+        visited.append(tuple(assignment.hole_options(hole)[0] for hole in all_holes))
+        solver.exclude_conflicts(subfamily, assignment, [all_holes])
+    return visited
+
+
+class EnumeratorTestSuite(unittest.TestCase):
+
+    def expected_members(self, conflicts):
+        subfamily = create_subfamily(create_family())
+        remaining = members(subfamily)
+        for assignment,conflict in conflicts:
+            remaining = {
+                member for member in remaining if any(member[hole] != assignment[hole] for hole in conflict)
+            }
+        return remaining
+
+    def check_same_exploration(self, conflicts):
+        visited_smt = explore(paynt.family.smt.SmtSolver, conflicts)
+        visited_native = explore(paynt.family.enumerator.FamilyEnumerator, conflicts)
+        # each assignment is visited once
+        self.assertEqual(len(visited_smt), len(set(visited_smt)))
+        self.assertEqual(len(visited_native), len(set(visited_native)))
+        # the order of exploration may differ
+        self.assertEqual(set(visited_native), set(visited_smt))
+        self.assertEqual(set(visited_native), self.expected_members(conflicts))
+
+    def test_no_conflicts(self):
+        self.check_same_exploration([])
+
+    def test_random_conflicts(self):
+        for seed in range(10):
+            family = create_subfamily(create_family())
+            self.check_same_exploration(random_conflicts(family, num_conflicts=8, seed=seed))
+
+    def test_all_members_excluded(self):
+        family = create_subfamily(create_family())
+        # a conflict over a single hole excludes all members that share its option
+        conflicts = [((option,0,1,0,0), [0]) for option in family.hole_options(0)]
+        self.assertEqual(explore(paynt.family.smt.SmtSolver, conflicts), [])
+        self.assertEqual(explore(paynt.family.enumerator.FamilyEnumerator, conflicts), [])
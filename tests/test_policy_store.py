@@ -0,0 +1,186 @@
+import unittest
+
+import numpy
+
+from paynt.synthesizer.policy_tree import PolicyStore, UNDEFINED_ACTION
+
+"""
+Unit tests of the compact store of policies of a policy tree: deduplication, delta encoding, reference counting and
+reuse of freed entries.
+"""
+
+NUM_STATES = 200
+
+
+def make_policy(seed, num_states=NUM_STATES, num_actions=5):
+    rng = numpy.random.default_rng(seed)
+    actions = rng.integers(0, num_actions, size=num_states).astype(numpy.int32)
+    actions[rng.random(num_states) < 0.2] = UNDEFINED_ACTION
+    return actions, actions != UNDEFINED_ACTION
+
+def mutate(policy, seed, num_changes=3):
+    ''' :return a copy of the policy with a few states changed '''
+    rng = numpy.random.default_rng(seed)
+    actions = policy[0].copy()
+    states = rng.choice(len(actions), size=num_changes, replace=False)
+    actions[states] = (actions[states] + 2) % 5
+    return actions, actions != UNDEFINED_ACTION
+
+
+class PolicyStoreTestSuite(unittest.TestCase):
+
+    def assertPolicyEqual(self, decoded, policy):
+        self.assertIsNotNone(decoded)
+        self.assertEqual(decoded[0].dtype, numpy.int32)
+        numpy.testing.assert_array_equal(decoded[0], policy[0])
+        numpy.testing.assert_array_equal(decoded[1], policy[1])
+
+    def assertStoreConsistent(self, store):
+        ''' Reference counts equal the number of slots and delta entries referring to each live entry. '''
+        expected = {}
+        for entry in store.slots:
+            if entry is not None:
+                expected[entry] = expected.get(entry,0) + 1
+        for entry,base in enumerate(store.entry_base):
+            if store.entry_actions[entry] is not None and base is not None:
+                expected[base] = expected.get(base,0) + 1
+        live = {entry for entry,actions in enumerate(store.entry_actions) if actions is not None}
+        self.assertEqual(set(expected), live)
+        for entry,references in expected.items():
+            self.assertEqual(store.entry_references[entry], references)
+        self.assertTrue(set(store.free_entries).isdisjoint(live))
+        self.assertEqual(sorted(sum(store.hash_to_entries.values(), [])), sorted(live))
+        for entry in live:
+            self.assertLessEqual(store.entry_depth[entry], PolicyStore.max_delta_depth)
+
+    def test_round_trip(self):
+        store = PolicyStore()
+        policies = [make_policy(seed) for seed in range(5)]
+        for policy in policies:
+            store.append(policy)
+        self.assertEqual(len(store), 5)
+        for policy_index,policy in enumerate(policies):
+            self.assertPolicyEqual(store[policy_index], policy)
+        for decoded,policy in zip(store, policies):
+            self.assertPolicyEqual(decoded, policy)
+        # five actions fit into a byte
+        self.assertTrue(all(actions.dtype == numpy.int8 for actions in store.entry_actions))
+        self.assertStoreConsistent(store)
+
+    def test_large_actions(self):
+        store = PolicyStore()
+        policy = make_policy(0, num_actions=1000)
+        store.append(policy)
+        self.assertEqual(store.entry_actions[0].dtype, numpy.int16)
+        self.assertPolicyEqual(store[0], policy)
+
+    def test_deduplication(self):
+        store = PolicyStore()
+        policy = make_policy(0)
+        store.append(policy)
+        store.append(make_policy(1))
+        store.append((policy[0].copy(), policy[1].copy()))
+        self.assertEqual(store.slots[0], store.slots[2])
+        self.assertEqual(store.entry_references[store.slots[0]], 2)
+        self.assertPolicyEqual(store[2], policy)
+        # releasing one of the duplicates keeps the shared entry
+        store[0] = None
+        self.assertTrue(store.is_discarded(0))
+        self.assertFalse(store.is_discarded(2))
+        self.assertPolicyEqual(store[2], policy)
+        self.assertStoreConsistent(store)
+
+    def test_delta_encoding(self):
+        store = PolicyStore()
+        policy = make_policy(0)
+        similar = mutate(policy, 1)
+        store.append(policy)
+        store.append(similar)
+        entry = store.slots[1]
+        self.assertEqual(store.entry_base[entry], store.slots[0])
+        self.assertEqual(len(store.entry_states[entry]), 3)
+        self.assertPolicyEqual(store[1], similar)
+        # an unrelated policy is stored in full
+        store.append(make_policy(2), reference_index=0)
+        self.assertIsNone(store.entry_base[store.slots[2]])
+        self.assertStoreConsistent(store)
+
+    def test_replace(self):
+        store = PolicyStore()
+        policy = make_policy(0)
+        store.append(policy)
+        store.append(make_policy(1))
+        replacement = mutate(policy, 2)
+        store[0] = replacement
+        self.assertPolicyEqual(store[0], replacement)
+        # the replaced entry is kept alive as the base of the replacement
+        base = store.entry_base[store.slots[0]]
+        self.assertIsNotNone(base)
+        numpy.testing.assert_array_equal(store.decode(base), policy[0])
+        self.assertEqual(store.entry_references[base], 1)
+        self.assertStoreConsistent(store)
+
+    def test_release_frees_chain(self):
+        store = PolicyStore()
+        policy = make_policy(0)
+        store.append(policy)
+        for seed in range(1, 4):
+            policy = mutate(policy, seed)
+            store.append(policy)
+        num_entries = len(store.entry_actions)
+        for policy_index in range(len(store)):
+            store[policy_index] = None
+        self.assertEqual(sorted(store.free_entries), list(range(num_entries)))
+        self.assertEqual(store.hash_to_entries, {})
+        self.assertEqual(store.nbytes(), 0)
+        self.assertIsNone(store[0])
+        # freed entries are reused
+        store.append(make_policy(5))
+        self.assertEqual(len(store.entry_actions), num_entries)
+        self.assertPolicyEqual(store[4], make_policy(5))
+        self.assertStoreConsistent(store)
+
+    def test_delta_chain_is_bounded(self):
+        store = PolicyStore()
+        policies = [make_policy(0)]
+        store.append(policies[0])
+        for seed in range(1, 3*PolicyStore.max_delta_depth):
+            policies.append(mutate(policies[-1], seed, num_changes=1))
+            store.append(policies[-1])
+        depths = [store.entry_depth[entry] for entry in store.slots]
+        self.assertEqual(max(depths), PolicyStore.max_delta_depth)
+        # policies beyond the maximum depth are encoded against an ancestor instead of being stored in full
+        self.assertEqual(sum(depth == 0 for depth in depths), 1)
+        for policy_index,policy in enumerate(policies):
+            self.assertPolicyEqual(store[policy_index], policy)
+        self.assertStoreConsistent(store)
+
+    def test_chain_survives_release_of_intermediate_policies(self):
+        store = PolicyStore()
+        policies = [make_policy(0)]
+        store.append(policies[0])
+        for seed in range(1, 12):
+            policies.append(mutate(policies[-1], seed))
+            store.append(policies[-1])
+        for policy_index in range(0, 11):
+            store[policy_index] = None
+        self.assertPolicyEqual(store[11], policies[11])
+        self.assertStoreConsistent(store)
+        # only the chain of the remaining policy is kept
+        live = [entry for entry,actions in enumerate(store.entry_actions) if actions is not None]
+        self.assertEqual(len(live), store.entry_depth[store.slots[11]] + 1)
+
+    def test_compact(self):
+        store = PolicyStore()
+        policies = [make_policy(seed) for seed in range(6)]
+        for policy in policies:
+            store.append(policy)
+        store[1] = None
+        store[4] = None
+        policy_old_to_new = store.compact()
+        self.assertEqual(policy_old_to_new, [0, None, 1, 2, None, 3])
+        self.assertEqual(len(store), 4)
+        for old_index,new_index in enumerate(policy_old_to_new):
+            if new_index is not None:
+                self.assertPolicyEqual(store[new_index], policies[old_index])
+        self.assertStoreConsistent(store)
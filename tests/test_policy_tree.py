@@ -0,0 +1,74 @@
+import os
+import unittest
+
+import paynt.parser.sketch
+import paynt.synthesizer.policy_tree
+import paynt.utils.timer
+
+from paynt.synthesizer.policy_tree import SynthesizerPolicyTree
+
+"""
+The parallel expansion of the policy tree must decide every member of an MDP family the same way as the sequential
+one, and families it did not manage to decide must be reported as undecided.
+"""
+
+PROJECT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "archive", "atva24-policy-trees",
+    "obstacles-demo")
+
+
+def evaluate(num_workers, worker_family_budget=1):
+    quotient = paynt.parser.sketch.Sketch.load_sketch(
+        os.path.join(PROJECT, "sketch.templ"), os.path.join(PROJECT, "sketch.props"))
+    synthesizer = SynthesizerPolicyTree(quotient)
+    SynthesizerPolicyTree.num_workers = num_workers
+    SynthesizerPolicyTree.worker_family_budget = worker_family_budget
+    evaluations = synthesizer.evaluate(print_stats=False)
+    return synthesizer, evaluations
+
+
+def member_satisfiability(evaluations):
+    ''' :return for each member of the evaluated families, its satisfiability '''
+    members = {}
+    for evaluation in evaluations:
+        for combination in evaluation.family.all_combinations():
+            assert combination not in members, "families of the evaluations overlap"
+            members[combination] = evaluation.sat
+    return members
+
+
+class PolicyTreeTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.num_workers = SynthesizerPolicyTree.num_workers
+        self.worker_family_budget = SynthesizerPolicyTree.worker_family_budget
+
+    def tearDown(self):
+        SynthesizerPolicyTree.num_workers = self.num_workers
+        SynthesizerPolicyTree.worker_family_budget = self.worker_family_budget
+        paynt.utils.timer.GlobalTimer.global_timer = None
+
+    def test_parallel_matches_sequential(self):
+        sequential,sequential_evaluations = evaluate(num_workers=1)
+        # a budget of one family per task makes the workers return undecided subtrees to be grafted and requeued
+        parallel,parallel_evaluations = evaluate(num_workers=2)
+
+        sequential_members = member_satisfiability(sequential_evaluations)
+        parallel_members = member_satisfiability(parallel_evaluations)
+        self.assertEqual(len(sequential_members), sequential.quotient.family.size)
+        self.assertEqual(parallel_members, sequential_members)
+        self.assertNotIn(None, parallel_members.values())
+
+        # the trees before post-processing are identical
+        self.assertEqual(parallel.stat.num_nodes, sequential.stat.num_nodes)
+        self.assertEqual(parallel.stat.num_leaves, sequential.stat.num_leaves)
+        self.assertEqual(parallel.stat.num_mdps_sat, sequential.stat.num_mdps_sat)
+        self.assertEqual(parallel.policy_tree.collect_undecided(), [])
+
+    def test_interrupted_expansion_reports_undecided_families(self):
+        paynt.utils.timer.GlobalTimer.start(0)
+        synthesizer,evaluations = evaluate(num_workers=2)
+        members = member_satisfiability(evaluations)
+        # every member is reported, none of them is decided
+        self.assertEqual(len(members), synthesizer.quotient.family.size)
+        self.assertEqual(set(members.values()), {None})
+        self.assertEqual(synthesizer.policy_tree.collect_undecided(), [synthesizer.policy_tree.root])
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+
+from paynt.utils.telemetry import Telemetry, JsonlSink, PrometheusSink, RingBufferSink
+
+"""
+Unit tests of the telemetry dispatcher and its sinks.
+"""
+
+
+class TelemetryTestSuite(unittest.TestCase):
+
+    def setUp(self):
+        Telemetry.close()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        Telemetry.close()
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_disabled_without_sinks(self):
+        self.assertFalse(Telemetry.enabled())
+        self.assertFalse(Telemetry.sample())
+        Telemetry.emit("status", iteration=1)
+        self.assertEqual(Telemetry.num_samples, 0)
+
+    def test_sampling(self):
+        sink = RingBufferSink()
+        Telemetry.add_sink(sink)
+        Telemetry.sample_period = 3
+        sampled = [Telemetry.sample() for _ in range(7)]
+        self.assertEqual(sampled, [True, False, False, True, False, False, True])
+
+    def test_ring_buffer(self):
+        sink = RingBufferSink(capacity=2)
+        Telemetry.add_sink(sink)
+        for iteration in range(3):
+            Telemetry.emit("family", iteration=iteration)
+        Telemetry.emit("status", iteration=3)
+        self.assertEqual([event["iteration"] for event in sink.events()], [2, 3])
+        self.assertEqual([event["iteration"] for event in sink.events("family")], [2])
+        self.assertIn("timestamp", sink.events()[0])
+
+    def test_jsonl_flushes_all_but_family_events(self):
+        path = self.path("events.jsonl")
+        Telemetry.add_sink(JsonlSink(path))
+        Telemetry.emit("family", iteration=1)
+        with open(path) as f:
+            self.assertEqual(f.read(), "")
+        Telemetry.emit("status", iteration=1, method="ar")
+        with open(path) as f:
+            events = [json.loads(line) for line in f]
+        self.assertEqual([event["event"] for event in events], ["family", "status"])
+        self.assertEqual(events[1]["method"], "ar")
+
+    def test_jsonl_serializes_unknown_types(self):
+        path = self.path("events.jsonl")
+        Telemetry.add_sink(JsonlSink(path))
+        Telemetry.emit("synthesis_finished", assignment=object())
+        Telemetry.close()
+        with open(path) as f:
+            event = json.loads(f.readline())
+        self.assertIsInstance(event["assignment"], str)
+
+    def test_prometheus_gauges(self):
+        path = self.path("paynt.prom")
+        Telemetry.add_sink(PrometheusSink(path))
+        Telemetry.emit("synthesis_started", method="ar", family_size=10)
+        Telemetry.emit("family", iteration=5)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertIn("# TYPE paynt_family_size gauge", lines)
+        self.assertIn('paynt_family_size{method="ar"} 10', lines)
+        # family events are not exported
+        self.assertFalse(any(line.startswith("paynt_iteration") for line in lines))
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_prometheus_write_period(self):
+        path = self.path("paynt.prom")
+        sink = PrometheusSink(path)
+        Telemetry.add_sink(sink)
+        Telemetry.emit("status", iteration=1, feasible=True)
+        # status events within the write period are only recorded
+        Telemetry.emit("status", iteration=2, feasible=False)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertIn("paynt_iteration{} 1", lines)
+        self.assertIn("paynt_feasible{} 1", lines)
+        # lifecycle events are written immediately
+        Telemetry.emit("synthesis_finished", iteration=3)
+        with open(path) as f:
+            self.assertIn("paynt_iteration{} 3", f.read().splitlines())
+        Telemetry.emit("status", iteration=4)
+        Telemetry.close()
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertIn("paynt_iteration{} 4", lines)
+        self.assertIn("paynt_feasible{} 0", lines)
+
+    def test_close_resets_dispatcher(self):
+        sink = RingBufferSink()
+        Telemetry.add_sink(sink)
+        Telemetry.sample_period = 5
+        Telemetry.sample()
+        Telemetry.close()
+        self.assertFalse(Telemetry.enabled())
+        self.assertEqual(Telemetry.sample_period, 1)
+        self.assertEqual(Telemetry.num_samples, 0)
+        Telemetry.emit("status", iteration=1)
+        self.assertEqual(sink.events(), [])